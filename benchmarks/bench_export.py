@@ -0,0 +1,125 @@
+"""
+导出性能对比: 现有CSV导出 vs 分区Parquet导出
+
+比较文件大小、写入耗时和用pandas读回的耗时。
+
+用法:
+    python benchmarks/bench_export.py --rows 1000000
+"""
+import argparse
+import datetime
+import os
+import random
+import shutil
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+import spier_export  # noqa: E402
+
+CSV_COLUMNS = ["社区", "标题", "关键词", "作者", "点赞", "评论数", "发布时间", "帖子内容", "详情"]
+
+
+def make_records(rows, subreddits):
+    """
+    生成模拟帖子记录
+
+    @param {int} rows - 记录数
+    @param {int} subreddits - 社区数
+    @return {list} - 帖子记录列表
+    """
+    rng = random.Random(42)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(2000)]
+    names = [f"sub{i}" for i in range(subreddits)]
+    now = time.time()
+    records = []
+    for i in range(rows):
+        post_id = format(i, "x")
+        records.append({
+            "id": post_id,
+            "subreddit": rng.choice(names),
+            "title": " ".join(rng.choices(words, k=rng.randint(4, 14))),
+            "keyword": rng.choice(["", "python", "data"]),
+            "author": rng.choice(words),
+            "score": rng.randint(0, 50000),
+            "num_comments": rng.randint(0, 3000),
+            "created_utc": now - rng.randint(0, 86400 * 365),
+            "selftext": " ".join(rng.choices(words, k=rng.randint(0, 30)))[:200],
+            "url": f"https://www.reddit.com/r/x/comments/{post_id}/",
+            "collected_at": now - rng.randint(0, 86400 * 3),
+        })
+    return records
+
+
+def to_csv_rows(records):
+    """
+    按表格显示格式（全部为字符串）转换记录，模拟现有CSV导出的数据来源
+
+    @param {list} records - 帖子记录列表
+    @return {list} - 行字典列表
+    """
+    rows = []
+    for r in records:
+        values = (
+            r["subreddit"], r["title"], r["keyword"] or "无", r["author"], str(r["score"]),
+            str(r["num_comments"]),
+            datetime.datetime.fromtimestamp(r["created_utc"]).strftime("%Y-%m-%d %H:%M"),
+            r["selftext"], r["url"]
+        )
+        rows.append(dict(zip(CSV_COLUMNS, values)))
+    return rows
+
+
+def dir_size(path):
+    """
+    目录或文件的总字节数
+    """
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+
+def timed(func, *args, **kwargs):
+    """
+    执行函数并返回 (结果, 耗时秒)
+    """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CSV与Parquet导出性能对比")
+    parser.add_argument("--rows", type=int, default=200000, help="模拟记录数")
+    parser.add_argument("--subreddits", type=int, default=20, help="模拟社区数")
+    args = parser.parse_args()
+
+    records = make_records(args.rows, args.subreddits)
+    work_dir = tempfile.mkdtemp(prefix="spier-bench-")
+    try:
+        csv_path = os.path.join(work_dir, "data.csv")
+        parquet_dir = os.path.join(work_dir, "dataset")
+
+        def write_csv():
+            pd.DataFrame(to_csv_rows(records)).to_csv(csv_path, index=False, encoding="utf-8-sig")
+
+        _, csv_write = timed(write_csv)
+        _, csv_read = timed(pd.read_csv, csv_path, encoding="utf-8-sig")
+        _, pq_write = timed(spier_export.export_parquet, records, parquet_dir)
+        _, pq_read = timed(pd.read_parquet, parquet_dir)
+
+        print(f"记录数: {args.rows}, 社区数: {args.subreddits}")
+        print(f"{'格式':<10}{'大小(MB)':>12}{'写入(s)':>12}{'读回(s)':>12}")
+        print(f"{'CSV':<10}{dir_size(csv_path) / 1e6:>12.2f}{csv_write:>12.2f}{csv_read:>12.2f}")
+        print(f"{'Parquet':<10}{dir_size(parquet_dir) / 1e6:>12.2f}{pq_write:>12.2f}{pq_read:>12.2f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
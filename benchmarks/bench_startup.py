@@ -0,0 +1,71 @@
+"""
+启动耗时测试: 从启动进程到主窗口首次绘制完成的时间
+
+分别测量直接运行脚本和PyInstaller打包后的程序。程序在环境变量
+REDDIT_SPIER_STARTUP_PROBE 指定的文件中写入首次绘制的时间戳后自动退出。
+
+用法:
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --exe "dist/Reddit关键词采集工具.exe"
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_EXE = os.path.join(ROOT_DIR, "dist", "Reddit关键词采集工具.exe" if os.name == "nt" else "Reddit关键词采集工具")
+
+
+def measure(command, runs, timeout):
+    """
+    多次启动程序并测量首次绘制耗时
+
+    @param {list} command - 启动命令
+    @param {int} runs - 启动次数
+    @param {float} timeout - 单次启动超时（秒）
+    @return {list} - 每次的耗时（秒）
+    """
+    timings = []
+    for _ in range(runs):
+        fd, probe_path = tempfile.mkstemp(prefix="spier-startup-", suffix=".txt")
+        os.close(fd)
+        os.remove(probe_path)
+        env = dict(os.environ, REDDIT_SPIER_STARTUP_PROBE=probe_path)
+        try:
+            start = time.time()
+            subprocess.run(command, cwd=ROOT_DIR, env=env, timeout=timeout, check=False)
+            with open(probe_path) as f:
+                timings.append(float(f.read()) - start)
+        finally:
+            if os.path.exists(probe_path):
+                os.remove(probe_path)
+    return timings
+
+
+def report(name, timings):
+    """
+    输出测量结果
+    """
+    print(f"{name:<10}最小 {min(timings):.3f}s  中位数 {statistics.median(timings):.3f}s  最大 {max(timings):.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测量启动到首次绘制的耗时")
+    parser.add_argument("--runs", type=int, default=5, help="每种方式的启动次数")
+    parser.add_argument("--exe", default=DEFAULT_EXE, help="PyInstaller打包后的程序路径")
+    parser.add_argument("--timeout", type=float, default=60, help="单次启动超时（秒）")
+    args = parser.parse_args()
+
+    report("脚本", measure([sys.executable, os.path.join(ROOT_DIR, "reddit_spier.py")], args.runs, args.timeout))
+    if os.path.exists(args.exe):
+        report("打包程序", measure([args.exe], args.runs, args.timeout))
+    else:
+        print(f"未找到打包程序: {args.exe}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,7 +8,8 @@ def install_dependencies():
     dependencies = [
         "praw",
         "pandas",
-        "openpyxl"  # 用于Excel导出支持
+        "openpyxl",  # 用于Excel导出支持
+        "pyarrow"  # 用于Parquet导出
     ]
     
     print("正在安装依赖...")
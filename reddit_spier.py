@@ -1,8 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import threading
-import praw
-import pandas as pd
 import datetime
 import time
 import webbrowser  # 用于打开URL
@@ -10,6 +8,32 @@ import re  # 用于关键词匹配
 import json  # 用于保存和加载API配置
 import os  # 用于文件路径操作
 import sys  # 用于获取可执行文件路径
+import concurrent.futures  # 用于进程池计算
+import spier_deep  # 深度采集
+import spier_export  # 列式(Parquet)导出
+import spier_fetch  # 请求重试
+import spier_auth  # OAuth令牌缓存
+import spier_blobstore  # 帖子全文存储
+import spier_jobs  # 采集任务队列
+import spier_media  # 预览图缓存
+import spier_sentiment  # 情感和词典评分
+
+# praw、pandas、numpy、matplotlib 等较重的模块在首次使用时才导入，加快启动
+
+# 数据表格和CSV导出的列
+TABLE_COLUMNS = ("社区", "标题", "关键词", "作者", "点赞", "评论数", "发布时间", "帖子内容", "详情", "簇ID", "情感", "词典得分")
+
+def default_config_path():
+    """
+    API配置文件路径 - 使用可执行文件（或脚本）所在目录
+
+    @return {str}
+    """
+    # 如果是打包后的环境，使用当前工作目录
+    if getattr(sys, 'frozen', False):
+        return os.path.join(os.getcwd(), "reddit_config.json")
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "reddit_config.json")
+
 
 class RedditSpierApp:
     """
@@ -23,21 +47,13 @@ class RedditSpierApp:
         """
         self.root = root
         self.root.title("Reddit关键词采集工具|九先生779059811")
-        self.root.geometry("870x750")  # 增加窗口高度
+        self.root.geometry("870x780")  # 增加窗口高度
         
         # 配置文件路径 - 修改为使用可执行文件所在目录
-        try:
-            # 尝试获取PyInstaller打包后的路径
-            base_path = sys._MEIPASS
-        except Exception:
-            # 如果不是通过PyInstaller运行，使用脚本所在目录
-            base_path = os.path.dirname(os.path.abspath(__file__))
+        self.config_file = default_config_path()
         
-        self.config_file = os.path.join(base_path, "reddit_config.json")
-        
-        # 如果是打包后的环境，使用当前工作目录
-        if getattr(sys, 'frozen', False):
-            self.config_file = os.path.join(os.getcwd(), "reddit_config.json")
+        # OAuth令牌缓存文件，与配置文件放在同一目录
+        self.token_cache = spier_auth.TokenCache(os.path.join(os.path.dirname(self.config_file), "reddit_token.json"))
         
         # 创建菜单栏
         self.create_menu_bar()
@@ -66,10 +82,46 @@ class RedditSpierApp:
         
         # 初始化Reddit API客户端
         self.reddit = None
-        
-        # 采集线程
-        self.scraping_thread = None
-        self.stop_scraping = False
+        self.reddit_key = None  # 当前客户端对应的凭据哈希
+        self.connecting = False
+        self.token_refresh_job = None
+        
+        # 帖子全文写入磁盘上的追加文件，结果记录中只保存引用
+        self.body_store = spier_blobstore.BlobStore()
+        
+        # 采集任务队列，多个任务共享API请求预算并发执行
+        self.local_job_manager = spier_jobs.JobManager(
+            get_reddit=lambda: self.reddit,
+            clone_reddit=lambda reddit: spier_auth.clone_reddit(reddit, self.token_cache),
+            on_record=self._on_job_record,
+            on_log=self._on_job_log,
+            on_change=self._on_job_change,
+            body_store=self.body_store
+        )
+        # 配置了采集服务地址时改为服务的瘦客户端
+        self.job_manager = self.local_job_manager
+        self.job_window = None
+        
+        # 预览图缓存和后台加载器，首次使用时创建
+        self.media_cache_dir = os.path.join(os.path.dirname(self.config_file), "media_cache")
+        self.thumbnail_loader = None
+        self.prefetch_job = None
+        
+        # 自定义评分词典和评分结果缓存
+        self.lexicons = {}
+        self.score_cache_path = os.path.join(os.path.dirname(self.config_file), "score_cache.sqlite")
+        self.scoring_pool = None
+        
+        # 结构化采集结果，与表格行一一对应（行ID即列表下标），供导出使用
+        self.results = []
+        # 每次清空结果时递增，用于判断缓存的统计结果是否过期
+        self.results_epoch = 0
+        
+        # 分析窗口及缓存的聚合结果
+        self.analytics_window = None
+        self.analytics_cache = None  # ((结果版本, 记录数), 聚合结果)
+        self.analytics_pending = None
+        self.analytics_pool = None
         
         # 加载保存的API配置
         self.load_api_config()
@@ -107,6 +159,20 @@ class RedditSpierApp:
         
         # 保存配置按钮
         ttk.Button(auth_grid, text="保存配置", command=self.save_api_config).grid(row=2, column=3, padx=5, pady=5)
+        
+        # 采集服务地址（可选） - 填写后采集任务提交到共享的采集服务执行
+        ttk.Label(auth_grid, text="采集服务:").grid(row=1, column=2, sticky="w", padx=5, pady=5)
+        self.service_url_var = tk.StringVar()
+        ttk.Entry(auth_grid, textvariable=self.service_url_var, width=24).grid(row=1, column=3, padx=5, pady=5)
+        
+        # 采集服务的共享令牌（服务启动时指定或输出到日志）
+        ttk.Label(auth_grid, text="服务令牌:").grid(row=3, column=2, sticky="w", padx=5, pady=5)
+        self.service_token_var = tk.StringVar()
+        ttk.Entry(auth_grid, textvariable=self.service_token_var, width=24, show="*").grid(row=3, column=3, padx=5, pady=5)
+        
+        # 连接状态指示
+        self.connection_status_label = ttk.Label(auth_grid, text="● 未连接", foreground="gray")
+        self.connection_status_label.grid(row=0, column=2, columnspan=2, sticky="w", padx=5, pady=5)
 
     def create_subreddit_search_frame(self, parent):
         """
@@ -207,7 +273,7 @@ class RedditSpierApp:
         # 数量
         ttk.Label(params_frame, text="数量:").pack(side="left", padx=10, pady=5)
         self.post_limit_var = tk.StringVar(value="10")
-        limit_combo = ttk.Combobox(params_frame, textvariable=self.post_limit_var, values=["10", "50", "100", "200"], width=5)
+        limit_combo = ttk.Combobox(params_frame, textvariable=self.post_limit_var, values=["10", "50", "100", "200", "1000", "5000", "20000"], width=6)
         limit_combo.pack(side="left", padx=5, pady=5)
         
         # 排序方式
@@ -215,6 +281,29 @@ class RedditSpierApp:
         self.sort_var = tk.StringVar(value="热门")
         sort_combo = ttk.Combobox(params_frame, textvariable=self.sort_var, values=["热门", "最新", "相关"], width=10)
         sort_combo.pack(side="left", padx=5, pady=5)
+        
+        # 任务参数放在第二行
+        job_frame = ttk.Frame(parent)
+        job_frame.pack(fill="x", padx=5, pady=2)
+        
+        # 优先级 - 高优先级任务在共享的请求预算中优先
+        ttk.Label(job_frame, text="优先级:").pack(side="left", padx=5, pady=2)
+        self.priority_var = tk.StringVar(value="普通")
+        ttk.Combobox(job_frame, textvariable=self.priority_var, values=["高", "普通", "低"], width=5, state="readonly").pack(side="left", padx=5, pady=2)
+        
+        # 定期重复
+        ttk.Label(job_frame, text="重复:").pack(side="left", padx=10, pady=2)
+        self.repeat_var = tk.StringVar(value="不重复")
+        ttk.Combobox(job_frame, textvariable=self.repeat_var, values=["不重复", "每15分钟", "每30分钟", "每60分钟"], width=10, state="readonly").pack(side="left", padx=5, pady=2)
+        
+        # 重试预算 - 每次运行中临时错误（限流、服务器错误、超时）最多重试的总次数
+        ttk.Label(job_frame, text="重试预算:").pack(side="left", padx=10, pady=2)
+        self.retry_budget_var = tk.StringVar(value=str(spier_fetch.DEFAULT_RETRY_BUDGET))
+        ttk.Combobox(job_frame, textvariable=self.retry_budget_var, values=["0", "10", "20", "50", "100"], width=5).pack(side="left", padx=5, pady=2)
+        
+        # 深度采集 - 拆分成多个排序和时间范围的子查询，突破单个查询约1000条的上限
+        self.deep_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(job_frame, text="深度采集", variable=self.deep_var).pack(side="left", padx=10, pady=2)
 
     def create_data_table_frame(self, parent):
         """
@@ -227,7 +316,7 @@ class RedditSpierApp:
         table_frame.pack(fill="both", expand=True, padx=5, pady=2)  # 减小pady值
         
         # 创建Treeview表格
-        columns = ("社区", "标题", "关键词", "作者", "点赞", "评论数", "发布时间", "帖子内容", "详情")
+        columns = TABLE_COLUMNS
         self.data_table = ttk.Treeview(table_frame, columns=columns, show="headings", height=5)
         
         # 设置列标题
@@ -242,6 +331,29 @@ class RedditSpierApp:
             else:
                 self.data_table.column(col, width=70)
         
+        # 右侧详情面板: 预览图和帖子全文
+        detail_frame = ttk.Frame(table_frame, width=220)
+        detail_frame.pack(side="right", fill="y", padx=(5, 0))
+        detail_frame.pack_propagate(False)
+        detail_notebook = ttk.Notebook(detail_frame)
+        detail_notebook.pack(fill="both", expand=True)
+        
+        preview_frame = ttk.Frame(detail_notebook)
+        detail_notebook.add(preview_frame, text="预览图")
+        self.preview_label = ttk.Label(preview_frame, text="选择帖子查看预览图", anchor="center", justify="center", wraplength=200)
+        self.preview_label.pack(fill="both", expand=True)
+        self.preview_image = None  # 保持PhotoImage引用，避免被回收
+        self.preview_url = ""
+        self.preview_path = None  # 当前显示的缩略图文件
+        
+        body_frame = ttk.Frame(detail_notebook)
+        detail_notebook.add(body_frame, text="全文")
+        body_scrollbar = ttk.Scrollbar(body_frame, orient="vertical")
+        body_scrollbar.pack(side="right", fill="y")
+        self.body_text = tk.Text(body_frame, wrap="word", width=1, height=1, yscrollcommand=body_scrollbar.set, state="disabled")
+        self.body_text.pack(side="left", fill="both", expand=True)
+        body_scrollbar.config(command=self.body_text.yview)
+        
         # 添加滚动条
         y_scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.data_table.yview)
         y_scrollbar.pack(side="right", fill="y")
@@ -249,9 +361,17 @@ class RedditSpierApp:
         x_scrollbar = ttk.Scrollbar(table_frame, orient="horizontal", command=self.data_table.xview)
         x_scrollbar.pack(side="bottom", fill="x")
         
-        self.data_table.configure(yscrollcommand=y_scrollbar.set, xscrollcommand=x_scrollbar.set)
+        # 滚动时同时预取可见行附近的预览图
+        def on_table_scroll(first, last):
+            y_scrollbar.set(first, last)
+            self._schedule_prefetch()
+        
+        self.data_table.configure(yscrollcommand=on_table_scroll, xscrollcommand=x_scrollbar.set)
         self.data_table.pack(fill="both", expand=True)
         
+        # 选中行时显示预览图
+        self.data_table.bind("<<TreeviewSelect>>", self.show_preview)
+        
         # 绑定右键菜单
         self.data_table.bind("<Button-3>", self.show_context_menu)
         
@@ -273,7 +393,9 @@ class RedditSpierApp:
         # 使用水平布局，更加紧凑
         ttk.Button(button_frame, text="开始采集", command=self.start_scraping).pack(side="left", padx=10, pady=2)
         ttk.Button(button_frame, text="停止采集", command=self.stop_scraping_process).pack(side="left", padx=10, pady=2)
+        ttk.Button(button_frame, text="任务列表", command=self.show_job_list).pack(side="left", padx=10, pady=2)
         ttk.Button(button_frame, text="导出CSV", command=self.export_csv).pack(side="left", padx=10, pady=2)
+        ttk.Button(button_frame, text="导出Parquet", command=self.export_parquet).pack(side="left", padx=10, pady=2)
         ttk.Button(button_frame, text="清空数据", command=self.clear_data).pack(side="left", padx=10, pady=2)
 
     def create_log_frame(self, parent):
@@ -306,56 +428,171 @@ class RedditSpierApp:
         self.log_text.insert(tk.END, log_entry)
         self.log_text.see(tk.END)  # 自动滚动到最新日志
 
-    def connect_reddit(self):
+    def connect_reddit(self, silent=False):
         """
-        连接Reddit API
+        连接Reddit API - 在后台线程中完成，不阻塞界面
+        
+        @param {bool} silent - 是否静默连接（启动时自动连接，不弹出提示框）
         """
         client_id = self.client_id_var.get().strip()
         client_secret = self.client_secret_var.get().strip()
         user_agent = self.user_agent_var.get().strip()
         
         if not client_id or not client_secret or not user_agent:
-            messagebox.showerror("错误", "请填写所有API配置信息")
+            if not silent:
+                messagebox.showerror("错误", "请填写所有API配置信息")
             return
         
+        if self.connecting:
+            self.log_message("正在连接Reddit API，请稍候")
+            return
+        
+        # 凭据未变且令牌仍有效时直接复用现有客户端，不再重复认证和测试
+        key = spier_auth.credentials_key(client_id, client_secret, user_agent)
+        if self.reddit is not None and self.reddit_key == key and self.token_cache.load(key):
+            self.log_message("已连接到Reddit API（复用现有会话）")
+            if not silent:
+                messagebox.showinfo("成功", "已连接到Reddit API")
+            return
+        
+        self.connecting = True
+        self._set_connection_status("连接中...", "orange")
+        threading.Thread(
+            target=self._connect_reddit_thread,
+            args=(client_id, client_secret, user_agent, silent),
+            daemon=True
+        ).start()
+
+    def _connect_reddit_thread(self, client_id, client_secret, user_agent, silent):
+        """
+        Reddit API连接线程
+        
+        @param {str} client_id - Client ID
+        @param {str} client_secret - Client Secret
+        @param {str} user_agent - User Agent
+        @param {bool} silent - 是否静默连接
+        """
         try:
-            # 修改初始化方式，明确指定所有必要参数
-            self.reddit = praw.Reddit(
-                client_id=client_id,
-                client_secret=client_secret,
-                user_agent=user_agent,
-                check_for_updates=False,  # 禁用更新检查
-                comment_kind="t1",        # 明确指定类型
-                message_kind="t4",
-                redditor_kind="t2",
-                submission_kind="t3",
-                subreddit_kind="t5",
-                trophy_kind="t6",
-                oauth_url="https://oauth.reddit.com",
-                reddit_url="https://www.reddit.com",
-                short_url="https://redd.it",
-                ratelimit_seconds=5,      # 设置速率限制
-                timeout=16                # 设置超时
-            )
-            
-            # 测试连接 - 尝试获取热门帖子而不是用户信息
-            try:
-                # 使用更可靠的测试方法
-                subreddit = self.reddit.subreddit("announcements")
-                for _ in subreddit.hot(limit=1):
-                    break
-                
-                self.log_message("已成功连接到Reddit API")
-                messagebox.showinfo("成功", "已成功连接到Reddit API")
-                
-                # 连接成功后自动保存配置
-                self.save_api_config()
-            except Exception as e:
-                self.log_message(f"API连接测试失败: {str(e)}")
-                messagebox.showerror("错误", f"API连接测试失败: {str(e)}")
+            reddit = spier_auth.create_reddit(client_id, client_secret, user_agent)
+        except Exception as e:
+            self.root.after(0, lambda err=e: self._on_connect_failed(f"连接Reddit API时出错: {str(err)}", silent))
+            return
+        
+        # 优先复用缓存的令牌；没有可用令牌时请求新令牌，同时验证凭据
+        key = spier_auth.credentials_key(client_id, client_secret, user_agent)
+        try:
+            token = self.token_cache.load(key)
+            if token and spier_auth.apply_token(reddit, token):
+                message = "已成功连接到Reddit API（使用缓存的令牌）"
+            else:
+                token = spier_auth.fetch_token(reddit)
+                message = "已成功连接到Reddit API"
+        except Exception as e:
+            self.root.after(0, lambda err=e: self._on_connect_failed(f"API连接测试失败: {str(err)}", silent))
+            return
+        
+        try:
+            self.token_cache.save(key, token)
+        except OSError as e:
+            self.root.after(0, lambda err=e: self.log_message(f"保存API令牌时出错: {str(err)}"))
+        
+        # 后台预热HTTP连接，首次采集时不必再建立TLS连接
+        threading.Thread(target=self._prewarm_thread, args=(reddit,), daemon=True).start()
+        
+        self.root.after(0, lambda: self._on_connected(reddit, key, token, message, silent))
+
+    def _prewarm_thread(self, reddit):
+        """
+        HTTP连接预热线程
+        
+        @param {praw.Reddit} reddit - Reddit API客户端
+        """
+        try:
+            spier_auth.prewarm(reddit)
+        except Exception as e:
+            self.root.after(0, lambda err=e: self.log_message(f"预热API连接失败: {str(err)}"))
+
+    def _on_connected(self, reddit, key, token, message, silent):
+        """
+        连接成功（在主线程中调用）
+        
+        @param {praw.Reddit} reddit - Reddit API客户端
+        @param {str} key - 凭据哈希
+        @param {dict} token - 当前使用的令牌信息
+        @param {str} message - 成功提示
+        @param {bool} silent - 是否静默连接
+        """
+        self.connecting = False
+        self.reddit = reddit
+        self.reddit_key = key
+        self._set_connection_status("已连接", "green")
+        self.log_message(message)
+        if not silent:
+            messagebox.showinfo("成功", message)
+        
+        # 在令牌过期前刷新
+        self._schedule_token_refresh(token)
+        
+        # 连接成功后自动保存配置
+        self.save_api_config()
+
+    def _schedule_token_refresh(self, token):
+        """
+        安排在令牌过期前刷新令牌
+        
+        @param {dict} token - 当前使用的令牌信息
+        """
+        if self.token_refresh_job is not None:
+            self.root.after_cancel(self.token_refresh_job)
+        delay = max(token["expires_at"] - time.time() - spier_auth.TOKEN_REFRESH_MARGIN, 0)
+        self.token_refresh_job = self.root.after(int(delay * 1000), self._refresh_token)
+
+    def _refresh_token(self):
+        """
+        在后台刷新令牌并保存到缓存
+        """
+        self.token_refresh_job = None
+        reddit, key = self.reddit, self.reddit_key
+        if reddit is None:
+            return
+        threading.Thread(target=self._refresh_token_thread, args=(reddit, key), daemon=True).start()
+
+    def _refresh_token_thread(self, reddit, key):
+        """
+        令牌刷新线程
+        
+        @param {praw.Reddit} reddit - Reddit API客户端
+        @param {str} key - 凭据哈希
+        """
+        try:
+            token = spier_auth.fetch_token(reddit)
+            self.token_cache.save(key, token)
+            self.root.after(0, lambda: self._schedule_token_refresh(token))
         except Exception as e:
-            self.log_message(f"连接Reddit API时出错: {str(e)}")
-            messagebox.showerror("错误", f"连接Reddit API时出错: {str(e)}")
+            # 刷新失败时由praw在下次请求时自行重新认证
+            self.root.after(0, lambda err=e: self.log_message(f"刷新API令牌失败: {str(err)}"))
+
+    def _on_connect_failed(self, message, silent):
+        """
+        连接失败（在主线程中调用）
+        
+        @param {str} message - 错误信息
+        @param {bool} silent - 是否静默连接
+        """
+        self.connecting = False
+        self._set_connection_status("连接失败", "red")
+        self.log_message(message)
+        if not silent:
+            messagebox.showerror("错误", message)
+
+    def _set_connection_status(self, text, color):
+        """
+        更新连接状态指示
+        
+        @param {str} text - 状态文本
+        @param {str} color - 指示颜色
+        """
+        self.connection_status_label.config(text=f"● {text}", foreground=color)
 
     def save_api_config(self):
         """
@@ -364,7 +601,9 @@ class RedditSpierApp:
         config = {
             "client_id": self.client_id_var.get().strip(),
             "client_secret": self.client_secret_var.get().strip(),
-            "user_agent": self.user_agent_var.get().strip()
+            "user_agent": self.user_agent_var.get().strip(),
+            "service_url": self.service_url_var.get().strip(),
+            "service_token": self.service_token_var.get().strip()
         }
         
         try:
@@ -404,12 +643,14 @@ class RedditSpierApp:
             self.client_id_var.set(config.get("client_id", ""))
             self.client_secret_var.set(config.get("client_secret", ""))
             self.user_agent_var.set(config.get("user_agent", "RedditSpier v1.0"))
+            self.service_url_var.set(config.get("service_url", ""))
+            self.service_token_var.set(config.get("service_token", ""))
             
             self.log_message(f"已加载保存的API配置: {config_path}")
             
-            # 如果有完整的配置信息，自动尝试连接
+            # 如果有完整的配置信息，窗口显示后在后台自动尝试连接
             if config.get("client_id") and config.get("client_secret") and config.get("user_agent"):
-                self.connect_reddit()
+                self.root.after_idle(lambda: self.connect_reddit(silent=True))
         except Exception as e:
             self.log_message(f"加载API配置时出错: {str(e)}")
 
@@ -504,9 +745,11 @@ class RedditSpierApp:
 
     def start_scraping(self):
         """
-        开始采集数据
+        开始采集数据 - 按当前参数创建采集任务并加入队列
         """
-        if not self.reddit:
+        if not self._select_job_manager():
+            return
+        if self.job_manager is self.local_job_manager and not self.reddit:
             messagebox.showerror("错误", "请先连接Reddit API")
             return
         
@@ -523,146 +766,326 @@ class RedditSpierApp:
         keywords = [k for k in keywords if k]
         
         # 获取其他参数
-        limit = int(self.post_limit_var.get())
+        try:
+            limit = int(self.post_limit_var.get())
+        except ValueError:
+            messagebox.showerror("错误", "数量必须是整数")
+            return
         sort_type = self.sort_var.get()
+        deep = self.deep_var.get()
+        if limit > spier_deep.LISTING_CAP and not deep:
+            self.log_message(f"提示: 单个查询最多返回约 {spier_deep.LISTING_CAP} 个帖子，需要更多时请勾选\"深度采集\"")
         
         # 转换排序方式
         sort_map = {"热门": "hot", "最新": "new", "相关": "relevance"}
         sort_by = sort_map.get(sort_type, "hot")
         
-        keywords_str = ", ".join(keywords) if keywords else "无"
-        self.log_message(f"开始采集数据: Subreddits={', '.join(self.selected_subreddits)}, 关键词={keywords_str}, 数量={limit}, 排序={sort_type}")
+        # 优先级和重复间隔
+        priority_map = {"高": spier_jobs.PRIORITY_HIGH, "普通": spier_jobs.PRIORITY_NORMAL, "低": spier_jobs.PRIORITY_LOW}
+        priority = priority_map.get(self.priority_var.get(), spier_jobs.PRIORITY_NORMAL)
+        interval_map = {"不重复": None, "每15分钟": 15 * 60, "每30分钟": 30 * 60, "每60分钟": 60 * 60}
+        interval = interval_map.get(self.repeat_var.get())
+        try:
+            retry_budget = max(0, int(self.retry_budget_var.get()))
+        except ValueError:
+            messagebox.showerror("错误", "重试预算必须是整数")
+            return
         
-        # 重置停止标志
-        self.stop_scraping = False
+        # 没有其他任务时，与以前一样先清空表格
+        if not self.job_manager.has_active_jobs():
+            self._reset_results()
         
-        # 启动采集线程
-        self.scraping_thread = threading.Thread(
-            target=self._scrape_data_thread,
-            args=(self.selected_subreddits, keywords, limit, sort_by),
-            daemon=True
+        job = spier_jobs.ScrapeJob(self.selected_subreddits, keywords, limit, sort_by, priority=priority, interval=interval,
+                                   retry_budget=retry_budget, deep=deep)
+        keywords_str = ", ".join(keywords) if keywords else "无"
+        repeat_str = f", 重复={self.repeat_var.get()}" if interval else ""
+        sort_str = "深度采集" if deep else sort_type
+        description = (
+            f"Subreddits={', '.join(self.selected_subreddits)}, 关键词={keywords_str}, "
+            f"数量={limit}, 排序={sort_str}, 优先级={self.priority_var.get()}{repeat_str}"
         )
-        self.scraping_thread.start()
+        # 提交到采集服务需要发送请求，在后台线程中进行，不阻塞界面
+        threading.Thread(target=self._submit_job_thread, args=(self.job_manager, job, description), daemon=True).start()
 
-    def _scrape_data_thread(self, subreddits, keywords, limit, sort_by):
+    def _submit_job_thread(self, job_manager, job, description):
         """
-        数据采集线程
+        提交采集任务线程
         
-        @param {list} subreddits - Subreddit名称列表
-        @param {list} keywords - 关键词列表
-        @param {int} limit - 采集数量限制
-        @param {str} sort_by - 排序方式
+        @param {spier_jobs.JobManager} job_manager - 本地任务队列或服务的瘦客户端
+        @param {spier_jobs.ScrapeJob} job - 采集任务
+        @param {str} description - 任务参数描述
         """
         try:
-            # 清空表格
-            self.root.after(0, lambda: self.data_table.delete(*self.data_table.get_children()))
-            
-            total_posts = 0  # 初始化总帖子数
-            
-            for subreddit_name in subreddits:
-                if self.stop_scraping:
-                    self.root.after(0, lambda: self.log_message("采集已停止"))
-                    break
-                
-                self.root.after(0, lambda: self.log_message(f"正在采集 r/{subreddit_name}..."))
-                
-                subreddit = self.reddit.subreddit(subreddit_name)
-                
-                # 如果有关键词，则对每个关键词进行搜索
-                if keywords:
-                    for keyword in keywords:
-                        if self.stop_scraping:
-                            break
-                        
-                        self.root.after(0, lambda k=keyword: self.log_message(f"搜索关键词: {k}"))
-                        
-                        try:
-                            posts = subreddit.search(keyword, sort=sort_by, limit=limit)
-                            # 传递当前总数，并获取处理后的新总数
-                            total_posts = self._process_posts(posts, subreddit_name, keyword, total_posts)
-                        except Exception as e:
-                            self.root.after(0, lambda err=e: self.log_message(f"搜索关键词 '{keyword}' 时出错: {str(err)}"))
-                else:
-                    # 没有关键词，直接获取帖子
-                    if sort_by == "hot":
-                        posts = subreddit.hot(limit=limit)
-                    elif sort_by == "new":
-                        posts = subreddit.new(limit=limit)
-                    else:
-                        posts = subreddit.hot(limit=limit)  # 默认为热门
-                
-                # 传递当前总数，并获取处理后的新总数
-                total_posts = self._process_posts(posts, subreddit_name, "", total_posts)
-            
-            self.root.after(0, lambda: self.log_message(f"采集完成，共获取 {total_posts} 个帖子"))
-            
+            job_manager.submit(job)
         except Exception as e:
-            self.root.after(0, lambda: self.log_message(f"采集数据时出错: {str(e)}"))
-            self.root.after(0, lambda: messagebox.showerror("错误", f"采集数据时出错: {str(e)}"))
+            self.root.after(0, lambda err=e: self.log_message(f"提交采集任务时出错: {str(err)}"))
+            self.root.after(0, lambda err=e: messagebox.showerror("错误", f"提交采集任务时出错: {str(err)}"))
+            return
+        # 提交到服务后任务ID改为服务分配的ID
+        self.root.after(0, lambda: self.log_message(f"已添加采集任务#{job.id}: {description}"))
 
-    def _process_posts(self, posts, subreddit_name, keyword, total_posts):
+    def _select_job_manager(self):
+        """
+        根据采集服务地址选择本地任务队列或服务的瘦客户端
+        
+        @return {bool} - 是否可以提交任务
+        """
+        url = self.service_url_var.get().strip()
+        token = self.service_token_var.get().strip()
+        current = (getattr(self.job_manager, "base_url", ""), getattr(self.job_manager, "token", ""))
+        if (url.rstrip("/"), token if url else "") == current:
+            return True
+        if url and not token:
+            messagebox.showerror("错误", "请填写采集服务的服务令牌")
+            return False
+        if self.job_manager.has_active_jobs():
+            messagebox.showerror("错误", "请先停止当前的采集任务，再切换采集服务")
+            return False
+        
+        if self.job_manager is not self.local_job_manager:
+            self.job_manager.shutdown()
+        if url:
+            import spier_service
+            self.job_manager = spier_service.RemoteJobManager(
+                url,
+                token,
+                on_record=self._on_job_record,
+                on_log=self._on_job_log,
+                on_change=self._on_job_change,
+                body_store=self.body_store
+            )
+            self.log_message(f"采集任务将提交到采集服务: {url}")
+        else:
+            self.job_manager = self.local_job_manager
+            self.log_message("采集任务将在本地执行")
+        return True
+
+    def _on_job_record(self, job, record):
         """
-        处理帖子数据
+        采集任务产生一条记录（在工作线程中调用）
         
-        @param {praw.models.listing.generator.ListingGenerator} posts - 帖子生成器
-        @param {str} subreddit_name - Subreddit名称
-        @param {str} keyword - 搜索关键词
-        @param {int} total_posts - 当前已处理的帖子总数
-        @return {int} - 更新后的帖子总数
+        @param {spier_jobs.ScrapeJob} job - 采集任务
+        @param {dict} record - 帖子记录
         """
-        post_count = 0  # 当前批次处理的帖子数
+        self.root.after(0, lambda: self._append_result(record))
+
+    def _on_job_log(self, message):
+        """
+        采集任务日志（在工作线程中调用）
         
-        for post in posts:
-            if self.stop_scraping:
-                break
-            
-            # 转换时间戳为可读时间
-            created_time = datetime.datetime.fromtimestamp(post.created_utc).strftime("%Y-%m-%d %H:%M")
-            
-            # 获取帖子内容
-            post_content = post.selftext
-            # 截断过长的内容
-            if len(post_content) > 200:
-                post_content = post_content[:197] + "..."
-            
-            # 添加到表格
-            values = (
-                subreddit_name,
-                post.title,
-                keyword if keyword else "无",
-                post.author.name if post.author else "[已删除]",
-                post.score,
-                post.num_comments,
-                created_time,
-                post_content,
-                f"https://www.reddit.com{post.permalink}"
-            )
-            
-            self.root.after(0, lambda v=values: self.data_table.insert("", "end", values=v))
-            post_count += 1  # 增加当前批次的帖子计数
-            
-            # 防止API速率限制
-            time.sleep(0.5)
+        @param {str} message - 日志消息
+        """
+        self.root.after(0, lambda: self.log_message(message))
+
+    def _on_job_change(self, job):
+        """
+        采集任务状态变化（在工作线程中调用）
+        
+        @param {spier_jobs.ScrapeJob} job - 采集任务
+        """
+        self.root.after(0, self._refresh_job_list)
+
+    def _record_values(self, record):
+        """
+        帖子记录在表格中的显示值
+        
+        @param {dict} record - 帖子记录
+        @return {tuple} - 表格行显示值
+        """
+        # 转换时间戳为可读时间
+        created_time = datetime.datetime.fromtimestamp(record["created_utc"]).strftime("%Y-%m-%d %H:%M")
+        return (
+            record["subreddit"],
+            record["title"],
+            record["keyword"] if record["keyword"] else "无",
+            record["author"],
+            record["score"],
+            record["num_comments"],
+            created_time,
+            record["selftext"],
+            record["url"],
+            record.get("cluster_id") or "",
+            f"{record['sentiment']:.3f}" if record.get("sentiment") is not None else "",
+            self._lexicon_scores_text(record.get("lexicon_scores"))
+        )
+
+    def _lexicon_scores_text(self, lexicon_scores):
+        """
+        词典得分的显示文本
+        
+        @param {dict} lexicon_scores - 词典名 -> 得分
+        @return {str}
+        """
+        if not lexicon_scores:
+            return ""
+        return ", ".join(f"{name}:{score:g}" for name, score in lexicon_scores.items() if score)
+
+    def _append_result(self, record):
+        """
+        添加一条采集结果到表格和结构化结果列表（在主线程中调用）
+        
+        @param {dict} record - 带原始类型的帖子记录
+        """
+        self.data_table.insert("", "end", iid=str(len(self.results)), values=self._record_values(record))
+        self.results.append(record)
+
+    def _reset_results(self):
+        """
+        清空表格和结构化结果列表（在主线程中调用）
+        """
+        self.data_table.delete(*self.data_table.get_children())
+        self.results = []
+        self.results_epoch += 1
+        
+        # 运行中的任务产生的记录仍引用当前的正文存储，只在没有任务时换成新的存储
+        if not self.job_manager.has_active_jobs():
+            self._replace_body_store()
+
+    def _replace_body_store(self):
+        """
+        关闭并删除旧的正文存储文件，之后的记录写入新的存储（在主线程中调用）
         
-        # 更新并返回总帖子数
-        return total_posts + post_count
+        已在后台线程中使用旧存储的操作属于已清空的数据，读取失败时只记录日志。
+        """
+        old_store = self.body_store
+        self.body_store = spier_blobstore.BlobStore()
+        self.local_job_manager.body_store = self.body_store
+        if self.job_manager is not self.local_job_manager:
+            self.job_manager.body_store = self.body_store
+        old_store.close()
 
     def stop_scraping_process(self):
         """
-        停止采集过程
+        停止采集过程 - 取消所有排队、运行中和定期重复的任务
         """
-        if self.scraping_thread and self.scraping_thread.is_alive():
-            self.stop_scraping = True
-            self.log_message("正在停止采集...")
-        else:
-            self.log_message("没有正在进行的采集任务")
+        threading.Thread(target=self._cancel_jobs_thread, args=(self.job_manager, None), daemon=True).start()
+
+    def _cancel_jobs_thread(self, job_manager, job_ids):
+        """
+        取消采集任务线程 - 取消采集服务中的任务需要发送请求，不在主线程中进行
+        
+        @param {spier_jobs.JobManager} job_manager - 本地任务队列或服务的瘦客户端
+        @param {list} job_ids - 要取消的任务ID，None表示取消所有任务
+        """
+        if job_ids is None:
+            count = job_manager.cancel_all()
+            if count:
+                self.root.after(0, lambda: self.log_message(f"正在停止 {count} 个采集任务..."))
+            else:
+                self.root.after(0, lambda: self.log_message("没有正在进行的采集任务"))
+            return
+        for job_id in job_ids:
+            if job_manager.cancel(job_id):
+                self.root.after(0, lambda i=job_id: self.log_message(f"已取消采集任务#{i}"))
+
+    def show_job_list(self):
+        """
+        显示采集任务列表窗口
+        """
+        if self.job_window is not None and self.job_window.winfo_exists():
+            self.job_window.lift()
+            self._refresh_job_list()
+            return
+        
+        self.job_window = tk.Toplevel(self.root)
+        self.job_window.title("任务列表")
+        self.job_window.geometry("870x300")
+        
+        columns = ("ID", "社区", "关键词", "数量", "排序", "优先级", "状态", "已采集", "失败", "下次运行")
+        self.job_table = ttk.Treeview(self.job_window, columns=columns, show="headings", height=8)
+        for col in columns:
+            self.job_table.heading(col, text=col)
+            if col in ["社区", "关键词"]:
+                self.job_table.column(col, width=150)
+            elif col in ["状态", "下次运行"]:
+                self.job_table.column(col, width=100)
+            else:
+                self.job_table.column(col, width=50)
+        self.job_table.pack(fill="both", expand=True, padx=5, pady=5)
+        
+        button_frame = ttk.Frame(self.job_window)
+        button_frame.pack(fill="x", padx=5, pady=5)
+        ttk.Button(button_frame, text="取消任务", command=self.cancel_selected_job).pack(side="left", padx=10)
+        ttk.Button(button_frame, text="全部取消", command=self.stop_scraping_process).pack(side="left", padx=10)
+        ttk.Button(button_frame, text="失败报告", command=self.show_failure_report).pack(side="left", padx=10)
+        ttk.Button(button_frame, text="覆盖报告", command=self.show_coverage_report).pack(side="left", padx=10)
+        
+        self._refresh_job_list()
+
+    def _refresh_job_list(self):
+        """
+        刷新任务列表显示
+        """
+        if self.job_window is None or not self.job_window.winfo_exists():
+            return
+        
+        selected = self.job_table.selection()
+        self.job_table.delete(*self.job_table.get_children())
+        for job in self.job_manager.jobs():
+            next_run = datetime.datetime.fromtimestamp(job.next_run).strftime("%H:%M:%S") if job.next_run else ""
+            self.job_table.insert("", "end", iid=str(job.id), values=(
+                job.id,
+                ", ".join(job.subreddits),
+                ", ".join(job.keywords) if job.keywords else "无",
+                job.limit,
+                job.sort_by,
+                spier_jobs.PRIORITY_NAMES[job.priority],
+                job.status,
+                job.collected,
+                len(job.failures),
+                next_run
+            ))
+        self.job_table.selection_set([iid for iid in selected if self.job_table.exists(iid)])
+
+    def cancel_selected_job(self):
+        """
+        取消任务列表中选中的任务
+        """
+        job_ids = [int(iid) for iid in self.job_table.selection()]
+        if job_ids:
+            threading.Thread(target=self._cancel_jobs_thread, args=(self.job_manager, job_ids), daemon=True).start()
+
+    def show_failure_report(self):
+        """
+        显示选中任务（未选中时为所有任务）最近一次运行中失败的抓取单元
+        """
+        selected = {int(iid) for iid in self.job_table.selection()}
+        jobs = [job for job in self.job_manager.jobs() if not selected or job.id in selected]
+        sections = [
+            f"任务#{job.id} ({job.status}, 已重试 {job.retries.used}/{job.retries.total} 次)\n"
+            f"{spier_fetch.format_failure_report(job.failures)}"
+            for job in jobs
+        ]
+        messagebox.showinfo("失败报告", "\n\n".join(sections) if sections else "没有采集任务", parent=self.job_window)
+
+    def show_coverage_report(self):
+        """
+        显示选中任务（未选中时为所有任务）最近一次深度采集中每个分区的覆盖情况
+        """
+        selected = {int(iid) for iid in self.job_table.selection()}
+        sections = []
+        for job in self.job_manager.jobs():
+            if job.deep and (not selected or job.id in selected):
+                reports = [spier_deep.format_coverage_report(partitions) for partitions in job.coverage]
+                sections.append(f"任务#{job.id} ({job.status})\n" + ("\n".join(reports) if reports else "尚未完成任何社区/关键词"))
+        
+        # 分区较多，用可滚动的文本窗口显示
+        window = tk.Toplevel(self.job_window)
+        window.title("覆盖报告")
+        window.geometry("600x400")
+        scrollbar = ttk.Scrollbar(window, orient="vertical")
+        scrollbar.pack(side="right", fill="y")
+        text = tk.Text(window, wrap="none", yscrollcommand=scrollbar.set)
+        text.pack(fill="both", expand=True)
+        scrollbar.config(command=text.yview)
+        text.insert("1.0", "\n\n".join(sections) if sections else "没有深度采集任务")
+        text.config(state="disabled")
 
     def export_csv(self):
         """
         导出数据为CSV文件
         """
-        items = self.data_table.get_children()
-        if not items:
+        if not self.results:
             messagebox.showerror("错误", "没有数据可导出")
             return
         
@@ -677,15 +1100,15 @@ class RedditSpierApp:
             return  # 用户取消了保存
         
         try:
-            # 获取所有数据
+            # 获取所有数据（包括折叠后不显示的行），帖子内容导出全文
             data = []
-            columns = ["社区", "标题", "关键词", "作者", "点赞", "评论数", "发布时间", "帖子内容", "详情"]
-            
-            for item in items:
-                values = self.data_table.item(item, "values")
-                data.append(dict(zip(columns, values)))
+            for record in self.results:
+                row = dict(zip(TABLE_COLUMNS, self._record_values(record)))
+                row["帖子内容"] = spier_blobstore.record_body(record, self.body_store)
+                data.append(row)
             
             # 创建DataFrame并保存
+            import pandas as pd
             df = pd.DataFrame(data)
             df.to_csv(file_path, index=False, encoding="utf-8-sig")  # 使用带BOM的UTF-8编码，解决中文乱码
             
@@ -695,13 +1118,546 @@ class RedditSpierApp:
             self.log_message(f"导出数据时出错: {str(e)}")
             messagebox.showerror("错误", f"导出数据时出错: {str(e)}")
 
+    def export_parquet(self):
+        """
+        导出数据为按社区和采集日期分区的Parquet数据集
+        """
+        if not self.results:
+            messagebox.showerror("错误", "没有数据可导出")
+            return
+        
+        # 选择数据集目录
+        out_dir = filedialog.askdirectory(title="选择Parquet数据集目录")
+        if not out_dir:
+            return  # 用户取消了保存
+        
+        # 拷贝一份记录列表，后台线程写入时不受新采集数据影响
+        records = list(self.results)
+        lexicon_names = sorted(self.lexicons)
+        threading.Thread(target=self._check_parquet_dir_thread, args=(records, out_dir, lexicon_names, self.body_store),
+                         daemon=True).start()
+
+    def _check_parquet_dir_thread(self, records, out_dir, lexicon_names, body_store):
+        """
+        在后台扫描目录中是否已有数据集文件，扫描完成后回到主线程询问写入模式
+        
+        @param {list} records - 帖子记录列表
+        @param {str} out_dir - 数据集目录
+        @param {list} lexicon_names - 自定义词典名称
+        @param {spier_blobstore.BlobStore} body_store - 记录所引用的正文存储
+        """
+        try:
+            exists = spier_export.has_parquet_files(out_dir)
+        except Exception as e:
+            self.root.after(0, lambda err=e: self.log_message(f"检查导出目录时出错: {str(err)}"))
+            self.root.after(0, lambda err=e: messagebox.showerror("错误", f"检查导出目录时出错: {str(err)}"))
+            return
+        self.root.after(0, lambda: self._start_parquet_export(records, out_dir, lexicon_names, exists, body_store))
+
+    def _start_parquet_export(self, records, out_dir, lexicon_names, exists, body_store):
+        """
+        目录中已有数据时询问写入模式，然后开始导出（在主线程中调用）
+        
+        @param {list} records - 帖子记录列表
+        @param {str} out_dir - 数据集目录
+        @param {list} lexicon_names - 自定义词典名称
+        @param {bool} exists - 目录中是否已有本数据集的文件
+        @param {spier_blobstore.BlobStore} body_store - 记录所引用的正文存储
+        """
+        append = True
+        if exists:
+            answer = messagebox.askyesnocancel(
+                "写入模式",
+                "目录中已有导出的Parquet数据。\n是: 追加到已有数据\n否: 覆盖已有数据（只删除本工具导出的分区文件）"
+            )
+            if answer is None:
+                return
+            append = answer
+        
+        self.log_message(f"正在导出 {len(records)} 条数据到 {out_dir} ...")
+        threading.Thread(target=self._export_parquet_thread, args=(records, out_dir, append, lexicon_names, body_store), daemon=True).start()
+
+    def _export_parquet_thread(self, records, out_dir, append, lexicon_names, body_store):
+        """
+        Parquet导出线程
+        
+        @param {list} records - 帖子记录列表
+        @param {str} out_dir - 数据集目录
+        @param {bool} append - 是否追加到已有数据
+        @param {list} lexicon_names - 自定义词典名称（每个词典导出一列得分）
+        @param {spier_blobstore.BlobStore} body_store - 记录所引用的正文存储
+        """
+        try:
+            files = spier_export.export_parquet(records, out_dir, append=append, lexicon_names=lexicon_names,
+                                                body_store=body_store)
+            self.root.after(0, lambda: self.log_message(f"数据已成功导出到 {out_dir}（{len(files)} 个文件）"))
+            self.root.after(0, lambda: messagebox.showinfo("成功", f"数据已成功导出到 {out_dir}"))
+        except Exception as e:
+            self.root.after(0, lambda err=e: self.log_message(f"导出Parquet时出错: {str(err)}"))
+            self.root.after(0, lambda err=e: messagebox.showerror("错误", f"导出Parquet时出错: {str(err)}"))
+
     def clear_data(self):
         """
         清空表格数据
         """
-        self.data_table.delete(*self.data_table.get_children())
+        self._reset_results()
         self.log_message("已清空数据表格")
 
+    def show_analytics(self):
+        """
+        显示数据分析窗口
+        """
+        if self.analytics_window is not None and self.analytics_window.winfo_exists():
+            self.analytics_window.lift()
+            self._refresh_analytics()
+            return
+        
+        # matplotlib较重，打开窗口时才导入
+        import matplotlib
+        matplotlib.use("TkAgg")
+        matplotlib.rcParams["font.sans-serif"] = ["Microsoft YaHei", "SimHei", "DejaVu Sans"]
+        matplotlib.rcParams["axes.unicode_minus"] = False
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        
+        self.analytics_window = tk.Toplevel(self.root)
+        self.analytics_window.title("数据分析")
+        self.analytics_window.geometry("900x600")
+        
+        # 顶部工具栏
+        toolbar = ttk.Frame(self.analytics_window)
+        toolbar.pack(fill="x", padx=5, pady=5)
+        ttk.Label(toolbar, text="图表:").pack(side="left", padx=5)
+        self.analytics_view_var = tk.StringVar(value="发帖时间热力图")
+        view_combo = ttk.Combobox(
+            toolbar,
+            textvariable=self.analytics_view_var,
+            values=["发帖时间热力图", "点赞分布", "评论数分布", "高频词", "关键词共现"],
+            width=15,
+            state="readonly"
+        )
+        view_combo.pack(side="left", padx=5)
+        view_combo.bind("<<ComboboxSelected>>", lambda e: self._draw_analytics())
+        ttk.Button(toolbar, text="刷新", command=self._refresh_analytics).pack(side="left", padx=5)
+        self.analytics_status_var = tk.StringVar()
+        ttk.Label(toolbar, textvariable=self.analytics_status_var).pack(side="left", padx=10)
+        
+        # 图表区域
+        self.analytics_figure = Figure(figsize=(9, 5.5), dpi=100)
+        self.analytics_canvas = FigureCanvasTkAgg(self.analytics_figure, master=self.analytics_window)
+        self.analytics_canvas.get_tk_widget().pack(fill="both", expand=True)
+        
+        self._refresh_analytics()
+
+    def _refresh_analytics(self):
+        """
+        数据有变化时在后台重新计算聚合结果，否则直接用缓存绘制
+        """
+        key = (self.results_epoch, len(self.results))
+        if self.analytics_cache is not None and self.analytics_cache[0] == key:
+            self._draw_analytics()
+            return
+        if not self.results:
+            self.analytics_status_var.set("没有数据")
+            self.analytics_cache = None
+            self._draw_analytics()
+            return
+        if self.analytics_pending == key:
+            return  # 相同数据的计算已在进行中
+        
+        self.analytics_pending = key
+        self.analytics_status_var.set(f"正在统计 {key[1]} 条数据...")
+        # 拷贝一份记录列表，后台计算时不受新采集数据影响
+        records = self.results[:key[1]]
+        threading.Thread(target=self._compute_analytics_thread, args=(records, key, self.body_store), daemon=True).start()
+
+    def _compute_analytics_thread(self, records, key, body_store):
+        """
+        统计计算线程 - 数据量大时交给进程池，避免占用界面进程的GIL
+        
+        @param {list} records - 帖子记录列表
+        @param {tuple} key - (结果版本, 记录数)
+        @param {spier_blobstore.BlobStore} body_store - 记录所引用的正文存储
+        """
+        try:
+            import spier_analytics
+            columns = spier_analytics.records_to_columns(records, body_store)
+            # 热力图按系统时区逐条换算（考虑夏令时）
+            if len(records) > spier_analytics.PROCESS_POOL_THRESHOLD:
+                if self.analytics_pool is None:
+                    self.analytics_pool = concurrent.futures.ProcessPoolExecutor(max_workers=1)
+                aggregates = self.analytics_pool.submit(spier_analytics.compute_aggregates, columns).result()
+            else:
+                aggregates = spier_analytics.compute_aggregates(columns)
+            self.root.after(0, lambda: self._on_analytics_ready(key, aggregates))
+        except Exception as e:
+            self.root.after(0, lambda err=e: self._on_analytics_ready(key, None, err))
+
+    def _on_analytics_ready(self, key, aggregates, error=None):
+        """
+        聚合结果计算完成（在主线程中调用）
+        
+        @param {tuple} key - (结果版本, 记录数)
+        @param {dict} aggregates - 聚合结果
+        @param {Exception} error - 计算出错时的异常
+        """
+        if self.analytics_pending == key:
+            self.analytics_pending = None
+        if error is not None:
+            self.log_message(f"统计分析时出错: {str(error)}")
+            if self.analytics_window is not None and self.analytics_window.winfo_exists():
+                self.analytics_status_var.set("统计失败")
+            return
+        
+        self.analytics_cache = (key, aggregates)
+        if self.analytics_window is not None and self.analytics_window.winfo_exists():
+            self.analytics_status_var.set(f"共 {aggregates['total']} 条数据")
+            self._draw_analytics()
+
+    def _draw_analytics(self):
+        """
+        根据缓存的聚合结果绘制当前选择的图表
+        """
+        figure = self.analytics_figure
+        figure.clear()
+        
+        if self.analytics_cache is None:
+            self.analytics_canvas.draw_idle()
+            return
+        
+        aggregates = self.analytics_cache[1]
+        view = self.analytics_view_var.get()
+        
+        if view == "发帖时间热力图":
+            ax = figure.add_subplot(111)
+            image = ax.imshow(aggregates["heatmap"], aspect="auto", cmap="YlOrRd")
+            ax.set_yticks(range(7))
+            ax.set_yticklabels(["周一", "周二", "周三", "周四", "周五", "周六", "周日"])
+            ax.set_xticks(range(24))
+            ax.set_xlabel("小时（本地时间）")
+            ax.set_title("发帖时间分布")
+            figure.colorbar(image, ax=ax, label="帖子数")
+        elif view in ("点赞分布", "评论数分布"):
+            dist = aggregates["score" if view == "点赞分布" else "comments"]
+            ax = figure.add_subplot(111)
+            positions = range(len(dist["bins"]))
+            for name, hist, median in zip(dist["subreddits"], dist["hist"], dist["medians"]):
+                ax.plot(positions, hist, drawstyle="steps-mid", label=f"r/{name}（中位数 {median:g}）")
+            ax.set_xticks(list(positions))
+            ax.set_xticklabels([f"{b:g}+" for b in dist["bins"]], rotation=45)
+            ax.set_ylabel("帖子数")
+            ax.set_title(f"各社区{view}")
+            ax.legend(fontsize=8)
+        elif view == "高频词":
+            terms = aggregates["terms"]
+            for index, (title, (words, counts)) in enumerate((("高频词", terms["unigrams"]), ("高频词组", terms["bigrams"]))):
+                ax = figure.add_subplot(1, 2, index + 1)
+                ax.barh(range(len(words)), counts)
+                ax.set_yticks(range(len(words)))
+                ax.set_yticklabels(words, fontsize=8)
+                ax.invert_yaxis()
+                ax.set_title(title)
+        else:
+            terms = aggregates["terms"]
+            vocab = terms["cooccur_vocab"]
+            ax = figure.add_subplot(111)
+            image = ax.imshow(terms["cooccur"], cmap="Blues")
+            ax.set_xticks(range(len(vocab)))
+            ax.set_xticklabels(vocab, rotation=60, fontsize=8)
+            ax.set_yticks(range(len(vocab)))
+            ax.set_yticklabels(vocab, fontsize=8)
+            ax.set_title("高频词共现（同一帖子中出现的次数）")
+            figure.colorbar(image, ax=ax)
+        
+        figure.tight_layout()
+        self.analytics_canvas.draw_idle()
+
+    def _get_thumbnail_loader(self):
+        """
+        获取预览图加载器，首次调用时创建磁盘缓存和后台线程（缓存目录由后台线程扫描）
+        
+        @return {spier_media.ThumbnailLoader}
+        """
+        if self.thumbnail_loader is None:
+            cache = spier_media.MediaCache(self.media_cache_dir)
+            self.thumbnail_loader = spier_media.ThumbnailLoader(
+                cache,
+                on_ready=lambda url, path: self.root.after(0, lambda: self._on_thumbnail_ready(url, path)),
+                user_agent=self.user_agent_var.get().strip() or "RedditSpier v1.0"
+            )
+        return self.thumbnail_loader
+
+    def show_preview(self, event=None):
+        """
+        显示选中帖子的全文和预览图，并预取附近行的预览图
+        """
+        selected_items = self.data_table.selection()
+        if not selected_items:
+            return
+        
+        record = self.results[int(selected_items[0])]
+        self._display_body(record)
+        self.preview_url = record.get("thumbnail_url", "")
+        if not self.preview_url:
+            self.preview_image = None
+            self.preview_path = None
+            self.preview_label.config(image="", text="该帖子没有预览图")
+            return
+        
+        # 磁盘缓存的扫描和访问记录都在加载线程中完成，这里只查询内存中的索引
+        loader = self._get_thumbnail_loader()
+        path = loader.cache.peek(self.preview_url)
+        if path:
+            self._display_preview(path)
+        else:
+            self.preview_image = None
+            self.preview_label.config(image="", text="正在加载预览图...")
+        self.preview_path = path
+        loader.request([self.preview_url])
+        self._schedule_prefetch()
+
+    def _display_body(self, record):
+        """
+        在详情面板中显示帖子全文（从正文存储中按需读取）
+        
+        @param {dict} record - 帖子记录
+        """
+        try:
+            body = spier_blobstore.record_body(record, self.body_store)
+        except Exception as e:
+            body = f"读取帖子内容时出错: {str(e)}"
+        self.body_text.config(state="normal")
+        self.body_text.delete("1.0", "end")
+        self.body_text.insert("1.0", f"{record['title']}\n\n{body}")
+        self.body_text.config(state="disabled")
+
+    def _display_preview(self, path):
+        """
+        在预览面板中显示缩略图
+        
+        @param {str} path - 缩略图文件路径
+        """
+        from PIL import Image, ImageTk
+        
+        try:
+            with Image.open(path) as image:
+                self.preview_image = ImageTk.PhotoImage(image)
+            self.preview_label.config(image=self.preview_image, text="")
+        except Exception as e:
+            self.preview_image = None
+            self.preview_label.config(image="", text=f"预览图加载失败: {str(e)}")
+
+    def _on_thumbnail_ready(self, url, path):
+        """
+        缩略图加载完成（在主线程中调用）
+        
+        @param {str} url - 图片地址
+        @param {str} path - 缩略图文件路径，失败时为None
+        """
+        if url != self.preview_url or (path and path == self.preview_path):
+            return
+        self.preview_path = path
+        if path:
+            self._display_preview(path)
+        else:
+            self.preview_image = None
+            self.preview_label.config(image="", text="预览图加载失败")
+
+    def _schedule_prefetch(self):
+        """
+        滚动停止后再预取，避免快速滚动时产生大量请求
+        """
+        if self.thumbnail_loader is None:
+            return  # 用户还没有查看过预览图，不主动下载
+        if self.prefetch_job is not None:
+            self.root.after_cancel(self.prefetch_job)
+        self.prefetch_job = self.root.after(150, self._prefetch_visible)
+
+    def _prefetch_visible(self):
+        """
+        预取可见行及其前后若干行的预览图
+        """
+        self.prefetch_job = None
+        items = self.data_table.get_children()
+        if not items:
+            return
+        
+        first, last = self.data_table.yview()
+        start = max(int(first * len(items)) - 10, 0)
+        end = min(int(last * len(items)) + 20, len(items))
+        urls = [self.results[int(item)].get("thumbnail_url", "") for item in items[start:end]]
+        
+        # 已缓存的不再请求（只查询索引，不改变淘汰顺序）
+        cache = self.thumbnail_loader.cache
+        self.thumbnail_loader.request([url for url in urls if url and not cache.contains(url)])
+
+    def cluster_duplicates(self):
+        """
+        对已采集的帖子做近似重复聚类（MinHash + LSH），结果写入簇ID列
+        """
+        if not self.results:
+            messagebox.showerror("错误", "没有数据可聚类")
+            return
+        
+        key = (self.results_epoch, len(self.results))
+        records = list(self.results)
+        self.log_message(f"正在对 {len(records)} 个帖子做重复聚类...")
+        threading.Thread(target=self._cluster_duplicates_thread, args=(records, key, self.body_store), daemon=True).start()
+
+    def _cluster_duplicates_thread(self, records, key, body_store):
+        """
+        重复聚类线程 - 在后台读取帖子全文，数据量大时交给进程池
+        
+        @param {list} records - 帖子记录列表
+        @param {tuple} key - (结果版本, 记录数)
+        @param {spier_blobstore.BlobStore} body_store - 记录所引用的正文存储
+        """
+        try:
+            import spier_dedup
+            texts = [f"{record['title']} {spier_blobstore.record_body(record, body_store)}" for record in records]
+            if len(texts) > spier_dedup.PROCESS_POOL_THRESHOLD:
+                if self.analytics_pool is None:
+                    self.analytics_pool = concurrent.futures.ProcessPoolExecutor(max_workers=1)
+                cluster_ids, sizes = self.analytics_pool.submit(spier_dedup.cluster_texts, texts).result()
+            else:
+                cluster_ids, sizes = spier_dedup.cluster_texts(texts)
+            self.root.after(0, lambda: self._on_clusters_ready(key, cluster_ids.tolist(), sizes.tolist()))
+        except Exception as e:
+            self.root.after(0, lambda err=e: self.log_message(f"重复聚类时出错: {str(err)}"))
+
+    def _on_clusters_ready(self, key, cluster_ids, sizes):
+        """
+        聚类完成，更新记录和表格（在主线程中调用）
+        
+        @param {tuple} key - (结果版本, 记录数)
+        @param {list} cluster_ids - 每条记录的簇ID
+        @param {list} sizes - 每条记录所在簇的大小
+        """
+        if key[0] != self.results_epoch:
+            return  # 数据已被清空
+        
+        for index, (cluster_id, size) in enumerate(zip(cluster_ids, sizes)):
+            record = self.results[index]
+            record["cluster_id"] = cluster_id
+            record["cluster_size"] = size
+            self.data_table.set(str(index), "簇ID", cluster_id)
+        
+        duplicates = sum(1 for size in sizes if size > 1)
+        clusters = len({cluster_id for cluster_id, size in zip(cluster_ids, sizes) if size > 1})
+        self.log_message(f"重复聚类完成: {duplicates} 个帖子属于 {clusters} 个重复簇")
+        self.apply_cluster_collapse()
+
+    def apply_cluster_collapse(self):
+        """
+        根据"折叠重复帖"选项隐藏或恢复每个重复簇中除第一条以外的帖子
+        """
+        collapse = self.collapse_clusters_var.get()
+        seen = set()
+        position = 0  # 下一条显示行在表格中的位置
+        for index, record in enumerate(self.results):
+            iid = str(index)
+            cluster_id = record.get("cluster_id")
+            hidden = collapse and cluster_id is not None and cluster_id in seen
+            if cluster_id is not None:
+                seen.add(cluster_id)
+            if hidden:
+                self.data_table.detach(iid)
+            else:
+                # 按下标顺序放回，保持原有行顺序
+                self.data_table.move(iid, "", position)
+                position += 1
+        self.log_message("已折叠重复帖" if collapse else "已展开重复帖")
+
+    def load_lexicons(self):
+        """
+        加载自定义评分词典文件
+        """
+        paths = filedialog.askopenfilenames(
+            title="选择评分词典",
+            filetypes=[("词典文件", "*.json *.txt"), ("所有文件", "*.*")]
+        )
+        for path in paths:
+            try:
+                lexicons = spier_sentiment.load_lexicon_file(path)
+                self.lexicons.update(lexicons)
+                self.log_message(f"已加载评分词典: {', '.join(f'{name}({len(terms)}个词)' for name, terms in lexicons.items())}")
+            except Exception as e:
+                self.log_message(f"加载评分词典时出错: {str(e)}")
+                messagebox.showerror("错误", f"加载评分词典时出错: {str(e)}")
+
+    def score_posts(self):
+        """
+        对已采集的帖子做情感和自定义词典评分
+        """
+        if not self.results:
+            messagebox.showerror("错误", "没有数据可评分")
+            return
+        
+        key = (self.results_epoch, len(self.results))
+        records = list(self.results)
+        lexicons = dict(self.lexicons)
+        self.log_message(f"正在对 {len(records)} 个帖子评分...")
+        threading.Thread(target=self._score_posts_thread, args=(records, lexicons, key, self.body_store), daemon=True).start()
+
+    def _score_posts_thread(self, records, lexicons, key, body_store):
+        """
+        评分线程 - 按帖子全文评分，先查缓存，未命中的帖子分块交给进程池
+        
+        @param {list} records - 帖子记录列表
+        @param {dict} lexicons - 词典名 -> {词: 权重}
+        @param {tuple} key - (结果版本, 记录数)
+        @param {spier_blobstore.BlobStore} body_store - 记录所引用的正文存储
+        """
+        cache = None
+        try:
+            items = [(record["id"], record["title"], spier_blobstore.record_body(record, body_store)) for record in records]
+            cache = spier_sentiment.ScoreCache(self.score_cache_path)
+            lexicons_digest = spier_sentiment.lexicons_hash(lexicons)
+            digests = [spier_sentiment.content_hash(title, selftext) for _, title, selftext in items]
+            cached = cache.lookup([(post_id, digest) for (post_id, _, _), digest in zip(items, digests)], lexicons_digest)
+            
+            hits = [(index, *cached[post_id]) for index, (post_id, _, _) in enumerate(items) if post_id in cached]
+            todo = [(index, title, selftext) for index, (post_id, title, selftext) in enumerate(items) if post_id not in cached]
+            self.root.after(0, lambda: self._apply_scores(key, hits))
+            
+            # 数据量小时直接计算，避免启动子进程的开销
+            chunks = [todo[start:start + spier_sentiment.CHUNK_SIZE] for start in range(0, len(todo), spier_sentiment.CHUNK_SIZE)]
+            if len(chunks) > 1:
+                if self.scoring_pool is None:
+                    self.scoring_pool = concurrent.futures.ProcessPoolExecutor()
+                futures = [self.scoring_pool.submit(spier_sentiment.score_chunk, chunk, lexicons) for chunk in chunks]
+                completed = (future.result() for future in concurrent.futures.as_completed(futures))
+            else:
+                completed = (spier_sentiment.score_chunk(chunk, lexicons) for chunk in chunks)
+            
+            for rows in completed:
+                cache.store([(items[index][0], digests[index], sentiment, scores) for index, sentiment, scores in rows], lexicons_digest)
+                self.root.after(0, lambda r=rows: self._apply_scores(key, r))
+            
+            self.root.after(0, lambda: self.log_message(f"评分完成: 新评分 {len(todo)} 个，使用缓存 {len(hits)} 个"))
+        except Exception as e:
+            self.root.after(0, lambda err=e: self.log_message(f"评分时出错: {str(err)}"))
+        finally:
+            if cache is not None:
+                cache.close()
+
+    def _apply_scores(self, key, rows):
+        """
+        把评分结果写入记录和表格（在主线程中调用）
+        
+        @param {tuple} key - (结果版本, 记录数)
+        @param {list} rows - [(下标, 情感得分, {词典名: 得分})]
+        """
+        if key[0] != self.results_epoch:
+            return  # 数据已被清空
+        
+        for index, sentiment, lexicon_scores in rows:
+            record = self.results[index]
+            record["sentiment"] = sentiment
+            record["lexicon_scores"] = lexicon_scores
+            self.data_table.set(str(index), "情感", f"{sentiment:.3f}")
+            self.data_table.set(str(index), "词典得分", self._lexicon_scores_text(lexicon_scores))
+
     def show_context_menu(self, event):
         """
         显示右键菜单
@@ -812,6 +1768,7 @@ class RedditSpierApp:
         file_menu = tk.Menu(menu_bar, tearoff=0)
         menu_bar.add_cascade(label="文件", menu=file_menu)
         file_menu.add_command(label="导出CSV", command=self.export_csv)
+        file_menu.add_command(label="导出Parquet", command=self.export_parquet)
         file_menu.add_separator()
         file_menu.add_command(label="退出", command=self.root.quit)
         
@@ -820,9 +1777,22 @@ class RedditSpierApp:
         menu_bar.add_cascade(label="操作", menu=action_menu)
         action_menu.add_command(label="开始采集", command=self.start_scraping)
         action_menu.add_command(label="停止采集", command=self.stop_scraping_process)
+        action_menu.add_command(label="任务列表", command=self.show_job_list)
         action_menu.add_separator()
         action_menu.add_command(label="清空数据", command=self.clear_data)
         
+        # 分析菜单
+        analysis_menu = tk.Menu(menu_bar, tearoff=0)
+        menu_bar.add_cascade(label="分析", menu=analysis_menu)
+        analysis_menu.add_command(label="数据分析", command=self.show_analytics)
+        analysis_menu.add_separator()
+        analysis_menu.add_command(label="重复帖聚类", command=self.cluster_duplicates)
+        self.collapse_clusters_var = tk.BooleanVar(value=False)
+        analysis_menu.add_checkbutton(label="折叠重复帖", variable=self.collapse_clusters_var, command=self.apply_cluster_collapse)
+        analysis_menu.add_separator()
+        analysis_menu.add_command(label="加载评分词典...", command=self.load_lexicons)
+        analysis_menu.add_command(label="情感与词典评分", command=self.score_posts)
+        
         # 帮助菜单
         help_menu = tk.Menu(menu_bar, tearoff=0)
         menu_bar.add_cascade(label="帮助", menu=help_menu)
@@ -839,8 +1809,13 @@ class RedditSpierApp:
         1. API配置
            - 首先需要在Reddit开发者平台(https://www.reddit.com/prefs/apps)创建应用
            - 填写Client ID、Client Secret和User Agent
-           - 点击"连接Reddit"按钮测试连接
+           - 点击"连接Reddit"按钮测试连接，连接在后台进行，状态显示在输入框右侧
+           - 已保存配置时，启动后会在后台自动连接
+           - 访问令牌缓存在配置文件旁的reddit_token.json中，有效期内再次启动无需重新认证
            - 连接成功后，可以点击"保存配置"保存API信息
+           - 多人共用时，可以用 python reddit_spier.py --serve 启动采集服务（共享凭据、请求额度和采集结果缓存），
+             在"采集服务"中填写服务地址（例如 http://127.0.0.1:8765）和"服务令牌"后，采集任务提交到服务执行，本机无需连接Reddit；
+             Subreddit搜索仍使用本机的连接
         
         2. Subreddit搜索
            - 在搜索框中输入关键词，点击"搜索"按钮
@@ -856,16 +1831,37 @@ class RedditSpierApp:
            - 排序：选择帖子的排序方式（热门、最新、相关）
         
         4. 数据采集
-           - 点击"开始采集"按钮开始采集数据
-           - 采集过程中可以点击"停止采集"按钮停止
+           - 点击"开始采集"按钮，按当前参数创建一个采集任务
+           - 多个任务可以同时运行，共享API请求额度，优先级高的任务先获得请求
+           - "重复"可设置任务每15/30/60分钟自动运行一次，只添加新帖子
+           - 点击"任务列表"查看所有任务的状态，可以单独取消任务
+           - 限流、服务器错误和超时会自动退避重试并从失败的那一页继续，"重试预算"限制每次运行的重试总次数
+           - 某个社区/关键词失败不影响其他部分，已采集的帖子会保留；在任务列表中点击"失败报告"查看失败的部分
+           - Reddit单个查询最多返回约1000个帖子。勾选"深度采集"后，每个社区/关键词会按多种排序方式和时间范围拆分成多个子查询，
+             在请求额度内并发抓取，按帖子ID去重后合并，直到达到设定的数量；任务列表中的"覆盖报告"显示每个子查询取回和新增的帖子数，
+             "达到上限"表示该子查询可能还有未取到的帖子
+           - 采集过程中可以点击"停止采集"按钮停止所有任务
            - 采集完成后，数据会显示在表格中
            - 右键点击表格中的行可以打开帖子或复制地址
+           - 选中表格中的行，右侧会显示帖子的预览图；附近行的预览图会在后台预先加载并缓存到本地
+           - 表格中的帖子内容只显示前200个字符，右侧"全文"标签页显示完整内容；导出、聚类和评分都使用完整内容
         
         5. 数据导出
            - 点击"导出CSV"按钮将数据导出为CSV文件
            - 导出的文件可以用Excel等软件打开
-        
-        6. 其他功能
+           - 点击"导出Parquet"按钮选择目录，按社区和采集日期分区导出
+           - 目录中已有数据时可以选择追加或覆盖
+        
+        6. 数据分析
+           - 菜单"分析 > 数据分析"打开分析窗口
+           - 可查看发帖时间热力图、各社区点赞/评论数分布、高频词和关键词共现
+           - 采集到新数据后点击"刷新"重新统计
+           - 菜单"分析 > 重复帖聚类"把标题和内容近似相同的帖子（转帖、刷屏）归入同一簇，簇ID显示在表格最后一列并随数据导出
+           - 勾选"分析 > 折叠重复帖"后每个簇只显示第一条帖子
+           - "分析 > 加载评分词典..."加载自定义词典（.txt每行一个词，可用Tab分隔权重；.json格式为{"词典名": ["词", ...]}）
+           - "分析 > 情感与词典评分"计算每个帖子的情感得分和各词典得分，结果会缓存，再次评分时只计算新帖子或内容有变化的帖子
+        
+        7. 其他功能
            - 点击"清空数据"按钮可以清空表格数据
            - 操作日志会显示在底部，记录所有操作
         """
@@ -909,7 +1905,41 @@ class RedditSpierApp:
         
         messagebox.showinfo("关于", about_text)
 
+def install_startup_probe(root, probe_path):
+    """
+    启动耗时测试 - 窗口首次绘制完成后把时间戳写入文件并退出
+    
+    @param {tk.Tk} root - Tkinter根窗口
+    @param {str} probe_path - 时间戳文件路径
+    """
+    def record_first_paint():
+        root.update_idletasks()
+        with open(probe_path, "w") as f:
+            f.write(repr(time.time()))
+        root.destroy()
+    
+    def on_map(event):
+        if event.widget is root:
+            root.unbind("<Map>")
+            root.after_idle(record_first_paint)
+    
+    root.bind("<Map>", on_map)
+
 if __name__ == "__main__":
+    # 打包后的程序使用进程池时需要
+    import multiprocessing
+    multiprocessing.freeze_support()
+    
+    # 以采集服务方式运行，不创建窗口
+    if "--serve" in sys.argv[1:]:
+        import spier_service
+        sys.exit(spier_service.main([arg for arg in sys.argv[1:] if arg != "--serve"], default_config_path()))
+    
     root = tk.Tk()
     app = RedditSpierApp(root)
+    
+    # 由 benchmarks/bench_startup.py 设置，用于测量首次绘制耗时
+    if os.environ.get("REDDIT_SPIER_STARTUP_PROBE"):
+        install_startup_probe(root, os.environ["REDDIT_SPIER_STARTUP_PROBE"])
+    
     root.mainloop() 
\ No newline at end of file
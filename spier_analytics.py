@@ -0,0 +1,156 @@
+"""
+采集结果的统计分析
+
+所有聚合都在列式数组上用numpy/pandas向量化计算，输入输出都是可序列化的
+简单对象，可以直接提交到进程池执行。图表只根据聚合结果绘制。
+"""
+import numpy as np
+import pandas as pd
+
+import spier_blobstore
+
+# 超过该记录数时在进程池中计算
+PROCESS_POOL_THRESHOLD = 50000
+
+# 点赞/评论分布的分箱边界（近似对数刻度）
+DISTRIBUTION_BINS = np.array([0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000])
+
+# 分布图中最多展示的社区数
+TOP_SUBREDDITS = 8
+
+# 分词规则和停用词
+TOKEN_PATTERN = r"[^\W\d_][\w']+"
+STOPWORDS = frozenset("""
+a about after all also am an and any are as at be because been but by can could did do does for from
+had has have he her his how i if in into is it its just me more my no not of on or our out so some than
+that the their them then there these they this to up was we were what when which who will with would
+you your i'm it's don't can't
+""".split())
+
+
+def records_to_columns(records, body_store=None):
+    """
+    把帖子记录转换为列式数据
+
+    @param {list} records - 帖子记录列表
+    @param {spier_blobstore.BlobStore} body_store - 完整正文存储
+    @return {dict} - 列名 -> numpy数组/列表
+    """
+    return {
+        "created_utc": np.fromiter((r["created_utc"] for r in records), dtype=np.float64, count=len(records)),
+        "score": np.fromiter((r["score"] for r in records), dtype=np.int64, count=len(records)),
+        "num_comments": np.fromiter((r["num_comments"] for r in records), dtype=np.int64, count=len(records)),
+        "subreddit": [r["subreddit"] for r in records],
+        "text": [f"{r['title']} {spier_blobstore.record_body(r, body_store)}" for r in records],
+    }
+
+
+def posting_heatmap(created_utc, tz=None):
+    """
+    发帖时间热力图（星期 x 小时）
+
+    每个时间戳按发帖时所在时刻的UTC偏移换算为本地时间，跨越夏令时切换的数据也能落到正确的小时。
+    偏移只按不同的UTC小时计算一次，再映射回每条记录。
+
+    @param {numpy.ndarray} created_utc - 发帖时间戳（秒）
+    @param {datetime.tzinfo|str} tz - 本地时区，None表示系统时区
+    @return {numpy.ndarray} - 7x24计数矩阵，行从周一开始
+    """
+    if tz is None:
+        from dateutil import tz as dateutil_tz
+        tz = dateutil_tz.tzlocal()
+
+    utc_hours, inverse = np.unique(np.floor(created_utc / 3600).astype(np.int64), return_inverse=True)
+    utc = pd.to_datetime(utc_hours * 3600, unit="s", utc=True)
+    offsets = (utc.tz_convert(tz).tz_localize(None) - utc.tz_localize(None)).total_seconds().to_numpy()
+
+    local = np.floor((created_utc + offsets[inverse]) / 3600).astype(np.int64)
+    hours = local % 24
+    # 1970-01-01是星期四
+    weekdays = (local // 24 + 3) % 7
+    return np.bincount(weekdays * 24 + hours, minlength=7 * 24).reshape(7, 24)
+
+
+def distributions(subreddits, values, top=TOP_SUBREDDITS):
+    """
+    按社区统计数值分布
+
+    @param {list} subreddits - 每条记录的社区名称
+    @param {numpy.ndarray} values - 每条记录的数值（点赞数或评论数）
+    @param {int} top - 展示记录最多的前几个社区
+    @return {dict} - 社区名称、分箱边界、各社区分箱计数和中位数
+    """
+    codes, names = pd.factorize(pd.Series(subreddits))
+    counts = np.bincount(codes, minlength=len(names))
+    order = np.argsort(-counts, kind="stable")[:top]
+
+    bins = np.digitize(np.clip(values, 0, None), DISTRIBUTION_BINS[1:])
+    n_bins = len(DISTRIBUTION_BINS)
+    hist = np.bincount(codes * n_bins + bins, minlength=len(names) * n_bins).reshape(len(names), n_bins)
+    medians = pd.Series(values).groupby(codes).median().reindex(range(len(names))).to_numpy()
+
+    return {
+        "subreddits": [str(names[i]) for i in order],
+        "bins": DISTRIBUTION_BINS,
+        "hist": hist[order],
+        "medians": medians[order],
+    }
+
+
+def text_terms(texts, top_n=30, cooccur_n=15):
+    """
+    高频单词、高频二元词组和高频词共现矩阵
+
+    @param {list} texts - 每条记录的文本（标题 + 内容）
+    @param {int} top_n - 返回的高频词数量
+    @param {int} cooccur_n - 共现矩阵中的词数量
+    @return {dict} - 高频词、高频词组和共现矩阵
+    """
+    tokens = pd.Series(texts, dtype="object").str.lower().str.findall(TOKEN_PATTERN).explode().dropna()
+    tokens = tokens[~tokens.isin(STOPWORDS)]
+    doc_ids = tokens.index.to_numpy()
+    words = tokens.to_numpy()
+
+    unigrams = tokens.value_counts().head(top_n)
+
+    # 相邻且属于同一文档的两个词组成二元词组
+    same_doc = doc_ids[:-1] == doc_ids[1:]
+    bigrams = pd.Series(words[:-1][same_doc] + " " + words[1:][same_doc], dtype="object").value_counts().head(top_n)
+
+    # 高频词的文档级共现: 文档 x 词 的0/1矩阵自乘
+    vocab = list(unigrams.index[:cooccur_n])
+    cooccur = np.zeros((len(vocab), len(vocab)), dtype=np.int64)
+    if vocab:
+        columns = pd.Categorical(words, categories=vocab).codes
+        mask = columns >= 0
+        pairs = np.unique(np.stack([doc_ids[mask], columns[mask]], axis=1), axis=0)
+        if len(pairs):
+            docs = np.unique(pairs[:, 0], return_inverse=True)[1]
+            presence = np.zeros((docs.max() + 1, len(vocab)), dtype=np.int32)
+            presence[docs, pairs[:, 1]] = 1
+            cooccur = presence.T @ presence
+            np.fill_diagonal(cooccur, 0)
+
+    return {
+        "unigrams": (list(unigrams.index), unigrams.to_numpy()),
+        "bigrams": (list(bigrams.index), bigrams.to_numpy()),
+        "cooccur_vocab": vocab,
+        "cooccur": cooccur,
+    }
+
+
+def compute_aggregates(columns, tz=None):
+    """
+    计算分析窗口所需的全部聚合结果（可在子进程中执行）
+
+    @param {dict} columns - records_to_columns 返回的列式数据
+    @param {datetime.tzinfo|str} tz - 热力图使用的本地时区，None表示系统时区
+    @return {dict} - 聚合结果
+    """
+    return {
+        "total": len(columns["subreddit"]),
+        "heatmap": posting_heatmap(columns["created_utc"], tz),
+        "score": distributions(columns["subreddit"], columns["score"]),
+        "comments": distributions(columns["subreddit"], columns["num_comments"]),
+        "terms": text_terms(columns["text"]),
+    }
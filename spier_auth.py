@@ -0,0 +1,234 @@
+"""
+Reddit应用级OAuth令牌缓存和HTTP连接预热
+
+令牌按凭据（Client ID + Client Secret的哈希）保存在配置文件旁边，
+启动或重复连接时，未过期的令牌直接注入praw，不再重新认证。
+令牌注入和连接预热依赖prawcore的私有属性，遇到不认识的版本时放弃注入（重新请求令牌）或跳过预热。
+"""
+import hashlib
+import json
+import os
+import time
+
+# 令牌到期前多少秒视为需要刷新
+TOKEN_REFRESH_MARGIN = 300
+
+# 预热连接的超时（秒）
+PREWARM_TIMEOUT = 10
+
+# 无法从prawcore读取过期时间时假定的令牌有效期（秒）
+FALLBACK_TOKEN_LIFETIME = 3600
+
+
+def credentials_key(client_id, client_secret, user_agent):
+    """
+    凭据的哈希，用于判断缓存的令牌是否属于当前凭据（不保存明文Secret）
+
+    @param {str} client_id - Client ID
+    @param {str} client_secret - Client Secret
+    @param {str} user_agent - User Agent
+    @return {str} - 十六进制哈希
+    """
+    return hashlib.sha256(f"{client_id}\0{client_secret}\0{user_agent}".encode("utf-8")).hexdigest()
+
+
+class TokenCache:
+    """
+    OAuth令牌的本地缓存文件
+    """
+    def __init__(self, path):
+        """
+        @param {str} path - 缓存文件路径
+        """
+        self.path = path
+
+    def load(self, key):
+        """
+        读取属于当前凭据且未临近过期的令牌
+
+        @param {str} key - 凭据哈希
+        @return {dict} - 令牌信息，没有可用令牌时返回None
+        """
+        try:
+            with open(self.path, "r") as f:
+                token = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if token.get("key") != key or not token.get("access_token"):
+            return None
+        if token.get("expires_at", 0) - time.time() < TOKEN_REFRESH_MARGIN:
+            return None
+        return token
+
+    def save(self, key, token):
+        """
+        保存令牌 - 先写临时文件再替换
+
+        在Linux/macOS上文件以0o600创建，只有当前用户可读写；Windows会忽略这些权限位，
+        文件继承所在目录的访问控制，需要由配置目录本身（默认在用户目录下）限制访问。
+
+        @param {str} key - 凭据哈希
+        @param {dict} token - 令牌信息（access_token、expires_at、scope）
+        """
+        data = dict(token, key=key)
+        temp_path = f"{self.path}.tmp"
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.path)
+
+    def clear(self):
+        """
+        删除缓存的令牌
+        """
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def create_reddit(client_id, client_secret, user_agent):
+    """
+    创建Reddit API客户端（不发送请求）
+
+    @param {str} client_id - Client ID
+    @param {str} client_secret - Client Secret
+    @param {str} user_agent - User Agent
+    @return {praw.Reddit}
+    """
+    # praw导入较慢，首次连接时才导入
+    import praw
+
+    # 明确指定所有必要参数
+    return praw.Reddit(
+        client_id=client_id,
+        client_secret=client_secret,
+        user_agent=user_agent,
+        check_for_updates=False,  # 禁用更新检查
+        comment_kind="t1",        # 明确指定类型
+        message_kind="t4",
+        redditor_kind="t2",
+        submission_kind="t3",
+        subreddit_kind="t5",
+        trophy_kind="t6",
+        oauth_url="https://oauth.reddit.com",
+        reddit_url="https://www.reddit.com",
+        short_url="https://redd.it",
+        ratelimit_seconds=5,      # 设置速率限制
+        timeout=16                # 设置超时
+    )
+
+
+def clone_reddit(reddit, token_cache=None):
+    """
+    创建使用同一凭据的新客户端 - praw.Reddit 不是线程安全的，每个采集线程使用自己的客户端
+
+    @param {praw.Reddit} reddit - 已连接的Reddit API客户端
+    @param {TokenCache} token_cache - 令牌缓存，有可用令牌时直接注入，否则由praw在第一次请求时认证
+    @return {praw.Reddit}
+    """
+    config = reddit.config
+    clone = create_reddit(config.client_id, config.client_secret, config.user_agent)
+    if token_cache is not None:
+        token = token_cache.load(credentials_key(config.client_id, config.client_secret, config.user_agent))
+        # 令牌无法注入时由praw在第一次请求时自行认证
+        if token:
+            apply_token(clone, token)
+    return clone
+
+
+def _authorizer(reddit):
+    """
+    praw应用级（只读）会话的认证器
+
+    @param {praw.Reddit} reddit - Reddit API客户端
+    @return {prawcore.ReadOnlyAuthorizer}
+    """
+    return reddit._read_only_core._authorizer
+
+
+def _get_expires_at(authorizer):
+    """
+    认证器中令牌的过期时间（Unix时间戳）
+
+    prawcore 4.x 在取得令牌后用单调时钟纳秒（_expiration_timestamp_ns）记录过期时间，
+    更早的版本用Unix时间戳（_expiration_timestamp）。都没有时返回None。
+    """
+    expiration_ns = getattr(authorizer, "_expiration_timestamp_ns", None)
+    if expiration_ns is not None:
+        return time.time() + (expiration_ns - time.monotonic_ns()) / 1e9
+    return getattr(authorizer, "_expiration_timestamp", None)
+
+
+def apply_token(reddit, token):
+    """
+    把缓存的令牌注入praw，之后的请求直接使用该令牌
+
+    过期时间保存在prawcore的私有属性中，依次尝试已知的两种属性，用 is_valid 确认令牌已生效。
+    都不生效（未知的prawcore版本）时撤销注入，由调用方请求新令牌。
+
+    @param {praw.Reddit} reddit - Reddit API客户端
+    @param {dict} token - 令牌信息
+    @return {bool} - 令牌是否已生效
+    """
+    try:
+        authorizer = _authorizer(reddit)
+    except AttributeError:
+        return False
+
+    remaining = token["expires_at"] - time.time()
+    layouts = (
+        ("_expiration_timestamp_ns", time.monotonic_ns() + int(remaining * 1e9)),
+        ("_expiration_timestamp", token["expires_at"]),
+    )
+    authorizer.access_token = token["access_token"]
+    authorizer.scopes = set(token.get("scope", ["*"]))
+    for name, value in layouts:
+        setattr(authorizer, name, value)
+        try:
+            if authorizer.is_valid():
+                return True
+        except (AttributeError, TypeError):
+            pass
+        # 去掉没有生效的属性，以免之后读取过期时间时误用
+        delattr(authorizer, name)
+
+    authorizer.access_token = None
+    authorizer.scopes = None
+    return False
+
+
+def fetch_token(reddit):
+    """
+    请求新的应用级令牌（同时验证凭据是否有效）
+
+    @param {praw.Reddit} reddit - Reddit API客户端
+    @return {dict} - 令牌信息
+    """
+    authorizer = _authorizer(reddit)
+    authorizer.refresh()
+    expires_at = _get_expires_at(authorizer)
+    if expires_at is None:
+        # 未知的prawcore版本: 这样的令牌无法注入（见 apply_token），过期时间只用于安排刷新
+        expires_at = time.time() + FALLBACK_TOKEN_LIFETIME
+    return {
+        "access_token": authorizer.access_token,
+        "expires_at": expires_at,
+        "scope": sorted(authorizer.scopes or []),
+    }
+
+
+def prewarm(reddit):
+    """
+    预先建立到API服务器的TLS连接，放入praw会话的连接池供后续请求复用
+
+    @param {praw.Reddit} reddit - Reddit API客户端
+    @return {bool} - 是否已预热，prawcore内部结构不同（未知版本）时跳过
+    """
+    try:
+        requestor = _authorizer(reddit)._authenticator._requestor
+        session, url = requestor._http, requestor.oauth_url
+    except AttributeError:
+        return False
+    session.head(url, timeout=PREWARM_TIMEOUT)
+    return True
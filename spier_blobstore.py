@@ -0,0 +1,87 @@
+"""
+帖子全文的追加写入存储
+
+帖子正文按UTF-8追加写入一个临时文件，记录中只保存 (偏移, 长度)。
+读取时通过内存映射按需切片，不需要把所有正文保留在内存中，
+每条记录的内存开销固定为一个二元组。
+
+文件在程序退出时自动删除，只在本次运行中有效。
+"""
+import mmap
+import tempfile
+import threading
+
+
+class BlobStore:
+    """
+    只追加的正文存储，写入和读取可以在不同线程中进行
+    """
+    def __init__(self, directory=None):
+        """
+        @param {str} directory - 临时文件所在目录，None表示系统临时目录
+        """
+        self.file = tempfile.TemporaryFile(prefix="reddit_spier_bodies_", suffix=".blob", dir=directory)
+        self.lock = threading.Lock()
+        self.size = 0
+        self.map = None
+        self.mapped_size = 0
+
+    def append(self, text):
+        """
+        追加一段文本
+
+        @param {str} text - 文本
+        @return {tuple} - (偏移, 字节长度)
+        """
+        data = text.encode("utf-8")
+        with self.lock:
+            offset = self.size
+            self.file.write(data)
+            self.size += len(data)
+        return offset, len(data)
+
+    def read(self, ref):
+        """
+        读取一段文本
+
+        @param {tuple} ref - append 返回的 (偏移, 字节长度)
+        @return {str} - 文本
+        """
+        offset, length = ref
+        if not length:
+            return ""
+        with self.lock:
+            if offset + length > self.mapped_size:
+                # 文件增长后重新映射，已映射的部分由系统按需换入，不占用进程内存
+                self.file.flush()
+                if self.map is not None:
+                    self.map.close()
+                self.map = mmap.mmap(self.file.fileno(), self.size, access=mmap.ACCESS_READ)
+                self.mapped_size = self.size
+            data = self.map[offset:offset + length]
+        return data.decode("utf-8")
+
+    def close(self):
+        """
+        关闭并删除存储文件，之后读取会抛出 ValueError
+        """
+        with self.lock:
+            if self.map is not None:
+                self.map.close()
+                self.map = None
+                self.mapped_size = 0
+            self.file.close()
+
+
+def record_body(record, store):
+    """
+    帖子记录的完整正文，没有正文引用时返回记录中的（可能已截断的）内容
+
+    @param {dict} record - 帖子记录
+    @param {BlobStore} store - 正文存储
+    @return {str}
+    """
+    ref = record.get("body_ref")
+    if ref is None or store is None:
+        return record["selftext"]
+    return store.read(ref)
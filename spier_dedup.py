@@ -0,0 +1,218 @@
+"""
+近似重复帖子聚类（MinHash + LSH）
+
+1. 文本（标题 + 内容）按UTF-8字节切成长度为 SHINGLE_SIZE 的片段并哈希
+2. 每篇文档计算 NUM_PERM 个MinHash值作为签名；1、2两步按文档分批进行，
+   批与批之间只保留 文档数 x NUM_PERM 的签名矩阵，内存占用不随语料总长度增长
+3. 签名分成 BANDS 段，某一段完全相同的文档成为候选对（LSH分桶）
+4. 签名相似度达到阈值的候选对连通成簇
+
+全部步骤都在numpy数组上批量计算，不做两两比较，耗时随文档数近似线性增长。
+"""
+import numpy as np
+
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+# 每段 NUM_PERM // BANDS = 4 行，候选阈值约为 (1/32)^(1/4) ≈ 0.42，低于 SIMILARITY_THRESHOLD，
+# 相似度为0.6的文档对成为候选的概率约为 1 - (1 - 0.6^4)^32 ≈ 0.99
+BANDS = 32
+SIMILARITY_THRESHOLD = 0.6
+
+# 超过该文档数时在进程池中计算
+PROCESS_POOL_THRESHOLD = 50000
+
+# 每批切片的文本长度（字符数），一批的片段数组约占该长度的40倍字节
+TEXT_BATCH_CHARS = 2_000_000
+
+# 分块计算MinHash时每块的片段数和哈希函数数，控制内存占用
+SHINGLE_CHUNK = 500_000
+PERM_CHUNK = 16
+
+# 比较候选对签名时每块的文档对数
+PAIR_CHUNK = 20_000
+
+
+def normalize(text):
+    """
+    归一化文本: 小写并合并空白
+
+    @param {str} text - 原始文本
+    @return {str}
+    """
+    return " ".join(text.lower().split())
+
+
+def shingle_hashes(texts, k=SHINGLE_SIZE):
+    """
+    计算所有文档的字节片段哈希
+
+    @param {list} texts - 文档文本列表
+    @param {int} k - 片段长度（字节，不超过8）
+    @return {tuple} - (片段哈希 uint32数组, 所属文档下标数组)，按文档顺序排列
+    """
+    encoded = [normalize(t).encode("utf-8") for t in texts]
+    lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint64)
+    if len(data) < k:
+        return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.int64)
+
+    # k个字节直接拼成一个整数（k <= 8），不会冲突
+    count = len(data) - k + 1
+    packed = np.zeros(count, dtype=np.uint64)
+    for j in range(k):
+        packed = (packed << np.uint64(8)) | data[j:j + count]
+
+    # 只保留不跨越文档边界的片段
+    doc_of_byte = np.repeat(np.arange(len(encoded)), lengths)
+    valid = doc_of_byte[:count] == doc_of_byte[k - 1:]
+
+    # 乘法哈希压缩到32位，取乘积的高位
+    hashes = (packed[valid] * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(32)
+    return hashes.astype(np.uint32), doc_of_byte[:count][valid]
+
+
+def minhash_signatures(hashes, docs, n_docs, num_perm=NUM_PERM, seed=1):
+    """
+    计算MinHash签名（哈希函数族 h(x) = a * x + b mod 2^32，a为奇数）
+
+    @param {numpy.ndarray} hashes - 片段哈希（uint32）
+    @param {numpy.ndarray} docs - 片段所属文档下标（非递减）
+    @param {int} n_docs - 文档数
+    @param {int} num_perm - 哈希函数数量
+    @param {int} seed - 随机种子
+    @return {tuple} - (签名 n_docs x num_perm 的uint32数组, 是否有片段的布尔数组)
+    """
+    rng = np.random.default_rng(seed)
+    a = (rng.integers(0, 2 ** 32, size=num_perm, dtype=np.uint64) | np.uint64(1)).astype(np.uint32)
+    b = rng.integers(0, 2 ** 32, size=num_perm, dtype=np.uint64).astype(np.uint32)
+
+    signatures = np.full((n_docs, num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+    has_shingles = np.zeros(n_docs, dtype=bool)
+    if len(hashes) == 0:
+        return signatures, has_shingles
+    has_shingles[docs] = True
+
+    # 按文档边界分块，每块内用 reduceat 求每篇文档的最小值。
+    # 中间结果按 (哈希函数, 片段) 排列，沿连续内存做 reduceat 更快
+    boundaries = np.flatnonzero(np.r_[True, docs[1:] != docs[:-1]])
+    start = 0
+    while start < len(boundaries):
+        end = np.searchsorted(boundaries, boundaries[start] + SHINGLE_CHUNK, side="left")
+        end = max(end, start + 1)
+        lo = boundaries[start]
+        hi = boundaries[end] if end < len(boundaries) else len(hashes)
+        chunk = hashes[lo:hi]
+        segment_starts = boundaries[start:end] - lo
+        chunk_docs = docs[boundaries[start:end]]
+        for p in range(0, num_perm, PERM_CHUNK):
+            permuted = chunk[None, :] * a[p:p + PERM_CHUNK, None]
+            permuted += b[p:p + PERM_CHUNK, None]
+            signatures[chunk_docs, p:p + PERM_CHUNK] = np.minimum.reduceat(permuted, segment_starts, axis=1).T
+        start = end
+
+    return signatures, has_shingles
+
+
+def document_signatures(texts, num_perm=NUM_PERM, seed=1):
+    """
+    按批切片并计算所有文档的MinHash签名（同一个种子下各批使用相同的哈希函数）
+
+    @param {list} texts - 文档文本列表
+    @param {int} num_perm - 哈希函数数量
+    @param {int} seed - 随机种子
+    @return {tuple} - (签名 n_docs x num_perm 的uint32数组, 是否有片段的布尔数组)
+    """
+    n = len(texts)
+    signatures = np.empty((n, num_perm), dtype=np.uint32)
+    has_shingles = np.zeros(n, dtype=bool)
+    start = 0
+    while start < n:
+        end, size = start + 1, len(texts[start])
+        while end < n and size + len(texts[end]) <= TEXT_BATCH_CHARS:
+            size += len(texts[end])
+            end += 1
+        hashes, docs = shingle_hashes(texts[start:end])
+        signatures[start:end], has_shingles[start:end] = minhash_signatures(hashes, docs, end - start, num_perm, seed)
+        start = end
+    return signatures, has_shingles
+
+
+def lsh_candidate_pairs(signatures, candidates, bands=BANDS, seed=2):
+    """
+    LSH分桶，返回同一桶中相邻的文档对
+
+    @param {numpy.ndarray} signatures - MinHash签名
+    @param {numpy.ndarray} candidates - 参与分桶的文档下标
+    @param {int} bands - 段数
+    @param {int} seed - 随机种子
+    @return {tuple} - (左文档下标数组, 右文档下标数组)
+    """
+    rows = signatures.shape[1] // bands
+    coefficients = np.random.default_rng(seed).integers(1, 2 ** 63, size=rows, dtype=np.uint64) | np.uint64(1)
+    left, right = [], []
+    for band in range(bands):
+        band_values = signatures[candidates, band * rows:(band + 1) * rows].astype(np.uint64)
+        keys = (band_values * coefficients).sum(axis=1)
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        same = np.flatnonzero(sorted_keys[1:] == sorted_keys[:-1])
+        left.append(candidates[order[same]])
+        right.append(candidates[order[same + 1]])
+    if not left:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(left), np.concatenate(right)
+
+
+def connected_components(n, left, right):
+    """
+    用标签传播和指针跳跃求连通分量
+
+    @param {int} n - 节点数
+    @param {numpy.ndarray} left - 边的一端
+    @param {numpy.ndarray} right - 边的另一端
+    @return {numpy.ndarray} - 每个节点所在分量中最小的节点下标
+    """
+    labels = np.arange(n)
+    while True:
+        previous = labels.copy()
+        np.minimum.at(labels, left, labels[right])
+        np.minimum.at(labels, right, labels[left])
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def cluster_texts(texts, threshold=SIMILARITY_THRESHOLD):
+    """
+    把文本聚成近似重复簇
+
+    @param {list} texts - 文档文本列表
+    @param {float} threshold - 签名相似度阈值（约等于片段集合的Jaccard相似度）
+    @return {tuple} - (簇ID数组（从1开始，按首次出现顺序编号）, 簇大小数组)
+    """
+    n = len(texts)
+    if n == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    signatures, has_shingles = document_signatures(texts)
+
+    # 太短没有片段的文档不参与聚类
+    left, right = lsh_candidate_pairs(signatures, np.flatnonzero(has_shingles))
+    if len(left):
+        # 同一对文档可能在多个段中成为候选，只比较一次
+        pairs = np.unique(np.minimum(left, right) * n + np.maximum(left, right))
+        left, right = pairs // n, pairs % n
+        # 用完整签名估计相似度，过滤分桶带来的误报；分块比较，不同时取出所有候选对的签名
+        keep = np.empty(len(left), dtype=bool)
+        for start in range(0, len(left), PAIR_CHUNK):
+            end = start + PAIR_CHUNK
+            similarity = (signatures[left[start:end]] == signatures[right[start:end]]).mean(axis=1)
+            keep[start:end] = similarity >= threshold
+        left, right = left[keep], right[keep]
+
+    roots = connected_components(n, left, right)
+    _, first_index, inverse, sizes = np.unique(roots, return_index=True, return_inverse=True, return_counts=True)
+    # 按簇中第一篇文档的位置编号
+    rank = np.empty(len(first_index), dtype=np.int64)
+    rank[np.argsort(first_index)] = np.arange(1, len(first_index) + 1)
+    return rank[inverse], sizes[inverse]
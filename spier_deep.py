@@ -0,0 +1,152 @@
+"""
+深度采集: 把一个 (社区, 关键词) 请求拆分成多个子查询
+
+Reddit的列表和搜索每个查询最多返回约1000条结果，且搜索已不支持按时间戳区间查询。
+深度采集对同一个请求使用不同的排序方式和时间范围（time_filter）组合，
+每个组合是一个分区，各自最多取到1000条；分区并发抓取（共享请求速率限制），
+结果按帖子ID合并去重。
+
+每个分区记录取回的帖子数和新增的帖子数。取回数达到上限的分区可能还有未取到的帖子，
+在覆盖报告中标出；已达到采集数量后其余分区不再抓取。
+"""
+import threading
+
+# 单个列表/搜索查询最多返回的帖子数
+LISTING_CAP = 1000
+
+# 搜索可用的排序方式和时间范围
+SEARCH_SORTS = ("relevance", "new", "top", "comments", "hot")
+TIME_FILTERS = ("all", "year", "month", "week", "day", "hour")
+
+# 无关键词时使用的社区列表；带时间范围的列表按每个范围各取一次
+PLAIN_LISTINGS = ("new", "hot", "rising")
+TIMED_LISTINGS = ("top", "controversial")
+
+# 每个 (社区, 关键词) 同时抓取的分区数
+PARTITION_WORKERS = 4
+
+
+class Partition:
+    """
+    一个子查询及其抓取结果
+    """
+    def __init__(self, subreddit, keyword, sort, time_filter=None):
+        """
+        @param {str} subreddit - 社区名称
+        @param {str} keyword - 关键词（无关键词时为空）
+        @param {str} sort - 排序方式（搜索）或列表名称（无关键词）
+        @param {str} time_filter - 时间范围，None表示不限
+        """
+        self.subreddit = subreddit
+        self.keyword = keyword
+        self.sort = sort
+        self.time_filter = time_filter
+        self.fetched = 0
+        self.added = 0
+        self.failed = False
+        self.complete = False  # 已取完列表（没有因失败、取消或达到数量而中途停止）
+
+    def listing(self, reddit):
+        """
+        创建该分区的列表生成器（不发送请求）
+
+        @param {praw.Reddit} reddit - Reddit API客户端
+        @return {praw.models.listing.generator.ListingGenerator}
+        """
+        subreddit = reddit.subreddit(self.subreddit)
+        if self.keyword:
+            return subreddit.search(self.keyword, sort=self.sort, time_filter=self.time_filter or "all", limit=None)
+        method = getattr(subreddit, self.sort)
+        if self.time_filter:
+            return method(time_filter=self.time_filter, limit=None)
+        return method(limit=None)
+
+    @property
+    def truncated(self):
+        """
+        取回数达到查询上限，可能还有未取到的帖子
+        """
+        return self.fetched >= LISTING_CAP
+
+    def describe(self):
+        """
+        @return {str} - 分区和抓取结果描述
+        """
+        name = f"{self.sort}/{self.time_filter}" if self.time_filter else self.sort
+        if self.failed:
+            state = "失败"
+        elif self.truncated:
+            state = "达到上限"
+        elif self.complete:
+            state = "完整"
+        elif self.fetched:
+            state = "已停止"
+        else:
+            state = "未运行"
+        return f"{name}: 取回 {self.fetched}，新增 {self.added}（{state}）"
+
+
+def plan_partitions(subreddit, keyword):
+    """
+    生成一个 (社区, 关键词) 请求的所有分区
+
+    @param {str} subreddit - 社区名称
+    @param {str} keyword - 关键词（无关键词时为空）
+    @return {list} - Partition 列表
+    """
+    if keyword:
+        return [Partition(subreddit, keyword, sort, time_filter) for sort in SEARCH_SORTS for time_filter in TIME_FILTERS]
+    partitions = [Partition(subreddit, keyword, name) for name in PLAIN_LISTINGS]
+    partitions.extend(Partition(subreddit, keyword, name, time_filter) for name in TIMED_LISTINGS for time_filter in TIME_FILTERS)
+    return partitions
+
+
+def format_coverage_report(partitions):
+    """
+    一个 (社区, 关键词) 请求的覆盖报告
+
+    @param {list} partitions - 已抓取的 Partition 列表
+    @return {str}
+    """
+    if not partitions:
+        return "没有深度采集的分区"
+    first = partitions[0]
+    fetched = sum(p.fetched for p in partitions)
+    added = sum(p.added for p in partitions)
+    truncated = sum(1 for p in partitions if p.truncated)
+    failed = sum(1 for p in partitions if p.failed)
+    lines = [
+        f"r/{first.subreddit} 关键词={first.keyword or '无'}: {len(partitions)} 个分区，取回 {fetched}，"
+        f"去重后新增 {added}，{truncated} 个分区达到上限，{failed} 个分区失败"
+    ]
+    lines.extend(f"  - {p.describe()}" for p in partitions)
+    return "\n".join(lines)
+
+
+class Quota:
+    """
+    多个分区共享的采集数量上限
+    """
+    def __init__(self, limit):
+        """
+        @param {int} limit - 最多新增的帖子数
+        """
+        self.limit = limit
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def take(self):
+        """
+        占用一个名额
+
+        @return {bool} - 是否还在上限以内
+        """
+        with self.lock:
+            if self.count >= self.limit:
+                return False
+            self.count += 1
+            return True
+
+    @property
+    def exhausted(self):
+        return self.count >= self.limit
@@ -0,0 +1,204 @@
+"""
+采集结果的列式导出
+
+把结构化帖子记录写成按社区和采集日期分区的Parquet数据集（Hive目录格式）:
+
+    <目录>/subreddit=<社区>/collect_date=<YYYY-MM-DD>/part-<批次>.parquet
+
+记录按行组流式写入，每个分区只缓存一个行组，不需要构造完整的DataFrame。
+"""
+import datetime
+import glob
+import os
+import urllib.parse
+
+import spier_blobstore
+
+# 每个行组的最大行数
+ROW_GROUP_SIZE = 50000
+
+# 分区列，只出现在目录名中，不写入文件
+PARTITION_COLUMNS = ("subreddit", "collect_date")
+
+
+# 自定义词典得分列的前缀
+LEXICON_PREFIX = "lexicon_"
+
+
+def file_schema(lexicon_names=()):
+    """
+    Parquet文件的列类型定义
+
+    @param {iterable} lexicon_names - 自定义词典名称，每个词典一列得分
+    @return {pyarrow.Schema} - 文件列结构（不含分区列）
+    """
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.string()),
+        ("title", pa.string()),
+        ("keyword", pa.string()),
+        ("author", pa.string()),
+        ("score", pa.int64()),
+        ("num_comments", pa.int64()),
+        ("created_utc", pa.timestamp("s", tz="UTC")),
+        ("selftext", pa.string()),
+        ("url", pa.string()),
+        ("collected_at", pa.timestamp("ms", tz="UTC")),
+        ("cluster_id", pa.int64()),
+        ("sentiment", pa.float64()),
+    ] + [(f"{LEXICON_PREFIX}{name}", pa.float64()) for name in lexicon_names])
+
+
+def _column_value(record, name, body_store=None):
+    """
+    取出记录中的列值并转换为写入类型
+
+    @param {dict} record - 帖子记录
+    @param {str} name - 列名
+    @param {spier_blobstore.BlobStore} body_store - 完整正文存储
+    @return {object} - 列值
+    """
+    if name == "selftext":
+        return spier_blobstore.record_body(record, body_store)
+    if name.startswith(LEXICON_PREFIX):
+        return (record.get("lexicon_scores") or {}).get(name[len(LEXICON_PREFIX):])
+    value = record.get(name)
+    if value is None:
+        return None
+    if name == "created_utc":
+        return int(value)
+    if name == "collected_at":
+        return int(value * 1000)
+    return value
+
+
+def _collect_date(record):
+    """
+    记录的采集日期（本地时间）
+
+    @param {dict} record - 帖子记录
+    @return {str} - YYYY-MM-DD
+    """
+    return datetime.datetime.fromtimestamp(record["collected_at"]).strftime("%Y-%m-%d")
+
+
+def partition_dir(out_dir, subreddit, collect_date):
+    """
+    分区目录路径
+
+    @param {str} out_dir - 数据集根目录
+    @param {str} subreddit - 社区名称
+    @param {str} collect_date - 采集日期
+    @return {str} - 分区目录
+    """
+    return os.path.join(
+        out_dir,
+        f"subreddit={urllib.parse.quote(subreddit, safe='')}",
+        f"collect_date={collect_date}"
+    )
+
+
+def dataset_files(out_dir):
+    """
+    目录中属于本数据集布局的Parquet文件（subreddit=*/collect_date=*/part-*.parquet）
+
+    @param {str} out_dir - 数据集根目录
+    @return {list} - 文件路径列表
+    """
+    pattern = os.path.join(glob.escape(out_dir), "subreddit=*", "collect_date=*", "part-*.parquet")
+    return sorted(glob.glob(pattern))
+
+
+def has_parquet_files(out_dir):
+    """
+    判断目录中是否已有本数据集的Parquet文件
+
+    @param {str} out_dir - 数据集根目录
+    @return {bool}
+    """
+    return bool(dataset_files(out_dir))
+
+
+def remove_parquet_files(out_dir):
+    """
+    删除本数据集已有的Parquet文件和随之变空的分区目录，目录中的其他文件保持不变
+
+    @param {str} out_dir - 数据集根目录
+    """
+    for path in dataset_files(out_dir):
+        os.remove(path)
+        partition = os.path.dirname(path)
+        for directory in (partition, os.path.dirname(partition)):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                break  # 目录中还有其他文件
+
+
+def export_parquet(records, out_dir, append=True, row_group_size=ROW_GROUP_SIZE, compression="zstd", lexicon_names=(),
+                   body_store=None):
+    """
+    把帖子记录流式写入分区Parquet数据集
+
+    每次导出在每个分区中新建一个文件，追加模式下已有文件保持不变，
+    覆盖模式下先删除本数据集已有的Parquet文件（不属于数据集布局的文件不受影响）。
+
+    @param {iterable} records - 帖子记录（字典）序列
+    @param {str} out_dir - 数据集根目录
+    @param {bool} append - 是否追加到已有数据
+    @param {int} row_group_size - 每个行组的最大行数
+    @param {str} compression - 压缩算法
+    @param {iterable} lexicon_names - 自定义词典名称
+    @param {spier_blobstore.BlobStore} body_store - 完整正文存储，导出时逐条读取
+    @return {list} - 本次写入的文件路径列表
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = file_schema(lexicon_names)
+    names = schema.names
+
+    os.makedirs(out_dir, exist_ok=True)
+    if not append:
+        remove_parquet_files(out_dir)
+
+    # 同一批次的文件名相同，多次追加导出不会互相覆盖
+    batch = f"{datetime.datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{os.getpid()}"
+    buffers = {}  # (社区, 采集日期) -> {列名: 值列表}
+    writers = {}  # (社区, 采集日期) -> ParquetWriter
+    paths = []
+
+    def flush(key):
+        columns = buffers.pop(key)
+        table = pa.Table.from_arrays(
+            [pa.array(columns[name], type=schema.field(name).type) for name in names],
+            schema=schema
+        )
+        writer = writers.get(key)
+        if writer is None:
+            directory = partition_dir(out_dir, *key)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"part-{batch}.parquet")
+            writer = writers[key] = pq.ParquetWriter(path, schema, compression=compression)
+            paths.append(path)
+        writer.write_table(table, row_group_size=row_group_size)
+
+    try:
+        for record in records:
+            key = (record["subreddit"], _collect_date(record))
+            columns = buffers.get(key)
+            if columns is None:
+                columns = buffers[key] = {name: [] for name in names}
+            for name in names:
+                columns[name].append(_column_value(record, name, body_store))
+            if len(columns["id"]) >= row_group_size:
+                flush(key)
+
+        for key in list(buffers):
+            flush(key)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    return paths
@@ -0,0 +1,130 @@
+"""
+可重试的列表抓取
+
+- 429、5xx、超时和连接错误视为临时错误，按指数退避（带随机抖动、有上限）重试
+- praw 的 ListingGenerator 在请求失败时不会前移 after 游标，
+  重试时从最后一次成功的分页继续，不会丢失或重复已取得的帖子
+- 每次运行有总的重试预算，用完后不再重试
+- 最终失败的 (社区, 关键词, 页) 单元记录到失败报告中
+"""
+import random
+import threading
+
+# 单页最多连续重试次数
+MAX_ATTEMPTS = 5
+
+# 退避延迟（秒）: 第n次重试在 [0, min(MAX_DELAY, BASE_DELAY * 2^n)] 中随机
+BASE_DELAY = 1.0
+MAX_DELAY = 60.0
+
+# 服务器给出 Retry-After 时最多等待的秒数
+MAX_RETRY_AFTER = 300.0
+
+# 每次运行默认的重试预算
+DEFAULT_RETRY_BUDGET = 20
+
+TRANSIENT_STATUS = frozenset([408, 429, 500, 502, 503, 504, 520, 521, 522, 524])
+
+_random = random.Random()
+
+
+def is_transient(error):
+    """
+    判断是否为可重试的临时错误
+
+    @param {Exception} error - 请求异常
+    @return {bool}
+    """
+    try:
+        from prawcore import exceptions as prawcore_exceptions
+    except ImportError:
+        prawcore_exceptions = None
+
+    if prawcore_exceptions is not None:
+        if isinstance(error, (prawcore_exceptions.ServerError, prawcore_exceptions.TooManyRequests,
+                              prawcore_exceptions.RequestException)):
+            return True
+        if isinstance(error, prawcore_exceptions.ResponseException):
+            return error.response.status_code in TRANSIENT_STATUS
+    return isinstance(error, (TimeoutError, ConnectionError))
+
+
+def retry_delay(attempt, error=None):
+    """
+    第 attempt 次重试前的等待时间（full jitter）
+
+    @param {int} attempt - 已重试次数（从0开始）
+    @param {Exception} error - 请求异常，带 Retry-After 响应头时以其为下限
+    @return {float} - 秒
+    """
+    delay = _random.uniform(0, min(MAX_DELAY, BASE_DELAY * (2 ** attempt)))
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        retry_after = float(headers.get("retry-after", 0))
+    except (TypeError, ValueError):
+        retry_after = 0
+    return max(delay, min(retry_after, MAX_RETRY_AFTER))
+
+
+class RetryBudget:
+    """
+    一次运行中所有请求共享的重试次数
+    """
+    def __init__(self, total=DEFAULT_RETRY_BUDGET):
+        """
+        @param {int} total - 重试次数上限
+        """
+        self.total = total
+        self.used = 0
+        self.lock = threading.Lock()
+
+    def consume(self):
+        """
+        使用一次重试机会
+
+        @return {bool} - 是否还有剩余预算
+        """
+        with self.lock:
+            if self.used >= self.total:
+                return False
+            self.used += 1
+            return True
+
+
+class FetchFailure:
+    """
+    最终失败的抓取单元
+    """
+    def __init__(self, subreddit, keyword, page, error):
+        """
+        @param {str} subreddit - 社区名称
+        @param {str} keyword - 关键词（无关键词时为空）
+        @param {int} page - 失败的页码（从1开始），0表示不是请求错误
+        @param {Exception} error - 最后一次的异常，或已格式化的错误文本
+        """
+        self.subreddit = subreddit
+        self.keyword = keyword
+        self.page = page
+        self.error = error if isinstance(error, str) else f"{type(error).__name__}: {error}"
+
+    def describe(self):
+        """
+        @return {str} - 单元描述
+        """
+        where = f"第{self.page}页" if self.page else "处理帖子"
+        return f"r/{self.subreddit} 关键词={self.keyword or '无'} {where}: {self.error}"
+
+
+def format_failure_report(failures):
+    """
+    失败报告文本
+
+    @param {list} failures - FetchFailure 列表
+    @return {str}
+    """
+    if not failures:
+        return "所有抓取单元均已成功完成"
+    lines = [f"{len(failures)} 个抓取单元失败:"]
+    lines.extend(f"  - {failure.describe()}" for failure in failures)
+    return "\n".join(lines)
@@ -0,0 +1,715 @@
+"""
+采集任务队列和调度
+
+每次采集（社区、关键词、数量、排序）是一个带ID、优先级和状态的任务。
+多个任务由工作线程并发执行，所有任务共享同一个API请求速率预算，
+等待预算时优先级高的任务先获得请求机会。任务可以单独取消，也可以设置为定期重复运行。
+"""
+import concurrent.futures
+import heapq
+import itertools
+import threading
+import time
+
+import spier_blobstore
+import spier_deep
+import spier_fetch
+import spier_media
+
+# 任务优先级（数值越小越优先）
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+PRIORITY_NAMES = {PRIORITY_HIGH: "高", PRIORITY_NORMAL: "普通", PRIORITY_LOW: "低"}
+
+# 任务状态
+STATUS_QUEUED = "排队中"
+STATUS_RUNNING = "运行中"
+STATUS_WAITING = "等待下次运行"
+STATUS_DONE = "已完成"
+STATUS_PARTIAL = "部分失败"
+STATUS_CANCELLED = "已取消"
+STATUS_FAILED = "出错"
+
+# 共享的API请求预算（每秒请求数）和突发上限
+REQUESTS_PER_SECOND = 1.0
+REQUEST_BURST = 5
+
+# 每次列表请求返回的最大帖子数
+PAGE_SIZE = 100
+
+# 同时运行的任务数
+MAX_WORKERS = 3
+
+# 只运行高优先级任务的预留工作线程数，交互式任务不必排在长时间的回填任务之后
+RESERVED_HIGH_PRIORITY_WORKERS = 1
+
+# 帖子内容的最大保留长度
+SELFTEXT_MAX_LENGTH = 200
+
+# 共享单元缓存中采集结果的有效期（秒）
+UNIT_CACHE_TTL = 300
+
+
+class RateLimiter:
+    """
+    令牌桶速率限制器 - 多个等待者时优先级高的先获得令牌
+    """
+    def __init__(self, rate=REQUESTS_PER_SECOND, burst=REQUEST_BURST):
+        """
+        @param {float} rate - 每秒产生的令牌数
+        @param {int} burst - 令牌桶容量
+        """
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.condition = threading.Condition()
+        self.waiters = []  # 堆: (优先级, 序号)
+        self._sequence = itertools.count()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority=PRIORITY_NORMAL, cancel_event=None):
+        """
+        获取一个请求令牌，必要时等待
+
+        @param {int} priority - 优先级
+        @param {threading.Event} cancel_event - 取消事件，被设置时放弃等待
+        @return {bool} - 是否获得令牌（取消时返回False）
+        """
+        with self.condition:
+            entry = (priority, next(self._sequence))
+            heapq.heappush(self.waiters, entry)
+            try:
+                while True:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return False
+                    self._refill()
+                    if self.waiters[0] == entry and self.tokens >= 1:
+                        self.tokens -= 1
+                        return True
+                    wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.05
+                    self.condition.wait(timeout=min(max(wait, 0.01), 0.5))
+            finally:
+                self.waiters.remove(entry)
+                heapq.heapify(self.waiters)
+                self.condition.notify_all()
+
+
+class ScrapeJob:
+    """
+    一个采集任务
+    """
+    _ids = itertools.count(1)
+
+    def __init__(self, subreddits, keywords, limit, sort_by, priority=PRIORITY_NORMAL, interval=None,
+                 retry_budget=spier_fetch.DEFAULT_RETRY_BUDGET, deep=False):
+        """
+        @param {list} subreddits - Subreddit名称列表
+        @param {list} keywords - 关键词列表
+        @param {int} limit - 每个社区/关键词的采集数量
+        @param {str} sort_by - 排序方式
+        @param {int} priority - 优先级
+        @param {float} interval - 重复运行的间隔（秒），None表示只运行一次
+        @param {int} retry_budget - 每次运行允许的重试总次数
+        @param {bool} deep - 深度采集，把每个社区/关键词拆分成多个排序和时间范围的子查询
+        """
+        self.id = next(self._ids)
+        self.subreddits = list(subreddits)
+        self.keywords = list(keywords)
+        self.limit = limit
+        self.sort_by = sort_by
+        self.priority = priority
+        self.interval = interval
+        self.retry_budget = retry_budget
+        self.deep = deep
+        self.status = STATUS_QUEUED
+        self.collected = 0
+        self.runs = 0
+        self.next_run = None
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.timer = None
+        # 已采集的 (社区, 关键词, 帖子ID)，重复运行时只添加新帖子
+        self.seen_ids = set()
+        # 深度采集时多个分区线程同时更新去重集合和计数
+        self.lock = threading.Lock()
+        # 最近一次运行的重试预算和失败单元
+        self.retries = spier_fetch.RetryBudget(retry_budget)
+        self.failures = []
+        # 最近一次深度采集的分区结果，每个 (社区, 关键词) 一个分区列表
+        self.coverage = []
+        # 任务自己的正文存储，None表示使用任务管理器的存储
+        self.body_store = None
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    @property
+    def active(self):
+        """
+        任务是否仍在排队、运行或等待下次运行
+        """
+        return self.status in (STATUS_QUEUED, STATUS_RUNNING, STATUS_WAITING)
+
+    def describe(self):
+        """
+        任务参数的简短描述
+
+        @return {str}
+        """
+        keywords = ", ".join(self.keywords) if self.keywords else "无"
+        mode = "深度" if self.deep else self.sort_by
+        return f"#{self.id} Subreddits={', '.join(self.subreddits)}, 关键词={keywords}, 数量={self.limit}, 排序={mode}"
+
+
+def truncate_selftext(text):
+    """
+    表格中显示的截断内容
+
+    @param {str} text - 帖子内容
+    @return {str}
+    """
+    if len(text) > SELFTEXT_MAX_LENGTH:
+        return text[:SELFTEXT_MAX_LENGTH - 3] + "..."
+    return text
+
+
+def detach_body(record, body_store):
+    """
+    不引用正文存储的记录副本，selftext 为完整正文
+
+    @param {dict} record - 帖子记录
+    @param {spier_blobstore.BlobStore} body_store - 记录所引用的正文存储
+    @return {dict}
+    """
+    return dict(record, selftext=spier_blobstore.record_body(record, body_store), body_ref=None)
+
+
+def attach_body(record, body_store):
+    """
+    detach_body 的逆操作: 完整正文写入正文存储，记录中保留截断的内容
+
+    @param {dict} record - selftext 为完整正文的帖子记录
+    @param {spier_blobstore.BlobStore} body_store - 正文存储
+    @return {dict}
+    """
+    body = record.get("selftext") or ""
+    body_ref = body_store.append(body) if body_store is not None else None
+    return dict(record, selftext=truncate_selftext(body), body_ref=body_ref)
+
+
+def post_to_record(post, subreddit_name, keyword, body_store=None):
+    """
+    把praw帖子对象转换为带原始类型的帖子记录
+
+    @param {praw.models.Submission} post - 帖子
+    @param {str} subreddit_name - Subreddit名称
+    @param {str} keyword - 搜索关键词
+    @param {spier_blobstore.BlobStore} body_store - 完整正文存储，记录中只保存引用
+    @return {dict} - 帖子记录
+    """
+    # 表格中显示截断的内容，完整内容写入正文存储
+    body_ref = body_store.append(post.selftext) if body_store is not None else None
+
+    return {
+        "id": post.id,
+        "subreddit": subreddit_name,
+        "title": post.title,
+        "keyword": keyword,
+        "author": post.author.name if post.author else "[已删除]",
+        "score": int(post.score),
+        "num_comments": int(post.num_comments),
+        "created_utc": float(post.created_utc),
+        "selftext": truncate_selftext(post.selftext),
+        "body_ref": body_ref,
+        "url": f"https://www.reddit.com{post.permalink}",
+        "thumbnail_url": spier_media.preview_url(post),
+        "collected_at": time.time()
+    }
+
+
+class UnitCache:
+    """
+    (社区, 关键词, 排序) 单元的采集结果缓存 - 多个任务请求同一单元时只抓取一次，
+    正在抓取的单元由其他任务等待其完成后直接复用结果
+    """
+    def __init__(self, ttl=UNIT_CACHE_TTL):
+        """
+        @param {float} ttl - 结果有效期（秒）
+        """
+        self.ttl = ttl
+        self.condition = threading.Condition()
+        self.entries = {}  # 键 -> (完成时间, 数量上限, 记录列表)
+        self.inflight = {}  # 键 -> 正在抓取的数量上限
+
+    def claim(self, key, limit, cancel_event=None):
+        """
+        查找可复用的结果；没有时登记为该单元的抓取者，抓取完成后需调用 finish
+
+        @param {tuple} key - 单元键
+        @param {int} limit - 需要的帖子数
+        @param {threading.Event} cancel_event - 取消事件，等待其他任务时检查
+        @return {tuple} - (缓存的记录列表或None, 是否由调用方抓取)
+        """
+        with self.condition:
+            while True:
+                entry = self.entries.get(key)
+                if entry is not None and time.time() - entry[0] < self.ttl and entry[1] >= limit:
+                    return entry[2][:limit], False
+                inflight = self.inflight.get(key)
+                if inflight is None or inflight < limit:
+                    self.inflight[key] = limit
+                    return None, True
+                if cancel_event is not None and cancel_event.is_set():
+                    return None, False
+                self.condition.wait(timeout=1)
+
+    def finish(self, key, limit, records, ok):
+        """
+        抓取结束，保存完整的结果并唤醒等待的任务
+
+        @param {tuple} key - 单元键
+        @param {int} limit - 抓取时的数量上限
+        @param {list} records - 抓取到的记录（见 detach_body）
+        @param {bool} ok - 是否完整抓取（未失败、未取消）
+        """
+        with self.condition:
+            if self.inflight.get(key) == limit:
+                del self.inflight[key]
+            now = time.time()
+            # 过期的结果不再使用，同时清理掉，缓存大小不随请求过的单元数增长
+            for expired in [k for k, entry in self.entries.items() if now - entry[0] >= self.ttl]:
+                del self.entries[expired]
+            entry = self.entries.get(key)
+            if ok and (entry is None or entry[1] <= limit):
+                self.entries[key] = (now, limit, records)
+            self.condition.notify_all()
+
+
+class JobManager:
+    """
+    采集任务管理器 - 优先级队列 + 固定数量的工作线程
+    """
+    def __init__(self, get_reddit, on_record, on_log, on_change=None, max_workers=MAX_WORKERS, rate_limiter=None,
+                 body_store=None, unit_cache=None, reserved_workers=RESERVED_HIGH_PRIORITY_WORKERS, clone_reddit=None):
+        """
+        回调函数在工作线程中调用，界面代码需要自行切换到主线程。
+
+        @param {callable} get_reddit - 返回当前Reddit API客户端
+        @param {callable} clone_reddit - clone_reddit(reddit)，为每个工作线程和分区线程创建独立的客户端；
+                                         None表示所有线程共用 get_reddit 返回的客户端（只适用于线程安全的客户端）
+        @param {callable} on_record - on_record(job, record)，采集到一条帖子
+        @param {callable} on_log - on_log(message)，日志消息
+        @param {callable} on_change - on_change(job)，任务状态或进度变化（每次运行开始抓取之前也会调用）
+        @param {int} max_workers - 同时运行的任务数
+        @param {int} reserved_workers - 另外预留给高优先级任务的工作线程数
+        @param {RateLimiter} rate_limiter - 共享的请求速率限制器
+        @param {spier_blobstore.BlobStore} body_store - 完整正文存储
+        @param {UnitCache} unit_cache - 共享单元缓存，None表示每个任务各自抓取
+        """
+        self.get_reddit = get_reddit
+        self.clone_reddit = clone_reddit
+        self.local = threading.local()  # 每个线程的客户端
+        self.on_record = on_record
+        self.on_log = on_log
+        self.on_change = on_change or (lambda job: None)
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.body_store = body_store
+        self.unit_cache = unit_cache
+        self.condition = threading.Condition()
+        self.queue = []  # 堆: (优先级, 序号, 任务)
+        self.all_jobs = {}
+        self._sequence = itertools.count()
+        self._shutdown = False
+        self.workers = [
+            threading.Thread(target=self._worker, name=f"scrape-worker-{i}", daemon=True)
+            for i in range(max_workers)
+        ] + [
+            threading.Thread(target=self._worker, args=(True,), name=f"scrape-worker-high-{i}", daemon=True)
+            for i in range(reserved_workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, job):
+        """
+        提交任务到队列
+
+        @param {ScrapeJob} job - 采集任务
+        @return {ScrapeJob}
+        """
+        with self.condition:
+            self.all_jobs[job.id] = job
+            self._enqueue(job)
+        return job
+
+    def _enqueue(self, job):
+        # 调用时需持有 self.condition
+        job.status = STATUS_QUEUED
+        job.next_run = None
+        heapq.heappush(self.queue, (job.priority, next(self._sequence), job))
+        # 预留线程只处理高优先级任务，需要唤醒所有线程
+        self.condition.notify_all()
+        self.on_change(job)
+
+    def _requeue(self, job):
+        """
+        重复任务到时间后重新入队
+        """
+        with self.condition:
+            if not job.cancelled and not self._shutdown:
+                self._enqueue(job)
+
+    def cancel(self, job_id):
+        """
+        取消任务（排队中的任务不再运行，运行中的任务尽快停止）
+
+        @param {int} job_id - 任务ID
+        @return {bool} - 任务是否存在且仍处于活动状态
+        """
+        with self.condition:
+            job = self.all_jobs.get(job_id)
+            if job is None or not job.active:
+                return False
+            job.cancel_event.set()
+            if job.timer is not None:
+                job.timer.cancel()
+            if job.status != STATUS_RUNNING:
+                job.status = STATUS_CANCELLED
+                job.next_run = None
+                self.on_change(job)
+            return True
+
+    def cancel_all(self):
+        """
+        取消所有活动任务
+
+        @return {int} - 取消的任务数
+        """
+        return sum(1 for job_id in list(self.all_jobs) if self.cancel(job_id))
+
+    def remove(self, job_id):
+        """
+        移除已结束的任务
+
+        @param {int} job_id - 任务ID
+        @return {bool} - 是否移除了任务（不存在或仍在活动的任务不移除）
+        """
+        with self.condition:
+            job = self.all_jobs.get(job_id)
+            if job is None or job.active:
+                return False
+            del self.all_jobs[job_id]
+            return True
+
+    def jobs(self):
+        """
+        所有任务（按ID排序）
+
+        @return {list}
+        """
+        with self.condition:
+            return [self.all_jobs[job_id] for job_id in sorted(self.all_jobs)]
+
+    def has_active_jobs(self):
+        """
+        是否有排队、运行或等待重复运行的任务
+
+        @return {bool}
+        """
+        with self.condition:
+            return any(job.active for job in self.all_jobs.values())
+
+    def shutdown(self):
+        """
+        停止所有任务和工作线程
+        """
+        self.cancel_all()
+        with self.condition:
+            self._shutdown = True
+            self.condition.notify_all()
+
+    def _worker(self, reserved=False):
+        """
+        工作线程 - 依次取出优先级最高的任务执行，任务出错不影响线程继续运行
+
+        @param {bool} reserved - 是否为只运行高优先级任务的预留线程
+        """
+        while True:
+            with self.condition:
+                while not self._shutdown and (not self.queue or (reserved and self.queue[0][0] != PRIORITY_HIGH)):
+                    self.condition.wait()
+                if self._shutdown:
+                    return
+                _, _, job = heapq.heappop(self.queue)
+                if job.cancelled:
+                    continue
+                job.status = STATUS_RUNNING
+                job.runs += 1
+            try:
+                self.on_change(job)
+                self._run_job(job)
+            except Exception as e:
+                job.error = str(e)
+                job.status = STATUS_FAILED
+                self.on_log(f"[任务#{job.id}] 采集数据时出错: {str(e)}")
+                try:
+                    self.on_change(job)
+                except Exception:
+                    pass
+
+    def _thread_reddit(self, reddit):
+        """
+        当前线程使用的客户端 - 第一次使用或重新连接后从 reddit 创建
+
+        @param {praw.Reddit} reddit - 当前的Reddit API客户端
+        @return {praw.Reddit} - 当前线程独占的客户端，未连接时返回None
+        """
+        if reddit is None or self.clone_reddit is None:
+            return reddit
+        if getattr(self.local, "source", None) is not reddit:
+            self.local.reddit = self.clone_reddit(reddit)
+            self.local.source = reddit
+        return self.local.reddit
+
+    def _run_job(self, job):
+        """
+        执行一次采集任务 - 每个 (社区, 关键词) 单元单独处理，一个单元失败不影响其他单元
+
+        @param {ScrapeJob} job - 采集任务
+        """
+        self.on_log(f"开始任务 {job.describe()}")
+        collected_before = job.collected
+        job.retries = spier_fetch.RetryBudget(job.retry_budget)
+        job.failures = []
+        job.coverage = []
+
+        reddit = self._thread_reddit(self.get_reddit())
+        if reddit is None:
+            job.error = "未连接Reddit API"
+            job.status = STATUS_FAILED
+            self.on_log(f"[任务#{job.id}] 采集数据时出错: {job.error}")
+            self.on_change(job)
+            return
+
+        for subreddit_name in job.subreddits:
+            if job.cancelled:
+                break
+
+            self.on_log(f"[任务#{job.id}] 正在采集 r/{subreddit_name}...")
+
+            # 如果有关键词，则对每个关键词进行搜索；没有关键词则直接获取帖子
+            for keyword in job.keywords or [""]:
+                if job.cancelled:
+                    break
+                if keyword:
+                    self.on_log(f"[任务#{job.id}] 搜索关键词: {keyword}")
+                self._fetch_unit(job, reddit, subreddit_name, keyword)
+
+        count = job.collected - collected_before
+        with self.condition:
+            if job.cancelled:
+                job.status = STATUS_CANCELLED
+                self.on_log(f"[任务#{job.id}] 采集已停止，本次获取 {count} 个帖子")
+            else:
+                if job.interval and not self._shutdown:
+                    job.status = STATUS_WAITING
+                    job.next_run = time.time() + job.interval
+                    job.timer = threading.Timer(job.interval, self._requeue, args=(job,))
+                    job.timer.daemon = True
+                    job.timer.start()
+                    self.on_log(f"[任务#{job.id}] 本次采集完成，获取 {count} 个新帖子，{int(job.interval // 60)} 分钟后再次运行")
+                else:
+                    job.status = STATUS_PARTIAL if job.failures else STATUS_DONE
+                    self.on_log(f"[任务#{job.id}] 采集完成，共获取 {count} 个帖子")
+                if job.failures:
+                    self.on_log(f"[任务#{job.id}] {spier_fetch.format_failure_report(job.failures)}")
+        self.on_change(job)
+
+    def _body_store(self, job):
+        """
+        任务的记录写入的正文存储
+
+        @param {ScrapeJob} job - 采集任务
+        @return {spier_blobstore.BlobStore}
+        """
+        return job.body_store if job.body_store is not None else self.body_store
+
+    def _fetch_unit(self, job, reddit, subreddit_name, keyword):
+        """
+        抓取一个 (社区, 关键词) 单元 - 有共享单元缓存时，只运行一次的任务优先复用其他任务的结果
+
+        @param {ScrapeJob} job - 采集任务
+        @param {praw.Reddit} reddit - Reddit API客户端
+        @param {str} subreddit_name - Subreddit名称
+        @param {str} keyword - 搜索关键词，空字符串表示按排序直接获取
+        """
+        # 重复运行的任务每次都要取最新的帖子，不复用缓存（缓存有效期可能比重复间隔还长）
+        if self.unit_cache is None or job.interval:
+            self._fetch_unit_posts(job, reddit, subreddit_name, keyword)
+            return
+
+        key = (subreddit_name.lower(), keyword.lower(), "deep" if job.deep else job.sort_by)
+        records, owner = self.unit_cache.claim(key, job.limit, job.cancel_event)
+        if records is not None:
+            self.on_log(f"[任务#{job.id}] r/{subreddit_name} 关键词 '{keyword or '无'}' 复用其他任务的采集结果（{len(records)} 个帖子）")
+            for record in records:
+                with job.lock:
+                    seen_key = (subreddit_name, keyword, record["id"])
+                    if seen_key in job.seen_ids:
+                        continue
+                    job.seen_ids.add(seen_key)
+                    job.collected += 1
+                self.on_record(job, attach_body(record, self._body_store(job)))
+            return
+        if not owner:
+            return  # 等待时任务被取消
+
+        sink = []
+        failures_before = len(job.failures)
+        try:
+            self._fetch_unit_posts(job, reddit, subreddit_name, keyword, sink)
+        finally:
+            ok = not job.cancelled and len(job.failures) == failures_before
+            # 各任务的正文可能写入不同的存储，缓存中保存完整正文
+            body_store = self._body_store(job)
+            self.unit_cache.finish(key, job.limit, [detach_body(record, body_store) for record in sink] if ok else [], ok)
+
+    def _fetch_unit_posts(self, job, reddit, subreddit_name, keyword, sink=None):
+        """
+        从Reddit抓取一个 (社区, 关键词) 单元，异常记录到失败报告
+
+        @param {ScrapeJob} job - 采集任务
+        @param {praw.Reddit} reddit - Reddit API客户端
+        @param {str} subreddit_name - Subreddit名称
+        @param {str} keyword - 搜索关键词，空字符串表示按排序直接获取
+        @param {list} sink - 收集本单元产生的记录，None表示不收集
+        """
+        if job.deep:
+            self._fetch_deep_unit(job, reddit, subreddit_name, keyword, sink)
+            return
+
+        # 创建列表对象不发送请求，实际请求在迭代时发生
+        subreddit = reddit.subreddit(subreddit_name)
+        if keyword:
+            posts = subreddit.search(keyword, sort=job.sort_by, limit=job.limit)
+        elif job.sort_by == "new":
+            posts = subreddit.new(limit=job.limit)
+        else:
+            posts = subreddit.hot(limit=job.limit)  # 默认为热门
+        self._fetch_listing(job, posts, subreddit_name, keyword, sink=sink)
+
+    def _fetch_deep_unit(self, job, reddit, subreddit_name, keyword, sink=None):
+        """
+        深度采集一个 (社区, 关键词) 单元 - 各分区并发抓取，按帖子ID去重，直到达到采集数量
+
+        @param {ScrapeJob} job - 采集任务
+        @param {praw.Reddit} reddit - Reddit API客户端
+        @param {str} subreddit_name - Subreddit名称
+        @param {str} keyword - 搜索关键词
+        @param {list} sink - 收集本单元产生的记录，None表示不收集
+        """
+        partitions = spier_deep.plan_partitions(subreddit_name, keyword)
+        quota = spier_deep.Quota(job.limit)
+        self.on_log(f"[任务#{job.id}] 深度采集 r/{subreddit_name}: 拆分为 {len(partitions)} 个子查询")
+
+        def fetch(partition):
+            if job.cancelled or quota.exhausted:
+                return
+            posts = partition.listing(self._thread_reddit(reddit))
+            self._fetch_listing(job, posts, subreddit_name, keyword, partition, quota, sink)
+
+        # 请求仍然经过共享的速率限制器，并发只用于重叠等待；每个分区线程使用自己的客户端
+        with concurrent.futures.ThreadPoolExecutor(max_workers=spier_deep.PARTITION_WORKERS,
+                                                   thread_name_prefix=f"deep-{job.id}") as executor:
+            list(executor.map(fetch, partitions))
+
+        job.coverage.append(partitions)
+        self.on_log(f"[任务#{job.id}] {spier_deep.format_coverage_report(partitions)}")
+
+    def _fetch_listing(self, job, posts, subreddit_name, keyword, partition=None, quota=None, sink=None):
+        """
+        抓取一个列表，异常记录到失败报告
+
+        @param {ScrapeJob} job - 采集任务
+        @param {praw.models.listing.generator.ListingGenerator} posts - 帖子生成器
+        @param {str} subreddit_name - Subreddit名称
+        @param {str} keyword - 搜索关键词
+        @param {spier_deep.Partition} partition - 深度采集的分区，记录取回和新增数量
+        @param {spier_deep.Quota} quota - 深度采集各分区共享的数量上限
+        @param {list} sink - 收集产生的记录，None表示不收集
+        """
+        try:
+            self._process_posts(job, posts, subreddit_name, keyword, partition, quota, sink)
+        except Exception as e:
+            # 迭代之外的意外错误（例如解析帖子数据失败）
+            if partition is not None:
+                partition.failed = True
+            job.failures.append(spier_fetch.FetchFailure(subreddit_name, keyword, 0, e))
+            self.on_log(f"[任务#{job.id}] 处理 r/{subreddit_name} 关键词 '{keyword or '无'}' 时出错: {str(e)}")
+
+    def _process_posts(self, job, posts, subreddit_name, keyword, partition=None, quota=None, sink=None):
+        """
+        处理帖子数据 - 每次列表请求前从共享预算中获取令牌，临时错误退避后从失败的分页继续
+
+        @param {ScrapeJob} job - 采集任务
+        @param {praw.models.listing.generator.ListingGenerator} posts - 帖子生成器
+        @param {str} subreddit_name - Subreddit名称
+        @param {str} keyword - 搜索关键词
+        @param {spier_deep.Partition} partition - 深度采集的分区
+        @param {spier_deep.Quota} quota - 深度采集各分区共享的数量上限
+        @param {list} sink - 收集产生的记录，None表示不收集
+        """
+        iterator = iter(posts)
+        index = 0
+        attempt = 0
+        while not job.cancelled and not (quota is not None and quota.exhausted):
+            # 列表按页请求，每页第一条帖子（以及每次重试）会触发一次API请求
+            if (index % PAGE_SIZE == 0 or attempt) and not self.rate_limiter.acquire(job.priority, job.cancel_event):
+                break
+            try:
+                post = next(iterator)
+            except StopIteration:
+                if partition is not None:
+                    partition.complete = True
+                break
+            except Exception as e:
+                page = index // PAGE_SIZE + 1
+                if not spier_fetch.is_transient(e) or attempt >= spier_fetch.MAX_ATTEMPTS or not job.retries.consume():
+                    if partition is not None:
+                        partition.failed = True
+                    job.failures.append(spier_fetch.FetchFailure(subreddit_name, keyword, page, e))
+                    self.on_log(f"[任务#{job.id}] r/{subreddit_name} 关键词 '{keyword or '无'}' 第{page}页失败: {str(e)}")
+                    break
+                delay = spier_fetch.retry_delay(attempt, e)
+                attempt += 1
+                self.on_log(f"[任务#{job.id}] r/{subreddit_name} 第{page}页请求失败（{str(e)}），{delay:.1f} 秒后第{attempt}次重试")
+                if job.cancel_event.wait(delay):
+                    break
+                continue
+            attempt = 0
+            index += 1
+            if partition is not None:
+                partition.fetched += 1
+
+            seen_key = (subreddit_name, keyword, post.id)
+            with job.lock:
+                if seen_key in job.seen_ids:
+                    continue
+                if quota is not None and not quota.take():
+                    break
+                job.seen_ids.add(seen_key)
+                job.collected += 1
+            if partition is not None:
+                partition.added += 1
+
+            record = post_to_record(post, subreddit_name, keyword, self._body_store(job))
+            if sink is not None:
+                sink.append(record)
+            self.on_record(job, record)
@@ -0,0 +1,308 @@
+"""
+帖子预览图的后台加载和磁盘缓存
+
+图片由固定数量的后台线程下载，用Pillow缩小为缩略图后存入内容寻址的磁盘缓存:
+
+    <缓存目录>/<哈希前两位>/<内容哈希>.jpg
+    <缓存目录>/index.log      追加写入的 "URL<TAB>内容哈希" 索引
+
+缓存总大小超过上限时按最近访问时间淘汰最旧的文件。扫描缓存目录和记录访问时间都会读写磁盘，
+只在加载线程中进行；界面线程用 peek/contains 查询内存中的索引。
+"""
+import collections
+import hashlib
+import io
+import os
+import threading
+
+# 缩略图最大尺寸（像素）
+THUMBNAIL_SIZE = (320, 320)
+
+# 缓存大小上限（字节）
+CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+# 下载限制
+DOWNLOAD_TIMEOUT = 10
+DOWNLOAD_MAX_BYTES = 10 * 1024 * 1024
+
+# 后台下载线程数和等待队列长度
+LOADER_WORKERS = 4
+LOADER_MAX_PENDING = 64
+
+
+def preview_url(post):
+    """
+    帖子的预览图地址，只读取列表中已返回的字段，不触发额外请求
+
+    @param {praw.models.Submission} post - 帖子
+    @return {str} - 图片地址，没有预览图时返回空字符串
+    """
+    import html
+
+    attributes = vars(post)
+    try:
+        return html.unescape(attributes["preview"]["images"][0]["source"]["url"])
+    except (KeyError, IndexError, TypeError):
+        pass
+    thumbnail = attributes.get("thumbnail") or ""
+    return thumbnail if thumbnail.startswith("http") else ""
+
+
+def make_thumbnail(data, size=THUMBNAIL_SIZE):
+    """
+    把原始图片解码并缩小为JPEG缩略图
+
+    @param {bytes} data - 原始图片数据
+    @param {tuple} size - 最大尺寸
+    @return {bytes} - JPEG数据
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        # JPEG可以在解码时直接按比例缩小，减少解码开销
+        image.draft("RGB", size)
+        image.thumbnail(size)
+        output = io.BytesIO()
+        image.convert("RGB").save(output, format="JPEG", quality=85)
+    return output.getvalue()
+
+
+class MediaCache:
+    """
+    内容寻址、限制总大小、按最近访问淘汰的磁盘缓存
+    """
+    def __init__(self, directory, max_bytes=CACHE_MAX_BYTES):
+        """
+        @param {str} directory - 缓存目录
+        @param {int} max_bytes - 缓存大小上限
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(directory, "index.log")
+        self.lock = threading.Lock()
+        self.urls = {}  # URL -> 内容哈希
+        self.entries = collections.OrderedDict()  # 内容哈希 -> 文件大小，按最近访问排序
+        self.total_bytes = 0
+        # 扫描缓存目录可能较慢，由加载线程在第一次使用前调用 load
+        self.loaded = False
+        self.load_lock = threading.Lock()
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest[:2], f"{digest}.jpg")
+
+    def load(self):
+        """
+        扫描缓存文件并读取URL索引，只在第一次调用时执行
+        """
+        with self.load_lock:
+            if self.loaded:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            self._load()
+            self.loaded = True
+
+    def _load(self):
+        """
+        扫描缓存文件并读取URL索引（调用时需持有 load_lock）
+        """
+        files = []
+        for dir_path, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".jpg"):
+                    stat = os.stat(os.path.join(dir_path, name))
+                    files.append((stat.st_mtime, name[:-4], stat.st_size))
+        entries = collections.OrderedDict()
+        for _, digest, size in sorted(files):
+            entries[digest] = size
+
+        urls = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    url, _, digest = line.rstrip("\n").rpartition("\t")
+                    if url and digest in entries:
+                        urls[url] = digest
+
+        with self.lock:
+            self.entries = entries
+            self.total_bytes = sum(entries.values())
+            self.urls = urls
+            self._evict()
+
+    def peek(self, url):
+        """
+        查找URL对应的缓存文件，不记录访问、不读写磁盘，可以在界面线程中调用
+
+        @param {str} url - 图片地址
+        @return {str} - 缓存文件路径，未缓存或索引尚未加载时返回None
+        """
+        with self.lock:
+            digest = self.urls.get(url)
+            if digest is None or digest not in self.entries:
+                return None
+        return self._path(digest)
+
+    def contains(self, url):
+        """
+        @param {str} url - 图片地址
+        @return {bool} - 是否已缓存（不记录访问）
+        """
+        return self.peek(url) is not None
+
+    def get(self, url):
+        """
+        查找URL对应的缓存文件，并记录为最近访问
+
+        @param {str} url - 图片地址
+        @return {str} - 缓存文件路径，未缓存时返回None
+        """
+        self.load()
+        with self.lock:
+            digest = self.urls.get(url)
+            if digest is None or digest not in self.entries:
+                return None
+            self.entries.move_to_end(digest)
+        path = self._path(digest)
+        try:
+            # 用修改时间记录访问顺序，重新启动后仍然有效
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def put(self, url, data):
+        """
+        保存缩略图数据
+
+        @param {str} url - 图片地址
+        @param {bytes} data - 缩略图数据
+        @return {str} - 缓存文件路径
+        """
+        self.load()
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        with self.lock:
+            if digest not in self.entries:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as f:
+                    f.write(data)
+                self.entries[digest] = len(data)
+                self.total_bytes += len(data)
+            self.entries.move_to_end(digest)
+            self.urls[url] = digest
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(f"{url}\t{digest}\n")
+            self._evict()
+        return path
+
+    def _evict(self):
+        """
+        淘汰最久未访问的文件直到总大小低于上限（调用时需持有锁）
+        """
+        evicted = False
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            digest, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            evicted = True
+            try:
+                os.remove(self._path(digest))
+            except OSError:
+                pass
+        if evicted:
+            # 重写索引，去掉指向已淘汰文件的URL
+            self.urls = {url: digest for url, digest in self.urls.items() if digest in self.entries}
+            with open(self.index_path, "w", encoding="utf-8") as f:
+                f.writelines(f"{url}\t{digest}\n" for url, digest in self.urls.items())
+
+
+class ThumbnailLoader:
+    """
+    有界的后台缩略图加载器 - 最新的请求最先处理，队列满时丢弃最早的预取请求
+    """
+    def __init__(self, cache, on_ready, user_agent="RedditSpier v1.0", workers=LOADER_WORKERS, max_pending=LOADER_MAX_PENDING):
+        """
+        @param {MediaCache} cache - 磁盘缓存
+        @param {callable} on_ready - on_ready(url, path)，在后台线程中调用，失败时path为None
+        @param {str} user_agent - 下载时使用的User Agent
+        @param {int} workers - 下载线程数
+        @param {int} max_pending - 等待队列长度上限
+        """
+        self.cache = cache
+        self.on_ready = on_ready
+        self.user_agent = user_agent
+        self.max_pending = max_pending
+        self.pending = collections.deque()
+        self.queued = set()  # 等待中或下载中的URL
+        self.condition = threading.Condition()
+        self.local = threading.local()
+        for i in range(workers):
+            threading.Thread(target=self._worker, name=f"thumbnail-loader-{i}", daemon=True).start()
+
+    def request(self, urls):
+        """
+        请求加载一组图片，列表中靠前的先处理
+
+        @param {list} urls - 图片地址列表
+        """
+        with self.condition:
+            for url in reversed(urls):
+                if not url:
+                    continue
+                if url in self.queued:
+                    # 已在等待的请求移到最前；下载中的请求不重复处理
+                    if url not in self.pending:
+                        continue
+                    self.pending.remove(url)
+                self.pending.append(url)
+                self.queued.add(url)
+                if len(self.pending) > self.max_pending:
+                    self.queued.discard(self.pending.popleft())
+            self.condition.notify_all()
+
+    def _session(self):
+        """
+        每个线程一个HTTP会话，复用连接
+        """
+        session = getattr(self.local, "session", None)
+        if session is None:
+            import requests
+            session = self.local.session = requests.Session()
+            session.headers["User-Agent"] = self.user_agent
+        return session
+
+    def _worker(self):
+        try:
+            self.cache.load()
+        except OSError:
+            pass
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                url = self.pending.pop()
+            try:
+                path = self.cache.get(url) or self.cache.put(url, make_thumbnail(self._download(url)))
+            except Exception:
+                path = None
+            finally:
+                with self.condition:
+                    self.queued.discard(url)
+            self.on_ready(url, path)
+
+    def _download(self, url):
+        """
+        下载图片，限制大小
+
+        @param {str} url - 图片地址
+        @return {bytes} - 图片数据
+        """
+        with self._session().get(url, timeout=DOWNLOAD_TIMEOUT, stream=True) as response:
+            response.raise_for_status()
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(64 * 1024):
+                size += len(chunk)
+                if size > DOWNLOAD_MAX_BYTES:
+                    raise ValueError("图片过大")
+                chunks.append(chunk)
+        return b"".join(chunks)
@@ -0,0 +1,236 @@
+"""
+离线情感评分和自定义词典评分
+
+- 情感: 基于内置情感词典，处理否定词，得分归一化到 [-1, 1]
+- 自定义词典: 用户提供的词/词组列表（可带权重），得分为命中次数的加权和
+
+评分按块提交到进程池执行；结果按帖子ID缓存在SQLite中，
+只有新帖子、内容（标题+正文的哈希）变化或词典变化时才重新评分。
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+
+# 每个进程池任务处理的帖子数
+CHUNK_SIZE = 2000
+
+# 否定词影响其后的词数
+NEGATION_WINDOW = 3
+
+POSITIVE_WORDS = {
+    "good": 1.5, "great": 2.5, "excellent": 3.0, "amazing": 2.8, "awesome": 2.8, "love": 2.5, "loved": 2.5,
+    "like": 1.0, "liked": 1.2, "best": 2.5, "better": 1.5, "nice": 1.5, "happy": 2.0, "glad": 1.8,
+    "fantastic": 2.8, "wonderful": 2.7, "perfect": 2.7, "recommend": 1.8, "recommended": 1.8, "helpful": 1.8,
+    "useful": 1.5, "easy": 1.2, "fast": 1.0, "reliable": 1.8, "impressive": 2.2, "beautiful": 2.3,
+    "enjoy": 1.8, "enjoyed": 1.8, "favorite": 2.0, "worth": 1.2, "win": 1.8, "works": 1.0, "solid": 1.5,
+    "thanks": 1.5, "thank": 1.5, "cool": 1.3, "fun": 1.8, "exciting": 2.0, "pleased": 2.0, "satisfied": 1.8,
+    "smooth": 1.3, "stable": 1.2, "improved": 1.5, "incredible": 2.6, "brilliant": 2.7, "superb": 2.8,
+}
+
+NEGATIVE_WORDS = {
+    "bad": -1.8, "terrible": -2.8, "awful": -2.8, "horrible": -2.8, "hate": -2.7, "hated": -2.7,
+    "worst": -3.0, "worse": -2.0, "poor": -1.8, "broken": -2.0, "bug": -1.2, "buggy": -1.8, "crash": -1.8,
+    "crashes": -1.8, "slow": -1.3, "expensive": -1.2, "scam": -3.0, "fraud": -3.0, "spam": -2.0,
+    "useless": -2.5, "disappointed": -2.2, "disappointing": -2.2, "annoying": -1.8, "angry": -2.2,
+    "sad": -1.8, "problem": -1.2, "problems": -1.2, "issue": -1.0, "issues": -1.0, "fail": -2.0,
+    "failed": -2.0, "fails": -2.0, "refund": -1.2, "garbage": -2.6, "trash": -2.4, "sucks": -2.5,
+    "waste": -2.2, "wrong": -1.5, "unreliable": -2.0, "lost": -1.3, "ugly": -2.0, "difficult": -1.2,
+    "pain": -1.6, "fake": -2.2, "ripoff": -2.8, "avoid": -1.8, "unusable": -2.6, "error": -1.3,
+}
+
+NEGATIONS = frozenset(["not", "no", "never", "none", "nobody", "nothing", "neither", "nor", "without", "cannot", "isn't",
+                       "aren't", "wasn't", "weren't", "don't", "doesn't", "didn't", "can't", "couldn't", "won't",
+                       "wouldn't", "shouldn't", "hardly"])
+
+TOKEN_PATTERN = re.compile(r"[a-z][a-z']*")
+
+# 需要整词匹配的词首尾字符
+ASCII_WORD_CHAR = re.compile(r"[A-Za-z0-9_]")
+
+
+def content_hash(title, selftext):
+    """
+    帖子内容的哈希，用于判断是否需要重新评分
+
+    @param {str} title - 标题
+    @param {str} selftext - 正文
+    @return {str}
+    """
+    return hashlib.sha1(f"{title}\n{selftext}".encode("utf-8")).hexdigest()
+
+
+def load_lexicon_file(path):
+    """
+    读取自定义词典文件
+
+    - .json: {"词典名": ["词", ...]} 或 {"词典名": {"词": 权重, ...}}
+    - 其他: 每行一个词，可用制表符分隔权重，词典名为文件名
+
+    @param {str} path - 文件路径
+    @return {dict} - 词典名 -> {词: 权重}
+    """
+    if path.lower().endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        lexicons = {}
+        for name, terms in data.items():
+            if isinstance(terms, dict):
+                lexicons[name] = {str(term).lower(): float(weight) for term, weight in terms.items()}
+            else:
+                lexicons[name] = {str(term).lower(): 1.0 for term in terms}
+        return lexicons
+
+    terms = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            term, _, weight = line.partition("\t")
+            terms[term.strip().lower()] = float(weight) if weight.strip() else 1.0
+    return {os.path.splitext(os.path.basename(path))[0]: terms}
+
+
+def lexicons_hash(lexicons):
+    """
+    词典内容的哈希，词典变化后缓存的词典得分失效
+
+    @param {dict} lexicons - 词典名 -> {词: 权重}
+    @return {str}
+    """
+    return hashlib.sha1(json.dumps(lexicons, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def sentiment_score(text):
+    """
+    情感得分
+
+    @param {str} text - 文本
+    @return {float} - [-1, 1]，正数为正面
+    """
+    total = 0.0
+    negate_until = -1
+    for index, token in enumerate(TOKEN_PATTERN.findall(text.lower())):
+        if token in NEGATIONS or token.endswith("n't"):
+            negate_until = index + NEGATION_WINDOW
+            continue
+        value = POSITIVE_WORDS.get(token) or NEGATIVE_WORDS.get(token)
+        if value:
+            total += -0.74 * value if index <= negate_until else value
+    return total / math.sqrt(total * total + 15)
+
+
+def _term_pattern(term):
+    """
+    单个词的正则: 首尾是ASCII单词字符的词按整词匹配
+
+    中文等不用空格分词的语言中正则的单词字符也包括汉字，按单词字符做整词边界后中文词几乎永远匹配不到，
+    所以只在词的首尾是ASCII字母、数字或下划线时才加边界，并且边界只排除相邻的ASCII单词字符
+    （"买了iphone" 中的 "iphone" 仍能匹配）。
+
+    @param {str} term - 词
+    @return {str}
+    """
+    pattern = re.escape(term)
+    if ASCII_WORD_CHAR.match(term[:1]):
+        pattern = rf"(?<![A-Za-z0-9_]){pattern}"
+    if ASCII_WORD_CHAR.match(term[-1:]):
+        pattern = rf"{pattern}(?![A-Za-z0-9_])"
+    return pattern
+
+
+def _compile_lexicons(lexicons):
+    """
+    每个词典编译成一个正则表达式，较长的词优先
+
+    @param {dict} lexicons - 词典名 -> {词: 权重}
+    @return {list} - [(词典名, 正则, {词: 权重})]
+    """
+    compiled = []
+    for name, terms in lexicons.items():
+        terms = {term: weight for term, weight in terms.items() if term}
+        if not terms:
+            continue
+        alternatives = "|".join(_term_pattern(term) for term in sorted(terms, key=len, reverse=True))
+        compiled.append((name, re.compile(alternatives), terms))
+    return compiled
+
+
+def score_chunk(items, lexicons):
+    """
+    对一块帖子评分（在子进程中执行）
+
+    @param {list} items - [(下标, 标题, 正文)]
+    @param {dict} lexicons - 词典名 -> {词: 权重}
+    @return {list} - [(下标, 情感得分, {词典名: 得分})]
+    """
+    compiled = _compile_lexicons(lexicons)
+    results = []
+    for index, title, selftext in items:
+        text = f"{title}\n{selftext}"
+        lowered = text.lower()
+        lexicon_scores = {
+            name: sum(terms[match] for match in pattern.findall(lowered))
+            for name, pattern, terms in compiled
+        }
+        results.append((index, sentiment_score(text), lexicon_scores))
+    return results
+
+
+class ScoreCache:
+    """
+    评分结果缓存（SQLite），每个线程使用自己的实例
+    """
+    def __init__(self, path):
+        """
+        @param {str} path - 数据库文件路径
+        """
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            "post_id TEXT PRIMARY KEY, content_hash TEXT, lexicons_hash TEXT, sentiment REAL, lexicon_scores TEXT)"
+        )
+
+    def lookup(self, keys, lexicons_digest):
+        """
+        查找内容和词典都未变化的缓存结果
+
+        @param {list} keys - [(帖子ID, 内容哈希)]
+        @param {str} lexicons_digest - 词典哈希
+        @return {dict} - 帖子ID -> (情感得分, {词典名: 得分})
+        """
+        found = {}
+        ids = [post_id for post_id, _ in keys]
+        wanted = dict(keys)
+        # SQLite单条语句的参数个数有限制，分批查询
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            rows = self.connection.execute(
+                f"SELECT post_id, content_hash, lexicons_hash, sentiment, lexicon_scores FROM scores "
+                f"WHERE post_id IN ({','.join('?' * len(batch))})",
+                batch
+            )
+            for post_id, digest, lex_digest, sentiment, lexicon_scores in rows:
+                if wanted.get(post_id) == digest and lex_digest == lexicons_digest:
+                    found[post_id] = (sentiment, json.loads(lexicon_scores))
+        return found
+
+    def store(self, rows, lexicons_digest):
+        """
+        保存评分结果
+
+        @param {list} rows - [(帖子ID, 内容哈希, 情感得分, {词典名: 得分})]
+        @param {str} lexicons_digest - 词典哈希
+        """
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?)",
+                [(post_id, digest, lexicons_digest, sentiment, json.dumps(scores, ensure_ascii=False))
+                 for post_id, digest, sentiment, scores in rows]
+            )
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,823 @@
+"""
+本地采集服务（HTTP/JSON接口）
+
+多个用户共用一个长期运行的采集服务: 一套凭据、一个令牌缓存、一个共享的请求速率限制器，
+同一 (社区, 关键词, 排序) 的重叠请求只抓取一次，结果由各任务共享。
+
+接口:
+
+    POST   /jobs                  提交任务，请求体为JSON（字段见 parse_job_request）
+    GET    /jobs                  所有任务的状态
+    GET    /jobs/<id>             单个任务的状态、失败单元和深度采集覆盖情况
+    GET    /jobs/<id>/results     任务结果，NDJSON（每行一个帖子，含完整内容）
+                                  ?offset=N 跳过前N条；?follow=1 持续输出新结果直到任务结束，
+                                  没有新结果时定期输出空行作为心跳
+    DELETE /jobs/<id>             取消任务；已结束的任务则删除任务及其结果
+
+启动:
+
+    python reddit_spier.py --serve [--host 127.0.0.1] [--port 8765] [--token 令牌]
+
+所有请求都要在请求头中提供共享令牌: Authorization: Bearer <令牌>，否则返回401。
+令牌依次取 --token、环境变量 REDDIT_SPIER_SERVICE_TOKEN、配置文件中的 service_token，
+都没有时启动时随机生成并输出到日志。
+默认只监听本机地址；令牌以明文传输，监听其他地址时应放在HTTPS反向代理之后。
+
+服务只保留最近 MAX_FINISHED_JOBS 个已结束任务的结果，重复运行的任务只保留最近
+RECURRING_RESULT_RUNS 次运行的结果；每次运行的完整正文写入单独的存储文件，结果被丢弃时一并删除。
+
+图形界面配置了服务地址时，通过 ServiceClient / RemoteJobManager 作为瘦客户端使用该服务。
+"""
+import argparse
+import datetime
+import hmac
+import http.server
+import json
+import os
+import re
+import secrets
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import spier_auth
+import spier_blobstore
+import spier_deep
+import spier_fetch
+import spier_jobs
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# 未指定 --token 时从该环境变量读取共享令牌
+TOKEN_ENV = "REDDIT_SPIER_SERVICE_TOKEN"
+
+# follow模式下没有新结果时的检查间隔（秒）
+FOLLOW_POLL = 1.0
+
+# follow模式下没有新结果时发送空行的间隔（秒），客户端据此判断连接仍然有效
+FOLLOW_HEARTBEAT = 10.0
+
+# 瘦客户端刷新任务状态的间隔（秒）和请求超时
+CLIENT_POLL_INTERVAL = 2.0
+CLIENT_TIMEOUT = 10
+
+# 结果流中断后重新连接的等待时间（秒）
+CLIENT_RECONNECT_DELAY = 5.0
+
+# follow模式下的读取超时（秒），超过几个心跳间隔仍没有数据时视为服务已断开，从已收到的位置重新连接
+CLIENT_FOLLOW_TIMEOUT = 3 * FOLLOW_HEARTBEAT
+
+# 保留结果的已结束任务数，超过时移除最早结束的任务
+MAX_FINISHED_JOBS = 50
+
+# 重复运行的任务保留结果的运行次数
+RECURRING_RESULT_RUNS = 3
+
+SORTS = ("hot", "new", "relevance")
+PRIORITIES = {
+    "high": spier_jobs.PRIORITY_HIGH, "normal": spier_jobs.PRIORITY_NORMAL, "low": spier_jobs.PRIORITY_LOW,
+    "高": spier_jobs.PRIORITY_HIGH, "普通": spier_jobs.PRIORITY_NORMAL, "低": spier_jobs.PRIORITY_LOW,
+}
+
+
+class RequestError(Exception):
+    """
+    请求参数错误，返回400
+    """
+
+
+def parse_job_request(data):
+    """
+    把提交任务的JSON转换为采集任务
+
+    @param {dict} data - {"subreddits": [...], "keywords": [...], "limit": 100, "sort": "hot",
+                          "priority": "normal", "interval": 秒或null, "retry_budget": 20, "deep": false}
+    @return {spier_jobs.ScrapeJob}
+    """
+    if not isinstance(data, dict):
+        raise RequestError("请求体必须是JSON对象")
+    subreddits = data.get("subreddits")
+    if not subreddits or not isinstance(subreddits, list) or not all(isinstance(s, str) and s.strip() for s in subreddits):
+        raise RequestError("subreddits 必须是非空的字符串列表")
+    keywords = data.get("keywords") or []
+    if not isinstance(keywords, list) or not all(isinstance(k, str) for k in keywords):
+        raise RequestError("keywords 必须是字符串列表")
+    sort_by = data.get("sort", "hot")
+    if sort_by not in SORTS:
+        raise RequestError(f"sort 必须是 {', '.join(SORTS)} 之一")
+    priority = data.get("priority", spier_jobs.PRIORITY_NORMAL)
+    # 列表、字典等不可哈希的值不能用于查找
+    if isinstance(priority, str):
+        priority = PRIORITIES.get(priority, priority)
+    if isinstance(priority, bool) or not isinstance(priority, int) or priority not in spier_jobs.PRIORITY_NAMES:
+        raise RequestError("priority 必须是 high、normal 或 low")
+    try:
+        limit = int(data.get("limit", 100))
+        interval = data.get("interval")
+        interval = float(interval) if interval else None
+        retry_budget = int(data.get("retry_budget", spier_fetch.DEFAULT_RETRY_BUDGET))
+    except (TypeError, ValueError):
+        raise RequestError("limit、interval 和 retry_budget 必须是数字")
+    if limit <= 0 or retry_budget < 0 or (interval is not None and interval < 60):
+        raise RequestError("limit 必须大于0，retry_budget 不能为负，interval 不能小于60秒")
+
+    return spier_jobs.ScrapeJob(
+        [s.strip() for s in subreddits],
+        [k.strip() for k in keywords if k.strip()],
+        limit,
+        sort_by,
+        priority=priority,
+        interval=interval,
+        retry_budget=retry_budget,
+        deep=bool(data.get("deep", False))
+    )
+
+
+def job_request(job):
+    """
+    采集任务的提交参数（parse_job_request 的逆操作）
+
+    @param {spier_jobs.ScrapeJob} job - 采集任务
+    @return {dict}
+    """
+    return {
+        "subreddits": job.subreddits,
+        "keywords": job.keywords,
+        "limit": job.limit,
+        "sort": job.sort_by,
+        "priority": job.priority,
+        "interval": job.interval,
+        "retry_budget": job.retry_budget,
+        "deep": job.deep,
+    }
+
+
+def job_to_dict(job):
+    """
+    采集任务的状态
+
+    @param {spier_jobs.ScrapeJob} job - 采集任务
+    @return {dict}
+    """
+    data = job_request(job)
+    data.update({
+        "id": job.id,
+        "status": job.status,
+        "active": job.active,
+        "collected": job.collected,
+        "runs": job.runs,
+        "next_run": job.next_run,
+        "error": job.error,
+        "retries_used": job.retries.used,
+        "failures": [
+            {"subreddit": f.subreddit, "keyword": f.keyword, "page": f.page, "error": f.error}
+            for f in job.failures
+        ],
+        "coverage": [
+            [
+                {"subreddit": p.subreddit, "keyword": p.keyword, "sort": p.sort, "time_filter": p.time_filter,
+                 "fetched": p.fetched, "added": p.added, "failed": p.failed, "complete": p.complete}
+                for p in partitions
+            ]
+            for partitions in job.coverage
+        ],
+    })
+    return data
+
+
+def update_job(job, data):
+    """
+    用服务返回的状态更新本地的任务对象（瘦客户端）
+
+    @param {spier_jobs.ScrapeJob} job - 本地任务对象
+    @param {dict} data - job_to_dict 的结果
+    """
+    job.status = data["status"]
+    job.collected = data["collected"]
+    job.runs = data["runs"]
+    job.next_run = data["next_run"]
+    job.error = data["error"]
+    job.retries.used = data["retries_used"]
+    job.failures = [
+        spier_fetch.FetchFailure(f["subreddit"], f["keyword"], f["page"], f["error"])
+        for f in data["failures"]
+    ]
+    coverage = []
+    for partitions in data["coverage"]:
+        restored = []
+        for p in partitions:
+            partition = spier_deep.Partition(p["subreddit"], p["keyword"], p["sort"], p["time_filter"])
+            partition.fetched, partition.added = p["fetched"], p["added"]
+            partition.failed, partition.complete = p["failed"], p["complete"]
+            restored.append(partition)
+        coverage.append(restored)
+    job.coverage = coverage
+
+
+class JobResults:
+    """
+    服务中保留的一个任务的结果 - 按运行分段，每段的完整正文写入单独的存储，丢弃一段时删除其存储
+    """
+    def __init__(self):
+        self.records = []  # [(帖子记录, 正文存储)]
+        self.dropped = 0  # 已丢弃的最早结果数，结果流的偏移从任务的第一条结果算起
+        self.segments = []  # [(运行次数, 该次运行第一条结果的偏移, 正文存储)]
+        self.finished = False
+
+    @property
+    def body_store(self):
+        """
+        当前运行的正文存储
+        """
+        return self.segments[-1][2] if self.segments else None
+
+    def start_run(self, run, keep_runs):
+        """
+        开始一次新的运行，只保留最近 keep_runs 次运行的结果
+
+        @param {int} run - 运行次数
+        @param {int} keep_runs - 保留的运行次数
+        @return {spier_blobstore.BlobStore} - 本次运行的正文存储
+        """
+        self.segments.append((run, self.dropped + len(self.records), spier_blobstore.BlobStore()))
+        while len(self.segments) > keep_runs:
+            _, _, store = self.segments.pop(0)
+            count = self.segments[0][1] - self.dropped
+            del self.records[:count]
+            self.dropped += count
+            store.close()
+        return self.body_store
+
+    def close(self):
+        """
+        丢弃所有结果并删除正文存储
+        """
+        for _, _, store in self.segments:
+            store.close()
+        self.dropped += len(self.records)
+        self.records = []
+        self.segments = []
+
+
+class ScraperService:
+    """
+    采集服务 - 共享的Reddit客户端、任务管理器和单元缓存
+    """
+    def __init__(self, config_path, token):
+        """
+        @param {str} config_path - API配置文件路径（与图形界面使用同一个文件）
+        @param {str} token - 客户端需要提供的共享令牌
+        """
+        if not token:
+            raise ValueError("采集服务必须设置共享令牌")
+        self.config_path = config_path
+        self.token = token
+        self.token_cache = spier_auth.TokenCache(os.path.join(os.path.dirname(config_path), "reddit_token.json"))
+        self.reddit = None
+        self.condition = threading.Condition()
+        self.results = {}  # 任务ID -> JobResults
+        self.finished_jobs = []  # 按结束顺序排列的已结束任务ID
+        # 每个任务的每次运行使用自己的正文存储（见 JobResults）
+        self.job_manager = spier_jobs.JobManager(
+            get_reddit=lambda: self.reddit,
+            clone_reddit=lambda reddit: spier_auth.clone_reddit(reddit, self.token_cache),
+            on_record=self._on_record,
+            on_log=self.log_message,
+            on_change=self._on_change,
+            unit_cache=spier_jobs.UnitCache()
+        )
+
+    def log_message(self, message):
+        """
+        输出带时间的日志
+
+        @param {str} message - 日志消息
+        """
+        print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] {message}", flush=True)
+
+    def connect(self):
+        """
+        读取API配置并连接Reddit（优先使用缓存的令牌）
+        """
+        with open(self.config_path, "r") as f:
+            config = json.load(f)
+        client_id = config.get("client_id", "")
+        client_secret = config.get("client_secret", "")
+        user_agent = config.get("user_agent") or "RedditSpier v1.0"
+        if not client_id or not client_secret:
+            raise RuntimeError(f"API配置不完整: {self.config_path}")
+
+        reddit = spier_auth.create_reddit(client_id, client_secret, user_agent)
+        key = spier_auth.credentials_key(client_id, client_secret, user_agent)
+        token = self.token_cache.load(key)
+        if token and spier_auth.apply_token(reddit, token):
+            self.log_message("已连接到Reddit API（使用缓存的令牌）")
+        else:
+            token = spier_auth.fetch_token(reddit)
+            try:
+                self.token_cache.save(key, token)
+            except OSError as e:
+                self.log_message(f"保存API令牌时出错: {str(e)}")
+            self.log_message("已连接到Reddit API")
+        # 令牌过期后由praw自动刷新
+        self.reddit = reddit
+
+    def submit(self, job):
+        """
+        提交任务
+
+        @param {spier_jobs.ScrapeJob} job - 采集任务
+        """
+        with self.condition:
+            self.results[job.id] = JobResults()
+        self.job_manager.submit(job)
+        self.log_message(f"已添加采集任务{job.describe()}")
+
+    def remove_job(self, job_id):
+        """
+        删除已结束的任务及其结果
+
+        @param {int} job_id - 任务ID
+        @return {bool} - 是否删除了任务（仍在活动的任务不删除）
+        """
+        if not self.job_manager.remove(job_id):
+            return False
+        with self.condition:
+            results = self.results.pop(job_id, None)
+            if job_id in self.finished_jobs:
+                self.finished_jobs.remove(job_id)
+            if results is not None:
+                results.close()
+            self.condition.notify_all()
+        return True
+
+    def get_job(self, job_id):
+        """
+        @param {int} job_id - 任务ID
+        @return {spier_jobs.ScrapeJob} - 任务，不存在时返回None
+        """
+        return self.job_manager.all_jobs.get(job_id)
+
+    def wait_results(self, job_id, offset, timeout):
+        """
+        取出任务从 offset 开始的结果，没有新结果且任务仍在进行时最多等待 timeout 秒
+
+        @param {int} job_id - 任务ID
+        @param {int} offset - 已读取的结果数
+        @param {float} timeout - 最长等待时间，0表示不等待
+        @return {tuple} - ([(帖子记录, 正文存储)], 读取后的偏移, 任务是否仍在进行)；
+                          offset 之后的部分结果已被丢弃时从保留的第一条开始
+        """
+        job = self.get_job(job_id)
+        with self.condition:
+            results = self.results.get(job_id)
+            if job is None or results is None:
+                return [], offset, False  # 任务已被删除
+            if results.dropped + len(results.records) <= offset and timeout and job.active:
+                self.condition.wait(timeout)
+            start = max(offset, results.dropped)
+            records = results.records[start - results.dropped:]
+            return records, start + len(records), job.active
+
+    def record_to_dict(self, record, body_store):
+        """
+        输出到结果流的帖子记录，内容为完整正文
+
+        @param {dict} record - 帖子记录
+        @param {spier_blobstore.BlobStore} body_store - 记录所引用的正文存储
+        @return {dict}
+        """
+        data = {name: value for name, value in record.items() if name != "body_ref"}
+        try:
+            data["selftext"] = spier_blobstore.record_body(record, body_store)
+        except ValueError:
+            pass  # 读取时结果已被丢弃，正文存储已删除，输出截断的内容
+        return data
+
+    def close(self):
+        """
+        删除所有任务的正文存储
+        """
+        with self.condition:
+            for results in self.results.values():
+                results.close()
+
+    def _on_record(self, job, record):
+        with self.condition:
+            results = self.results[job.id]
+            results.records.append((record, results.body_store))
+            self.condition.notify_all()
+
+    def _on_change(self, job):
+        evicted = []
+        with self.condition:
+            results = self.results.get(job.id)
+            if results is not None:
+                if job.status == spier_jobs.STATUS_RUNNING and (not results.segments or results.segments[-1][0] != job.runs):
+                    # 每次运行在抓取之前使用新的正文存储
+                    keep_runs = RECURRING_RESULT_RUNS if job.interval else 1
+                    job.body_store = results.start_run(job.runs, keep_runs)
+                elif not job.active and not results.finished:
+                    results.finished = True
+                    self.finished_jobs.append(job.id)
+                    evicted = self.finished_jobs[:-MAX_FINISHED_JOBS]
+            self.condition.notify_all()
+        for job_id in evicted:
+            self.remove_job(job_id)
+
+    def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        启动HTTP服务（阻塞直到中断）
+
+        @param {str} host - 监听地址
+        @param {int} port - 端口
+        """
+        server = http.server.ThreadingHTTPServer((host, port), ServiceRequestHandler)
+        server.daemon_threads = True
+        server.service = self
+        self.log_message(f"采集服务已启动: http://{host}:{server.server_address[1]}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.job_manager.shutdown()
+            self.close()
+
+
+class ServiceRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    HTTP请求处理 - 每个连接在单独的线程中处理
+    """
+    JOB_PATH = re.compile(r"^/jobs/(\d+)(/results)?$")
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def _send_json(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self):
+        """
+        解析请求路径
+
+        @return {tuple} - (路径, 查询参数, 任务ID或None, 是否为结果路径)
+        """
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        match = self.JOB_PATH.match(url.path)
+        if match:
+            return url.path, query, int(match.group(1)), bool(match.group(2))
+        return url.path, query, None, False
+
+    def _authorized(self):
+        """
+        检查请求头中的共享令牌，不正确时返回401
+
+        @return {bool} - 是否继续处理请求
+        """
+        scheme, _, token = (self.headers.get("Authorization") or "").partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(token.strip().encode("utf-8"), self.service.token.encode("utf-8")):
+            return True
+        body = json.dumps({"error": "缺少或错误的服务令牌"}, ensure_ascii=False).encode("utf-8")
+        self.send_response(401)
+        self.send_header("WWW-Authenticate", "Bearer")
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return False
+
+    def _find_job(self, job_id):
+        job = self.service.get_job(job_id)
+        if job is None:
+            self._send_json(404, {"error": f"任务 {job_id} 不存在"})
+        return job
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        path, query, job_id, results = self._route()
+        if path == "/jobs":
+            self._send_json(200, [job_to_dict(job) for job in self.service.job_manager.jobs()])
+        elif job_id is None:
+            self._send_json(404, {"error": "未知路径"})
+        elif self._find_job(job_id) is None:
+            return
+        elif results:
+            self._stream_results(job_id, query)
+        else:
+            self._send_json(200, job_to_dict(self.service.get_job(job_id)))
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        path, _, _, _ = self._route()
+        if path != "/jobs":
+            self._send_json(404, {"error": "未知路径"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            job = parse_job_request(json.loads(self.rfile.read(length) or b"{}"))
+        except (ValueError, RequestError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        self.service.submit(job)
+        self._send_json(201, job_to_dict(job))
+
+    def do_DELETE(self):
+        if not self._authorized():
+            return
+        _, _, job_id, results = self._route()
+        if job_id is None or results:
+            self._send_json(404, {"error": "未知路径"})
+        else:
+            job = self._find_job(job_id)
+            if job is None:
+                return
+            if not self.service.job_manager.cancel(job_id):
+                self.service.remove_job(job_id)
+            self._send_json(200, job_to_dict(job))
+
+    def _stream_results(self, job_id, query):
+        """
+        以NDJSON输出任务结果；follow模式下持续输出直到任务结束或客户端断开，没有新结果时定期输出空行
+        """
+        try:
+            offset = max(0, int(query.get("offset", 0)))
+        except ValueError:
+            self._send_json(400, {"error": "offset 必须是整数"})
+            return
+        follow = query.get("follow") in ("1", "true")
+
+        # HTTP/1.0 响应不需要预先给出长度，结束时关闭连接
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.end_headers()
+        try:
+            last_write = time.monotonic()
+            while True:
+                records, offset, active = self.service.wait_results(job_id, offset, FOLLOW_POLL if follow else 0)
+                if records:
+                    lines = [json.dumps(self.service.record_to_dict(r, store), ensure_ascii=False) + "\n" for r, store in records]
+                    self.wfile.write("".join(lines).encode("utf-8"))
+                    self.wfile.flush()
+                    last_write = time.monotonic()
+                elif not follow or not active:
+                    break
+                elif time.monotonic() - last_write >= FOLLOW_HEARTBEAT:
+                    self.wfile.write(b"\n")
+                    self.wfile.flush()
+                    last_write = time.monotonic()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 客户端已断开
+
+    def log_message(self, format, *args):
+        self.service.log_message(f"{self.address_string()} {format % args}")
+
+
+class ServiceClient:
+    """
+    采集服务的HTTP客户端
+    """
+    def __init__(self, base_url, token):
+        """
+        @param {str} base_url - 服务地址，例如 http://127.0.0.1:8765
+        @param {str} token - 服务的共享令牌
+        """
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+
+    def _open(self, path, method="GET", body=None, timeout=CLIENT_TIMEOUT):
+        request = urllib.request.Request(self.base_url + path, data=body, method=method)
+        request.add_header("Authorization", f"Bearer {self.token}")
+        if body is not None:
+            request.add_header("Content-Type", "application/json")
+        return urllib.request.urlopen(request, timeout=timeout)
+
+    def _request(self, method, path, data=None):
+        body = json.dumps(data).encode("utf-8") if data is not None else None
+        try:
+            with self._open(path, method, body) as response:
+                return json.loads(response.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read().decode("utf-8"))["error"]
+            except Exception:
+                message = str(e)
+            raise RuntimeError(f"采集服务返回错误: {message}")
+
+    def submit(self, request):
+        """
+        @param {dict} request - 任务参数（见 parse_job_request）
+        @return {dict} - 任务状态
+        """
+        return self._request("POST", "/jobs", request)
+
+    def job(self, job_id):
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def jobs(self):
+        return self._request("GET", "/jobs")
+
+    def cancel(self, job_id):
+        return self._request("DELETE", f"/jobs/{job_id}")
+
+    def results(self, job_id, offset=0, follow=False):
+        """
+        逐条读取任务结果
+
+        @param {int} job_id - 任务ID
+        @param {int} offset - 跳过的结果数
+        @param {bool} follow - 是否持续读取直到任务结束
+        @return {generator} - 帖子记录（字典）；超过 CLIENT_FOLLOW_TIMEOUT 没有数据时抛出 TimeoutError
+        """
+        path = f"/jobs/{job_id}/results?offset={offset}&follow={int(follow)}"
+        # follow模式下两条结果之间可能间隔很久，但服务会定期发送心跳空行，长时间没有数据说明连接已失效
+        with self._open(path, timeout=CLIENT_FOLLOW_TIMEOUT if follow else CLIENT_TIMEOUT) as response:
+            for line in response:
+                if line.strip():
+                    yield json.loads(line.decode("utf-8"))
+
+
+class RemoteJobManager:
+    """
+    与 spier_jobs.JobManager 接口相同的瘦客户端 - 任务在采集服务中执行，
+    结果通过NDJSON流接收，任务状态定期刷新
+    """
+    def __init__(self, base_url, token, on_record, on_log, on_change=None, body_store=None):
+        """
+        回调函数在后台线程中调用，界面代码需要自行切换到主线程。
+
+        @param {str} base_url - 服务地址
+        @param {str} token - 服务的共享令牌
+        @param {callable} on_record - on_record(job, record)，收到一条帖子
+        @param {callable} on_log - on_log(message)，日志消息
+        @param {callable} on_change - on_change(job)，任务状态或进度变化
+        @param {spier_blobstore.BlobStore} body_store - 本地的完整正文存储
+        """
+        self.client = ServiceClient(base_url, token)
+        self.base_url = self.client.base_url
+        self.token = token
+        self.on_record = on_record
+        self.on_log = on_log
+        self.on_change = on_change or (lambda job: None)
+        self.body_store = body_store
+        self.lock = threading.Lock()
+        self.all_jobs = {}
+        self._shutdown = threading.Event()
+        threading.Thread(target=self._poll_thread, name="service-poll", daemon=True).start()
+
+    def submit(self, job):
+        """
+        提交任务到服务，任务ID改为服务分配的ID
+
+        @param {spier_jobs.ScrapeJob} job - 采集任务
+        """
+        data = self.client.submit(job_request(job))
+        job.id = data["id"]
+        update_job(job, data)
+        with self.lock:
+            self.all_jobs[job.id] = job
+        threading.Thread(target=self._follow_thread, args=(job,), name=f"service-results-{job.id}", daemon=True).start()
+        self.on_change(job)
+        return job
+
+    def cancel(self, job_id):
+        """
+        取消一个任务
+
+        @param {int} job_id - 任务ID
+        @return {bool} - 是否取消了任务
+        """
+        job = self.all_jobs.get(job_id)
+        if job is None or not job.active:
+            return False
+        try:
+            update_job(job, self.client.cancel(job_id))
+        except Exception as e:
+            self.on_log(f"取消任务#{job_id}时出错: {str(e)}")
+            return False
+        self.on_change(job)
+        return True
+
+    def cancel_all(self):
+        """
+        取消所有未结束的任务
+
+        @return {int} - 取消的任务数
+        """
+        return sum(1 for job in self.jobs() if self.cancel(job.id))
+
+    def jobs(self):
+        """
+        @return {list} - 按ID排序的任务列表
+        """
+        with self.lock:
+            return sorted(self.all_jobs.values(), key=lambda job: job.id)
+
+    def has_active_jobs(self):
+        return any(job.active for job in self.jobs())
+
+    def shutdown(self):
+        """
+        停止刷新和接收结果（服务中的任务继续运行）
+        """
+        self._shutdown.set()
+
+    def _poll_thread(self):
+        """
+        定期刷新未结束任务的状态
+        """
+        while not self._shutdown.wait(CLIENT_POLL_INTERVAL):
+            for job in self.jobs():
+                if not job.active:
+                    continue
+                try:
+                    data = self.client.job(job.id)
+                except Exception:
+                    continue  # 服务暂时不可用时下次再试
+                before = (job.status, job.collected, len(job.failures), job.next_run)
+                update_job(job, data)
+                if (job.status, job.collected, len(job.failures), job.next_run) != before:
+                    self.on_change(job)
+
+    def _follow_thread(self, job):
+        """
+        接收任务结果，连接中断时从已收到的位置重新连接
+        """
+        received = 0
+        while not self._shutdown.is_set():
+            try:
+                for data in self.client.results(job.id, offset=received, follow=True):
+                    received += 1
+                    self.on_record(job, self._to_record(data))
+                    if self._shutdown.is_set():
+                        return
+                return  # 任务已结束
+            except Exception as e:
+                if isinstance(e, urllib.error.HTTPError) and e.code in (401, 404):
+                    # 令牌错误或任务已被服务删除，重新连接也不会成功
+                    self.on_log(f"[任务#{job.id}] 接收采集结果时出错: {str(e)}")
+                    return
+                self.on_log(f"[任务#{job.id}] 接收采集结果时出错: {str(e)}，{int(CLIENT_RECONNECT_DELAY)} 秒后重新连接")
+            if self._shutdown.wait(CLIENT_RECONNECT_DELAY):
+                return
+
+    def _to_record(self, data):
+        """
+        把服务返回的帖子转换为本地记录: 完整内容写入本地正文存储，记录中保留截断的内容
+        """
+        return spier_jobs.attach_body(data, self.body_store)
+
+
+def configured_token(config_path):
+    """
+    配置文件中的服务令牌
+
+    @param {str} config_path - API配置文件路径
+    @return {str} - 令牌，没有时返回空字符串
+    """
+    try:
+        with open(config_path, "r") as f:
+            return json.load(f).get("service_token") or ""
+    except (OSError, ValueError, AttributeError):
+        return ""
+
+
+def main(argv, config_path):
+    """
+    命令行入口
+
+    @param {list} argv - 命令行参数（不含 --serve）
+    @param {str} config_path - 默认的API配置文件路径
+    """
+    parser = argparse.ArgumentParser(prog="reddit_spier.py --serve", description="Reddit采集服务")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"监听地址（默认 {DEFAULT_HOST}）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"端口（默认 {DEFAULT_PORT}）")
+    parser.add_argument("--config", default=config_path, help="API配置文件（默认与图形界面相同）")
+    parser.add_argument("--token", default=os.environ.get(TOKEN_ENV),
+                        help=f"客户端需要提供的共享令牌（默认读取环境变量 {TOKEN_ENV} 或配置文件中的 service_token）")
+    args = parser.parse_args(argv)
+
+    token = args.token or configured_token(args.config)
+    service = ScraperService(args.config, token or secrets.token_urlsafe(24))
+    if not token:
+        service.log_message(f"本次运行的服务令牌: {service.token}（在图形界面的\"服务令牌\"中填写）")
+    try:
+        service.connect()
+    except Exception as e:
+        service.log_message(f"连接Reddit API时出错: {str(e)}")
+        return 1
+    service.serve(args.host, args.port)
+    return 0
@@ -0,0 +1,119 @@
+"""
+测试配置: 把项目根目录加入模块搜索路径，并提供不访问网络的假Reddit客户端
+"""
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# 没有指定列表时默认返回的帖子数（limit=None 时）
+DEFAULT_LISTING_SIZE = 100
+
+
+class FakePost:
+    """
+    praw帖子对象中采集用到的字段
+    """
+    def __init__(self, post_id, selftext=None):
+        self.id = post_id
+        self.title = f"title {post_id}"
+        self.author = None
+        self.score = 1
+        self.num_comments = 0
+        self.created_utc = 1700000000
+        self.selftext = f"{post_id} " + "正文" * 200 if selftext is None else selftext
+        self.permalink = f"/r/test/{post_id}"
+
+
+class FakeListing:
+    """
+    与praw的ListingGenerator一样: 出错时不前移，再次调用 next 从同一位置继续
+    """
+    def __init__(self, count, prefix="p", selftext=None, errors=None, gate=None, ids=None):
+        """
+        @param {int} count - 帖子数，帖子ID为 prefix1 ... prefixN
+        @param {str} prefix - 帖子ID前缀
+        @param {str} selftext - 帖子内容，None表示按ID生成
+        @param {dict} errors - 位置 -> 在该位置抛出一次的异常
+        @param {threading.Event} gate - 每取一个帖子前等待该事件
+        @param {list} ids - 直接指定帖子ID（忽略 count 和 prefix）
+        """
+        self.ids = list(ids) if ids is not None else [f"{prefix}{i}" for i in range(1, count + 1)]
+        self.index = 0
+        self.selftext = selftext
+        self.errors = dict(errors or {})
+        self.gate = gate
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.index in self.errors:
+            raise self.errors.pop(self.index)
+        if self.index >= len(self.ids):
+            raise StopIteration
+        self.index += 1
+        return FakePost(self.ids[self.index - 1], self.selftext)
+
+
+class FakeSubreddit:
+    def __init__(self, reddit, name):
+        self.reddit = reddit
+        self.name = name
+
+    def _listing(self, method, limit, keyword="", sort=None, time_filter=None):
+        query = {"subreddit": self.name, "method": method, "keyword": keyword, "sort": sort or method,
+                 "time_filter": time_filter, "limit": limit}
+        with self.reddit.lock:
+            self.reddit.queries.append(query)
+        factory = self.reddit.listings.get(self.name.lower())
+        if factory is None:
+            return FakeListing(DEFAULT_LISTING_SIZE if limit is None else limit, prefix=self.name)
+        return factory(query)
+
+    def hot(self, limit=100):
+        return self._listing("hot", limit)
+
+    def new(self, limit=100):
+        return self._listing("new", limit)
+
+    def rising(self, limit=100):
+        return self._listing("rising", limit)
+
+    def top(self, time_filter="all", limit=100):
+        return self._listing("top", limit, time_filter=time_filter)
+
+    def controversial(self, time_filter="all", limit=100):
+        return self._listing("controversial", limit, time_filter=time_filter)
+
+    def search(self, query, sort="relevance", time_filter="all", limit=100):
+        return self._listing("search", limit, keyword=query, sort=sort, time_filter=time_filter)
+
+
+class FakeReddit:
+    """
+    假的Reddit客户端 - 记录每个列表请求，listings 中没有指定的社区按 limit 返回帖子
+    """
+    def __init__(self):
+        self.listings = {}  # 社区名称（小写） -> listing(query)，返回可迭代的帖子
+        self.queries = []
+        self.lock = threading.Lock()
+
+    def subreddit(self, name):
+        return FakeSubreddit(self, name)
+
+    def listing(self, count, **kwargs):
+        """
+        @return {FakeListing} - 参数见 FakeListing
+        """
+        return FakeListing(count, **kwargs)
+
+
+@pytest.fixture
+def fake_reddit():
+    return FakeReddit()
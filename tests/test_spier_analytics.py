@@ -0,0 +1,98 @@
+"""
+spier_analytics 的测试
+"""
+import datetime
+
+import numpy as np
+
+import spier_analytics
+
+MONDAY, SATURDAY, SUNDAY = 0, 5, 6
+
+
+def timestamps(*values):
+    return np.array([datetime.datetime(*value, tzinfo=datetime.timezone.utc).timestamp() for value in values])
+
+
+def cells(heatmap):
+    return sorted((int(day), int(hour), int(heatmap[day, hour])) for day, hour in zip(*np.nonzero(heatmap)))
+
+
+def test_heatmap_buckets_by_weekday_and_hour():
+    # 1970-01-01 00:30 UTC 是星期四
+    heatmap = spier_analytics.posting_heatmap(timestamps((1970, 1, 1, 0, 30), (2024, 1, 1, 23, 59), (2024, 1, 1, 23, 0)), "UTC")
+    assert heatmap.shape == (7, 24)
+    assert cells(heatmap) == [(MONDAY, 23, 2), (3, 0, 1)]
+
+
+def test_heatmap_uses_the_offset_in_effect_for_each_timestamp():
+    # 美东 2023-03-12 02:00 开始夏令时（UTC-5 -> UTC-4）
+    created = timestamps(
+        (2023, 3, 11, 17, 0),   # 周六 12:00 EST
+        (2023, 3, 12, 6, 30),   # 周日 01:30 EST，切换前
+        (2023, 3, 12, 7, 30),   # 周日 03:30 EDT，切换后
+        (2023, 3, 13, 16, 0),   # 周一 12:00 EDT
+    )
+    heatmap = spier_analytics.posting_heatmap(created, "America/New_York")
+    assert cells(heatmap) == [(MONDAY, 12, 1), (SATURDAY, 12, 1), (SUNDAY, 1, 1), (SUNDAY, 3, 1)]
+
+
+def test_heatmap_supports_half_hour_offsets():
+    heatmap = spier_analytics.posting_heatmap(timestamps((2024, 1, 1, 10, 45)), "Asia/Kolkata")
+    assert cells(heatmap) == [(MONDAY, 16, 1)]
+
+
+def test_heatmap_defaults_to_the_system_zone():
+    created = np.arange(0, 86400 * 30, 3600 * 7, dtype=np.float64)
+    assert spier_analytics.posting_heatmap(created).sum() == len(created)
+    assert spier_analytics.posting_heatmap(np.array([], dtype=np.float64)).sum() == 0
+
+
+def test_distributions_per_subreddit():
+    result = spier_analytics.distributions(["b", "a", "a", "a"], np.array([100, 0, 3, -5]))
+    assert result["subreddits"] == ["a", "b"]
+    # 负数计入第一个分箱；3 落在 [2, 5)，100 落在 [100, 200)
+    a, b = result["hist"]
+    assert a[0] == 2 and a[2] == 1 and a.sum() == 3
+    assert b[7] == 1 and b.sum() == 1
+    assert result["medians"].tolist() == [0, 100]
+
+
+def test_distributions_keep_the_largest_subreddits():
+    subreddits = ["small"] + ["big"] * 3 + ["mid"] * 2
+    result = spier_analytics.distributions(subreddits, np.ones(len(subreddits), dtype=np.int64), top=2)
+    assert result["subreddits"] == ["big", "mid"]
+    assert result["hist"].sum(axis=1).tolist() == [3, 2]
+
+
+def test_text_terms_counts_words_bigrams_and_cooccurrence():
+    terms = spier_analytics.text_terms(["Python pandas python", "pandas NumPy", "the and of 2024"])
+    assert dict(zip(*terms["unigrams"])) == {"python": 2, "pandas": 2, "numpy": 1}
+    # 二元词组不跨越文档
+    assert dict(zip(*terms["bigrams"])) == {"python pandas": 1, "pandas python": 1, "pandas numpy": 1}
+
+    vocab = terms["cooccur_vocab"]
+    cooccur = terms["cooccur"]
+    pair = lambda x, y: cooccur[vocab.index(x), vocab.index(y)]
+    assert pair("python", "pandas") == pair("pandas", "python") == 1
+    assert pair("pandas", "numpy") == 1
+    assert pair("python", "numpy") == 0
+    assert np.all(np.diag(cooccur) == 0)
+
+
+def test_text_terms_without_words():
+    terms = spier_analytics.text_terms(["", "the and"])
+    assert terms["unigrams"][0] == []
+    assert terms["cooccur"].shape == (0, 0)
+
+
+def test_compute_aggregates():
+    records = [
+        {"created_utc": 1700000000, "score": 5, "num_comments": 1, "subreddit": "a", "title": "pandas", "selftext": "numpy"},
+        {"created_utc": 1700003600, "score": 1, "num_comments": 0, "subreddit": "b", "title": "pandas", "selftext": ""},
+    ]
+    aggregates = spier_analytics.compute_aggregates(spier_analytics.records_to_columns(records), "UTC")
+    assert aggregates["total"] == 2
+    assert aggregates["heatmap"].sum() == 2
+    assert aggregates["score"]["subreddits"] == ["a", "b"]
+    assert dict(zip(*aggregates["terms"]["unigrams"]))["pandas"] == 2
@@ -0,0 +1,79 @@
+"""
+spier_auth 的测试
+"""
+import time
+
+import pytest
+
+import spier_auth
+
+
+@pytest.fixture
+def reddit():
+    pytest.importorskip("praw")
+    return spier_auth.create_reddit("client-id", "client-secret", "RedditSpier tests")
+
+
+def test_apply_cached_token_makes_fresh_authorizer_valid(reddit):
+    token = {"access_token": "cached-token", "expires_at": time.time() + 3600, "scope": ["*"]}
+    assert spier_auth.apply_token(reddit, token)
+
+    authorizer = spier_auth._authorizer(reddit)
+    assert authorizer.is_valid()
+    assert authorizer.access_token == "cached-token"
+    assert authorizer.scopes == {"*"}
+    assert spier_auth._get_expires_at(authorizer) == pytest.approx(token["expires_at"], abs=1)
+
+
+def test_apply_expired_token_is_not_valid(reddit):
+    assert not spier_auth.apply_token(reddit, {"access_token": "old", "expires_at": time.time() - 10, "scope": ["*"]})
+    assert not spier_auth._authorizer(reddit).is_valid()
+    assert spier_auth._authorizer(reddit).access_token is None
+
+
+def test_token_is_not_applied_to_unknown_prawcore_layout(reddit, monkeypatch):
+    authorizer = spier_auth._authorizer(reddit)
+    monkeypatch.setattr(type(authorizer), "is_valid",
+                        lambda self: self.access_token is not None and time.time() < self._expires_at)
+    assert not spier_auth.apply_token(reddit, {"access_token": "cached", "expires_at": time.time() + 3600})
+    assert authorizer.access_token is None
+    assert spier_auth._get_expires_at(authorizer) is None
+
+
+def test_prewarm_skips_unknown_prawcore_layout(reddit, monkeypatch):
+    monkeypatch.setattr(spier_auth, "_authorizer", lambda reddit: object())
+    assert not spier_auth.prewarm(reddit)
+
+
+def test_token_cache_round_trip(tmp_path):
+    cache = spier_auth.TokenCache(str(tmp_path / "token.json"))
+    key = spier_auth.credentials_key("id", "secret", "ua")
+    token = {"access_token": "abc", "expires_at": time.time() + 3600, "scope": ["*"]}
+
+    cache.save(key, token)
+    assert cache.load(key)["access_token"] == "abc"
+    assert cache.load(spier_auth.credentials_key("id", "other", "ua")) is None
+
+    cache.clear()
+    assert cache.load(key) is None
+
+
+def test_token_cache_ignores_tokens_close_to_expiry(tmp_path):
+    cache = spier_auth.TokenCache(str(tmp_path / "token.json"))
+    key = spier_auth.credentials_key("id", "secret", "ua")
+    cache.save(key, {"access_token": "abc", "expires_at": time.time() + spier_auth.TOKEN_REFRESH_MARGIN - 1})
+    assert cache.load(key) is None
+
+
+def test_clone_uses_same_credentials_and_cached_token(reddit, tmp_path):
+    cache = spier_auth.TokenCache(str(tmp_path / "token.json"))
+    key = spier_auth.credentials_key("client-id", "client-secret", "RedditSpier tests")
+    cache.save(key, {"access_token": "cached-token", "expires_at": time.time() + 3600, "scope": ["*"]})
+
+    clone = spier_auth.clone_reddit(reddit, cache)
+    assert clone is not reddit
+    assert spier_auth._authorizer(clone) is not spier_auth._authorizer(reddit)
+    assert (clone.config.client_id, clone.config.client_secret, clone.config.user_agent) == (
+        "client-id", "client-secret", "RedditSpier tests")
+    assert spier_auth._authorizer(clone).is_valid()
+    assert spier_auth._authorizer(clone).access_token == "cached-token"
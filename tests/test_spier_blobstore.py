@@ -0,0 +1,62 @@
+"""
+spier_blobstore 的测试
+"""
+import threading
+
+import pytest
+
+import spier_blobstore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = spier_blobstore.BlobStore(directory=str(tmp_path))
+    yield store
+    store.close()
+
+
+def test_read_back_unicode_and_empty_text(store):
+    refs = [store.append(text) for text in ["hello", "", "中文正文 ✓", "x" * 10000]]
+    assert [store.read(ref) for ref in refs] == ["hello", "", "中文正文 ✓", "x" * 10000]
+    assert refs[2][1] == len("中文正文 ✓".encode("utf-8"))
+
+
+def test_read_after_growth_remaps(store):
+    first = store.append("first")
+    assert store.read(first) == "first"
+    later = store.append("later" * 1000)
+    assert store.read(later) == "later" * 1000
+    assert store.read(first) == "first"
+
+
+def test_concurrent_append_and_read(store):
+    refs = {}
+
+    def writer(n):
+        for i in range(200):
+            text = f"{n}-{i}"
+            refs[text] = store.append(text)
+            assert store.read(refs[text]) == text
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(store.read(ref) == text for text, ref in refs.items())
+
+
+def test_record_body_falls_back_to_truncated_selftext(store):
+    ref = store.append("full body")
+    assert spier_blobstore.record_body({"selftext": "full...", "body_ref": ref}, store) == "full body"
+    assert spier_blobstore.record_body({"selftext": "full...", "body_ref": None}, store) == "full..."
+    assert spier_blobstore.record_body({"selftext": "full...", "body_ref": ref}, None) == "full..."
+
+
+def test_closed_store_cannot_be_read(tmp_path):
+    store = spier_blobstore.BlobStore(directory=str(tmp_path))
+    ref = store.append("text")
+    store.read(ref)
+    store.close()
+    with pytest.raises(ValueError):
+        store.read(ref)
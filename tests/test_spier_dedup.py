@@ -0,0 +1,81 @@
+"""
+spier_dedup 的测试
+"""
+import numpy as np
+
+import spier_dedup
+
+BASE = ("the quick brown fox jumps over the lazy dog while the farmer watches from the porch "
+        "and the cat sleeps in the warm afternoon sun near the old red barn")
+
+
+def jaccard(a, b, k=spier_dedup.SHINGLE_SIZE):
+    a, b = spier_dedup.normalize(a).encode(), spier_dedup.normalize(b).encode()
+    sa = {a[i:i + k] for i in range(len(a) - k + 1)}
+    sb = {b[i:i + k] for i in range(len(b) - k + 1)}
+    return len(sa & sb) / len(sa | sb)
+
+
+def test_candidate_threshold_is_below_similarity_threshold():
+    rows = spier_dedup.NUM_PERM // spier_dedup.BANDS
+    assert (1 / spier_dedup.BANDS) ** (1 / rows) < spier_dedup.SIMILARITY_THRESHOLD
+
+
+def test_near_duplicates_just_above_threshold_are_clustered():
+    edited = BASE.replace("lazy dog", "sleepy hound").replace("old red barn", "new barn")
+    assert 0.6 <= jaccard(BASE, edited) < 0.75
+
+    # 不同的MinHash种子下都应聚到一起（旧的16段x8行设置下这类文档对经常漏掉）
+    for seed in range(20):
+        hashes, docs = spier_dedup.shingle_hashes([BASE, edited])
+        signatures, has_shingles = spier_dedup.minhash_signatures(hashes, docs, 2, seed=seed)
+        left, right = spier_dedup.lsh_candidate_pairs(signatures, np.flatnonzero(has_shingles))
+        assert len(left), f"seed={seed} 没有产生候选对"
+
+
+def test_cluster_texts_groups_duplicates_and_keeps_distinct_texts_apart():
+    texts = [
+        BASE,
+        "completely unrelated text about python packaging and wheels on linux",
+        BASE.upper() + "  ",
+        "x",
+    ]
+    cluster_ids, sizes = spier_dedup.cluster_texts(texts)
+    assert list(cluster_ids) == [1, 2, 1, 3]
+    assert list(sizes) == [2, 1, 2, 1]
+
+
+def test_cluster_texts_empty():
+    cluster_ids, sizes = spier_dedup.cluster_texts([])
+    assert len(cluster_ids) == 0 and len(sizes) == 0
+
+
+def test_signatures_do_not_depend_on_batching(monkeypatch):
+    texts = [f"{BASE} {i}" for i in range(50)] + ["", "abc"]
+    expected = spier_dedup.document_signatures(texts)
+    monkeypatch.setattr(spier_dedup, "TEXT_BATCH_CHARS", 500)
+    signatures, has_shingles = spier_dedup.document_signatures(texts)
+    assert np.array_equal(signatures, expected[0])
+    assert np.array_equal(has_shingles, expected[1])
+    assert list(has_shingles[-2:]) == [False, False]
+
+
+def test_large_corpus_is_clustered_in_bounded_memory(monkeypatch):
+    import tracemalloc
+
+    monkeypatch.setattr(spier_dedup, "TEXT_BATCH_CHARS", 100_000)
+    rng = np.random.default_rng(0)
+    words = np.array(["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta", "iota", "kappa"])
+
+    def peak_memory(n):
+        texts = [" ".join(words[rng.integers(0, len(words), 80)]) for _ in range(n)]
+        tracemalloc.start()
+        try:
+            cluster_ids, _ = spier_dedup.cluster_texts(texts)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    small, large = peak_memory(2000), peak_memory(10000)
+    # 一次性切片整个语料时每篇约500字符的文档需要约20KB；分批后每篇只多出签名和候选对的几KB
+    assert (large - small) / 8000 < 3000
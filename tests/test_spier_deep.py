@@ -0,0 +1,73 @@
+"""
+spier_deep 的测试
+"""
+import threading
+
+import spier_deep
+
+
+def test_search_is_split_by_sort_and_time_filter():
+    partitions = spier_deep.plan_partitions("python", "pandas")
+    assert len(partitions) == 30
+    assert {(p.sort, p.time_filter) for p in partitions} == {
+        (sort, time_filter) for sort in spier_deep.SEARCH_SORTS for time_filter in spier_deep.TIME_FILTERS
+    }
+    assert all(p.subreddit == "python" and p.keyword == "pandas" for p in partitions)
+
+
+def test_listings_are_split_by_listing_and_time_filter():
+    partitions = spier_deep.plan_partitions("python", "")
+    assert len(partitions) == 15
+    assert [(p.sort, p.time_filter) for p in partitions[:3]] == [("new", None), ("hot", None), ("rising", None)]
+    assert {(p.sort, p.time_filter) for p in partitions[3:]} == {
+        (name, time_filter) for name in spier_deep.TIMED_LISTINGS for time_filter in spier_deep.TIME_FILTERS
+    }
+
+
+def test_partition_listing_passes_time_filter(fake_reddit):
+    search = spier_deep.Partition("python", "pandas", "top", "week")
+    timed = spier_deep.Partition("python", "", "controversial", "day")
+    plain = spier_deep.Partition("python", "", "rising")
+    for partition in (search, timed, plain):
+        partition.listing(fake_reddit)
+    assert [(q["method"], q["sort"], q["time_filter"], q["limit"]) for q in fake_reddit.queries] == [
+        ("search", "top", "week", None),
+        ("controversial", "controversial", "day", None),
+        ("rising", "rising", None, None),
+    ]
+
+
+def test_quota_is_shared_between_threads():
+    quota = spier_deep.Quota(1000)
+    taken = []
+
+    def take():
+        taken.append(sum(1 for _ in range(500) if quota.take()))
+
+    threads = [threading.Thread(target=take) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(taken) == 1000
+    assert quota.exhausted
+    assert not quota.take()
+
+
+def test_coverage_report_counts():
+    complete, truncated, failed, idle = (spier_deep.Partition("python", "", "top", f) for f in ("all", "year", "month", "week"))
+    complete.fetched, complete.added, complete.complete = 40, 40, True
+    truncated.fetched, truncated.added = spier_deep.LISTING_CAP, 300
+    failed.fetched, failed.added, failed.failed = 100, 10, True
+
+    report = spier_deep.format_coverage_report([complete, truncated, failed, idle])
+    lines = report.splitlines()
+    assert lines[0] == (f"r/python 关键词=无: 4 个分区，取回 {140 + spier_deep.LISTING_CAP}，"
+                        f"去重后新增 350，1 个分区达到上限，1 个分区失败")
+    assert lines[1:] == [
+        "  - top/all: 取回 40，新增 40（完整）",
+        f"  - top/year: 取回 {spier_deep.LISTING_CAP}，新增 300（达到上限）",
+        "  - top/month: 取回 100，新增 10（失败）",
+        "  - top/week: 取回 0，新增 0（未运行）",
+    ]
+    assert spier_deep.format_coverage_report([]) == "没有深度采集的分区"
@@ -0,0 +1,74 @@
+"""
+spier_export 的测试
+"""
+import os
+import time
+
+import pytest
+
+pytest.importorskip("pyarrow")
+pd = pytest.importorskip("pandas")
+
+import spier_export
+
+
+def make_record(post_id, subreddit="python", **fields):
+    record = {
+        "id": post_id, "subreddit": subreddit, "title": f"title {post_id}", "keyword": "", "author": "someone",
+        "score": 3, "num_comments": 1, "created_utc": 1700000000.0, "selftext": "body", "url": "https://example.com",
+        "collected_at": time.time(),
+    }
+    record.update(fields)
+    return record
+
+
+def test_export_round_trip_with_partitions(tmp_path):
+    records = [make_record("a"), make_record("b", subreddit="rust"), make_record("c")]
+    paths = spier_export.export_parquet(records, str(tmp_path))
+
+    assert len(paths) == 2
+    assert all(os.path.basename(p).startswith("part-") for p in paths)
+    frame = pd.read_parquet(str(tmp_path))
+    assert sorted(frame["id"]) == ["a", "b", "c"]
+    assert sorted(frame["subreddit"].astype(str).unique()) == ["python", "rust"]
+
+
+def test_append_keeps_existing_files(tmp_path):
+    spier_export.export_parquet([make_record("a")], str(tmp_path))
+    spier_export.export_parquet([make_record("b")], str(tmp_path), append=True)
+
+    assert len(spier_export.dataset_files(str(tmp_path))) == 2
+    assert sorted(pd.read_parquet(str(tmp_path))["id"]) == ["a", "b"]
+
+
+def test_overwrite_only_removes_dataset_files(tmp_path):
+    spier_export.export_parquet([make_record("a")], str(tmp_path))
+    foreign = tmp_path / "other_project" / "data" / "important.parquet"
+    foreign.parent.mkdir(parents=True)
+    foreign.write_bytes(b"not ours")
+    stray = tmp_path / "subreddit=python" / "notes.txt"
+    stray.write_text("keep me")
+
+    spier_export.export_parquet([make_record("b")], str(tmp_path), append=False)
+
+    assert foreign.read_bytes() == b"not ours"
+    assert stray.read_text() == "keep me"
+    files = spier_export.dataset_files(str(tmp_path))
+    assert len(files) == 1
+    assert list(pd.read_parquet(files[0])["id"]) == ["b"]
+
+
+def test_has_parquet_files_ignores_foreign_parquet(tmp_path):
+    (tmp_path / "important.parquet").write_bytes(b"x")
+    assert not spier_export.has_parquet_files(str(tmp_path))
+    spier_export.export_parquet([make_record("a")], str(tmp_path))
+    assert spier_export.has_parquet_files(str(tmp_path))
+
+
+def test_lexicon_columns(tmp_path):
+    record = make_record("a", lexicon_scores={"brand": 2.0}, sentiment=0.5, cluster_id=1)
+    spier_export.export_parquet([record], str(tmp_path), lexicon_names=["brand", "missing"])
+    frame = pd.read_parquet(str(tmp_path))
+    assert frame["lexicon_brand"][0] == 2.0
+    assert pd.isna(frame["lexicon_missing"][0])
+    assert frame["sentiment"][0] == 0.5
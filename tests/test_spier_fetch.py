@@ -0,0 +1,136 @@
+"""
+spier_fetch 的测试（不访问网络）
+"""
+import threading
+
+import pytest
+from prawcore import exceptions as prawcore_exceptions
+
+import spier_fetch
+import spier_jobs
+
+
+class FakeResponse:
+    """
+    prawcore 异常用到的 requests.Response 字段
+    """
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = ""
+
+
+def response_error(status_code, headers=None):
+    response = FakeResponse(status_code, headers)
+    if status_code == 429:
+        return prawcore_exceptions.TooManyRequests(response)
+    if status_code >= 500:
+        return prawcore_exceptions.ServerError(response)
+    if status_code == 403:
+        return prawcore_exceptions.Forbidden(response)
+    if status_code == 404:
+        return prawcore_exceptions.NotFound(response)
+    return prawcore_exceptions.ResponseException(response)
+
+
+@pytest.mark.parametrize("error", [
+    response_error(429),
+    response_error(500),
+    response_error(503),
+    response_error(408),
+    prawcore_exceptions.RequestException(ConnectionError("reset"), (), {}),
+    TimeoutError("timeout"),
+    ConnectionError("reset"),
+])
+def test_transient_errors(error):
+    assert spier_fetch.is_transient(error)
+
+
+@pytest.mark.parametrize("error", [
+    response_error(403),
+    response_error(404),
+    response_error(400),
+    ValueError("boom"),
+])
+def test_permanent_errors(error):
+    assert not spier_fetch.is_transient(error)
+
+
+def test_retry_after_is_a_floor_for_the_jittered_delay():
+    error = response_error(429, {"retry-after": "42"})
+    assert all(spier_fetch.retry_delay(0, error) == 42.0 for _ in range(50))
+    # 超过上限的 Retry-After 被截断
+    error = response_error(429, {"retry-after": "100000"})
+    assert spier_fetch.retry_delay(0, error) == spier_fetch.MAX_RETRY_AFTER
+    # 无法解析的 Retry-After 被忽略
+    error = prawcore_exceptions.ResponseException(FakeResponse(503, {"retry-after": "soon"}))
+    assert spier_fetch.retry_delay(0, error) <= spier_fetch.BASE_DELAY
+
+
+def test_jitter_is_bounded():
+    for attempt in range(12):
+        bound = min(spier_fetch.MAX_DELAY, spier_fetch.BASE_DELAY * 2 ** attempt)
+        delays = [spier_fetch.retry_delay(attempt, TimeoutError()) for _ in range(200)]
+        assert all(0 <= delay <= bound for delay in delays)
+    assert max(spier_fetch.retry_delay(20) for _ in range(200)) <= spier_fetch.MAX_DELAY
+
+
+def test_retry_budget_is_exhausted():
+    budget = spier_fetch.RetryBudget(2)
+    assert [budget.consume() for _ in range(4)] == [True, True, False, False]
+    assert budget.used == 2
+
+
+def test_failure_report_text():
+    failures = [
+        spier_fetch.FetchFailure("python", "pandas", 3, response_error(503)),
+        spier_fetch.FetchFailure("rust", "", 0, "KeyError: 'id'"),
+    ]
+    assert spier_fetch.format_failure_report(failures) == (
+        "2 个抓取单元失败:\n"
+        "  - r/python 关键词=pandas 第3页: ServerError: received 503 HTTP response\n"
+        "  - r/rust 关键词=无 处理帖子: KeyError: 'id'"
+    )
+    assert spier_fetch.format_failure_report([]) == "所有抓取单元均已成功完成"
+
+
+class StuckListing:
+    """
+    第2页的请求一直超时
+    """
+    def __init__(self, listing):
+        self.listing = listing
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.listing.index == spier_jobs.PAGE_SIZE:
+            raise TimeoutError("timeout")
+        return next(self.listing)
+
+
+def test_exhausted_budget_stops_retries_and_reports_the_page(fake_reddit, monkeypatch):
+    monkeypatch.setattr(spier_fetch, "BASE_DELAY", 0.001)
+    fake_reddit.listings["a"] = lambda query: StuckListing(fake_reddit.listing(spier_jobs.PAGE_SIZE * 2))
+    logs = []
+    finished = threading.Event()
+
+    def on_change(job):
+        if not job.active and job.runs:
+            finished.set()
+
+    manager = spier_jobs.JobManager(lambda: fake_reddit, lambda job, record: None, logs.append, on_change,
+                                    rate_limiter=spier_jobs.RateLimiter(rate=1000, burst=1000))
+    job = spier_jobs.ScrapeJob(["a"], [], spier_jobs.PAGE_SIZE * 2, "hot", retry_budget=2)
+    manager.submit(job)
+    assert finished.wait(10)
+
+    # 预算用完后不再重试（单页最多重试 MAX_ATTEMPTS 次）
+    assert job.retries.used == 2
+    assert sum("秒后第" in line for line in logs) == 2
+    assert job.status == spier_jobs.STATUS_PARTIAL
+    assert job.collected == spier_jobs.PAGE_SIZE
+    assert [(f.subreddit, f.page) for f in job.failures] == [("a", 2)]
+    assert f"[任务#{job.id}] r/a 关键词 '无' 第2页失败: timeout" in logs
+    assert f"[任务#{job.id}] 1 个抓取单元失败:\n  - r/a 关键词=无 第2页: TimeoutError: timeout" in logs
@@ -0,0 +1,275 @@
+"""
+spier_jobs 的测试（使用假的Reddit客户端，不访问网络）
+"""
+import threading
+import time
+
+import pytest
+
+import spier_deep
+import spier_fetch
+import spier_jobs
+
+
+class Collector:
+    def __init__(self):
+        self.records = []
+        self.logs = []
+        self.finished = {}
+
+    def on_record(self, job, record):
+        self.records.append((job.id, record))
+
+    def on_change(self, job):
+        if not job.active and job.runs:
+            self.finished.setdefault(job.id, threading.Event()).set()
+
+    def wait(self, job, timeout=10):
+        assert self.finished.setdefault(job.id, threading.Event()).wait(timeout), f"任务#{job.id}未结束"
+
+
+def make_manager(reddit, collector, **kwargs):
+    kwargs.setdefault("rate_limiter", spier_jobs.RateLimiter(rate=1000, burst=1000))
+    return spier_jobs.JobManager(
+        get_reddit=lambda: reddit,
+        on_record=collector.on_record,
+        on_log=collector.logs.append,
+        on_change=collector.on_change,
+        **kwargs
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(spier_fetch, "BASE_DELAY", 0.001)
+
+
+def test_collects_posts_and_truncates_selftext(fake_reddit):
+    collector = Collector()
+    fake_reddit.listings["a"] = lambda query: fake_reddit.listing(1, selftext="y" * 500)
+    manager = make_manager(fake_reddit, collector)
+    job = spier_jobs.ScrapeJob(["a"], [], 10, "hot")
+    manager.submit(job)
+    collector.wait(job)
+
+    assert job.status == spier_jobs.STATUS_DONE
+    record = collector.records[0][1]
+    assert len(record["selftext"]) == spier_jobs.SELFTEXT_MAX_LENGTH
+    assert record["selftext"].endswith("...")
+
+
+def test_transient_errors_are_retried_from_the_same_page(fake_reddit):
+    collector = Collector()
+    fake_reddit.listings["a"] = lambda query: fake_reddit.listing(5, errors={2: TimeoutError("timeout")})
+    manager = make_manager(fake_reddit, collector)
+    job = spier_jobs.ScrapeJob(["a"], [], 10, "hot")
+    manager.submit(job)
+    collector.wait(job)
+
+    assert job.status == spier_jobs.STATUS_DONE
+    assert [r["id"] for _, r in collector.records] == ["p1", "p2", "p3", "p4", "p5"]
+    assert job.retries.used == 1
+
+
+def test_failed_unit_keeps_partial_results_and_other_units_run(fake_reddit):
+    collector = Collector()
+    fake_reddit.listings["bad"] = lambda query: fake_reddit.listing(5, errors={3: ValueError("boom")})
+    fake_reddit.listings["good"] = lambda query: fake_reddit.listing(2)
+    manager = make_manager(fake_reddit, collector)
+    job = spier_jobs.ScrapeJob(["bad", "good"], [], 10, "hot")
+    manager.submit(job)
+    collector.wait(job)
+
+    assert job.status == spier_jobs.STATUS_PARTIAL
+    assert job.collected == 5
+    assert [(f.subreddit, f.page) for f in job.failures] == [("bad", 1)]
+
+
+def test_worker_survives_unexpected_errors(fake_reddit):
+    collector = Collector()
+    calls = []
+
+    def get_reddit():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("unexpected")
+        return fake_reddit
+
+    manager = spier_jobs.JobManager(get_reddit, collector.on_record, collector.logs.append, collector.on_change,
+                                    max_workers=1, reserved_workers=0)
+    first = spier_jobs.ScrapeJob(["a"], [], 10, "hot")
+    second = spier_jobs.ScrapeJob(["a"], [], 10, "hot")
+    manager.submit(first)
+    manager.submit(second)
+    collector.wait(first)
+    collector.wait(second)
+
+    assert first.status == spier_jobs.STATUS_FAILED
+    assert first.error == "unexpected"
+    assert second.status == spier_jobs.STATUS_DONE
+
+
+def test_high_priority_job_runs_while_normal_workers_are_busy(fake_reddit):
+    collector = Collector()
+    gate = threading.Event()
+    fake_reddit.listings["slow"] = lambda query: fake_reddit.listing(1, gate=gate)
+    manager = make_manager(fake_reddit, collector, max_workers=1)
+    backfill = spier_jobs.ScrapeJob(["slow"], [], 10, "hot", priority=spier_jobs.PRIORITY_LOW)
+    waiting = spier_jobs.ScrapeJob(["fast"], [], 10, "hot", priority=spier_jobs.PRIORITY_NORMAL)
+    interactive = spier_jobs.ScrapeJob(["fast"], [], 10, "hot", priority=spier_jobs.PRIORITY_HIGH)
+    try:
+        manager.submit(backfill)
+        deadline = time.monotonic() + 5
+        while backfill.status != spier_jobs.STATUS_RUNNING and time.monotonic() < deadline:
+            time.sleep(0.01)
+        manager.submit(waiting)
+        manager.submit(interactive)
+        collector.wait(interactive)
+        # 普通任务仍在等待唯一的普通工作线程
+        assert waiting.status == spier_jobs.STATUS_QUEUED
+    finally:
+        gate.set()
+    collector.wait(backfill)
+    collector.wait(waiting)
+
+
+def test_unit_cache_is_shared_by_one_off_jobs_but_not_recurring_jobs(fake_reddit):
+    collector = Collector()
+    fake_reddit.listings["a"] = lambda query: fake_reddit.listing(3)
+    manager = make_manager(fake_reddit, collector, unit_cache=spier_jobs.UnitCache())
+    first = spier_jobs.ScrapeJob(["a"], [], 10, "hot")
+    manager.submit(first)
+    collector.wait(first)
+    second = spier_jobs.ScrapeJob(["A"], [], 10, "hot")
+    manager.submit(second)
+    collector.wait(second)
+    assert len(fake_reddit.queries) == 1
+    assert second.collected == 3
+
+    recurring = spier_jobs.ScrapeJob(["a"], [], 10, "hot", interval=60)
+    manager.submit(recurring)
+    deadline = time.monotonic() + 5
+    while recurring.status != spier_jobs.STATUS_WAITING and time.monotonic() < deadline:
+        time.sleep(0.01)
+    manager.cancel(recurring.id)
+    assert len(fake_reddit.queries) == 2
+    assert recurring.collected == 3
+
+
+def test_deep_job_queries_every_partition_and_dedups_ids(fake_reddit):
+    collector = Collector()
+    # 每个分区都返回相同的10个帖子
+    fake_reddit.listings["a"] = lambda query: fake_reddit.listing(10)
+    manager = make_manager(fake_reddit, collector)
+    job = spier_jobs.ScrapeJob(["a"], ["kw"], 1000, "hot", deep=True)
+    manager.submit(job)
+    collector.wait(job)
+
+    assert job.status == spier_jobs.STATUS_DONE
+    assert sorted(r["id"] for _, r in collector.records) == sorted(f"p{i}" for i in range(1, 11))
+    assert {(q["sort"], q["time_filter"]) for q in fake_reddit.queries} == {
+        (sort, time_filter) for sort in spier_deep.SEARCH_SORTS for time_filter in spier_deep.TIME_FILTERS
+    }
+    [partitions] = job.coverage
+    assert len(partitions) == 30
+    assert sum(p.fetched for p in partitions) == 300
+    assert sum(p.added for p in partitions) == 10
+    assert all(p.complete for p in partitions)
+
+
+def test_deep_job_stops_at_the_quota(fake_reddit):
+    collector = Collector()
+    # 每个分区返回各不相同的帖子
+    fake_reddit.listings["a"] = lambda query: fake_reddit.listing(10, prefix=f"{query['sort']}-{query['time_filter']}-")
+    manager = make_manager(fake_reddit, collector)
+    job = spier_jobs.ScrapeJob(["a"], [], 25, "hot", deep=True)
+    manager.submit(job)
+    collector.wait(job)
+
+    assert job.collected == 25
+    assert len({r["id"] for _, r in collector.records}) == 25
+    [partitions] = job.coverage
+    assert len(partitions) == 15
+    assert sum(p.added for p in partitions) == 25
+    # 达到数量后其余分区不再抓取
+    assert len(fake_reddit.queries) < 15
+    assert any(not p.fetched for p in partitions)
+
+
+def test_deep_job_keeps_going_when_a_partition_fails(fake_reddit):
+    collector = Collector()
+
+    def listing(query):
+        if query["sort"] == "rising":
+            return fake_reddit.listing(5, prefix="rising-", errors={2: ValueError("boom")})
+        return fake_reddit.listing(3, prefix=f"{query['sort']}-{query['time_filter']}-")
+
+    fake_reddit.listings["a"] = listing
+    manager = make_manager(fake_reddit, collector)
+    job = spier_jobs.ScrapeJob(["a"], [], 1000, "hot", deep=True)
+    manager.submit(job)
+    collector.wait(job)
+
+    assert job.status == spier_jobs.STATUS_PARTIAL
+    assert job.collected == 14 * 3 + 2
+    [partitions] = job.coverage
+    assert [p.sort for p in partitions if p.failed] == ["rising"]
+
+
+class ThreadCheckedReddit:
+    """
+    记录使用过自己的线程的客户端
+    """
+    def __init__(self, reddit):
+        self.reddit = reddit
+        self.threads = set()
+
+    def subreddit(self, name):
+        self.threads.add(threading.get_ident())
+        return self.reddit.subreddit(name)
+
+
+def test_each_thread_uses_its_own_client(fake_reddit):
+    collector = Collector()
+    clones = []
+    lock = threading.Lock()
+
+    def clone_reddit(reddit):
+        clone = ThreadCheckedReddit(fake_reddit)
+        with lock:
+            clones.append(clone)
+        return clone
+
+    manager = make_manager(fake_reddit, collector, clone_reddit=clone_reddit)
+    jobs = [spier_jobs.ScrapeJob(["a"], [], 10, "hot"), spier_jobs.ScrapeJob(["b"], ["kw"], 1000, "hot", deep=True)]
+    for job in jobs:
+        manager.submit(job)
+    for job in jobs:
+        collector.wait(job)
+
+    assert all(job.status == spier_jobs.STATUS_DONE for job in jobs)
+    assert len(fake_reddit.queries) == 31
+    # 普通任务和深度采集的各分区线程都没有共用客户端
+    used = [clone for clone in clones if clone.threads]
+    assert len(used) >= 2
+    assert all(len(clone.threads) == 1 for clone in used)
+    assert len({next(iter(clone.threads)) for clone in used}) == len(used)
+
+
+def test_worker_recreates_its_client_after_reconnect(fake_reddit):
+    collector = Collector()
+    current = {"reddit": fake_reddit}
+    clones = []
+    manager = spier_jobs.JobManager(lambda: current["reddit"], collector.on_record, collector.logs.append,
+                                    collector.on_change, max_workers=1, reserved_workers=0,
+                                    clone_reddit=lambda reddit: clones.append(reddit) or reddit)
+    first = manager.submit(spier_jobs.ScrapeJob(["a"], [], 10, "hot"))
+    collector.wait(first)
+    second = manager.submit(spier_jobs.ScrapeJob(["a"], [], 10, "hot"))
+    collector.wait(second)
+    assert clones == [fake_reddit]
+
+    current["reddit"] = type(fake_reddit)()
+    third = manager.submit(spier_jobs.ScrapeJob(["a"], [], 10, "hot"))
+    collector.wait(third)
+    assert clones == [fake_reddit, current["reddit"]]
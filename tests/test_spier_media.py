@@ -0,0 +1,93 @@
+"""
+spier_media 磁盘缓存的测试
+"""
+import os
+
+import spier_media
+
+
+def thumbnail(n, size=100):
+    return bytes([n]) * size
+
+
+def test_index_is_loaded_lazily(tmp_path):
+    directory = tmp_path / "cache"
+    cache = spier_media.MediaCache(str(directory))
+    assert not directory.exists()
+    assert cache.peek("u1") is None
+    cache.put("u1", thumbnail(1))
+    assert cache.loaded
+    assert cache.contains("u1")
+
+
+def test_peek_does_not_change_eviction_order(tmp_path):
+    cache = spier_media.MediaCache(str(tmp_path), max_bytes=250)
+    cache.put("u1", thumbnail(1))
+    cache.put("u2", thumbnail(2))
+    path = cache.peek("u1")
+    assert path and os.path.exists(path)
+    assert cache.contains("u1")
+    cache.put("u3", thumbnail(3))
+    # u1 只被 peek 过，仍然是最旧的
+    assert not cache.contains("u1")
+    assert not os.path.exists(path)
+    assert cache.contains("u2") and cache.contains("u3")
+
+
+def test_get_marks_entry_as_recently_used(tmp_path):
+    cache = spier_media.MediaCache(str(tmp_path), max_bytes=250)
+    cache.put("u1", thumbnail(1))
+    cache.put("u2", thumbnail(2))
+    assert cache.get("u1")
+    cache.put("u3", thumbnail(3))
+    assert cache.get("u1")
+    assert cache.get("u2") is None
+    assert cache.get("u3")
+
+
+def test_total_size_stays_under_the_cap(tmp_path):
+    cache = spier_media.MediaCache(str(tmp_path), max_bytes=1000)
+    for n in range(30):
+        cache.put(f"u{n}", thumbnail(n, 150))
+        assert cache.total_bytes <= 1000
+    files = [os.path.join(d, name) for d, _, names in os.walk(tmp_path) for name in names if name.endswith(".jpg")]
+    assert len(files) == 6
+    assert sum(os.path.getsize(f) for f in files) == cache.total_bytes
+    assert sorted(cache.urls) == sorted(f"u{n}" for n in range(24, 30))
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    cache = spier_media.MediaCache(str(tmp_path))
+    assert cache.put("u1", thumbnail(1)) == cache.put("u2", thumbnail(1))
+    assert cache.total_bytes == 100
+
+
+def test_index_log_is_replayed_after_restart(tmp_path):
+    cache = spier_media.MediaCache(str(tmp_path), max_bytes=250)
+    cache.put("u1", thumbnail(1))
+    cache.put("u2", thumbnail(2))
+    # 同一URL的新内容覆盖旧记录
+    cache.put("u1", thumbnail(3))
+    with open(cache.index_path, "a", encoding="utf-8") as f:
+        f.write("broken line\n")
+        f.write("u9\t" + "0" * 64 + "\n")
+
+    reopened = spier_media.MediaCache(str(tmp_path), max_bytes=250)
+    reopened.load()
+    assert reopened.urls == cache.urls
+    assert reopened.get("u1") == cache.peek("u1")
+    assert reopened.get("u9") is None
+    assert reopened.total_bytes == cache.total_bytes
+
+
+def test_eviction_order_survives_restart(tmp_path):
+    cache = spier_media.MediaCache(str(tmp_path), max_bytes=250)
+    cache.put("u1", thumbnail(1))
+    cache.put("u2", thumbnail(2))
+    os.utime(cache.peek("u1"), (1000, 1000))
+    os.utime(cache.peek("u2"), (2000, 2000))
+
+    reopened = spier_media.MediaCache(str(tmp_path), max_bytes=250)
+    reopened.put("u3", thumbnail(3))
+    assert not reopened.contains("u1")
+    assert reopened.contains("u2") and reopened.contains("u3")
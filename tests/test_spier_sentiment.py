@@ -0,0 +1,48 @@
+"""
+spier_sentiment 的测试
+"""
+import spier_sentiment
+
+
+def lexicon_scores(title, selftext, lexicons):
+    [(_, _, scores)] = spier_sentiment.score_chunk([(0, title, selftext)], lexicons)
+    return scores
+
+
+def test_chinese_terms_match_inside_chinese_text():
+    lexicons = {"价格": {"太贵": 2.0, "便宜": 1.0}}
+    assert lexicon_scores("这个东西太贵了", "其实别家更便宜", lexicons) == {"价格": 3.0}
+
+
+def test_ascii_terms_still_match_whole_words_only():
+    lexicons = {"产品": {"bug": 1.0, "c++": 1.0}}
+    assert lexicon_scores("Found a bug", "debugging c++ code; bugs everywhere", lexicons) == {"产品": 2.0}
+
+
+def test_mixed_terms_only_need_boundaries_on_ascii_ends():
+    lexicons = {"产品": {"iphone手机": 1.0}}
+    assert lexicon_scores("买了iphone手机", "", lexicons) == {"产品": 1.0}
+    assert lexicon_scores("myiphone手机", "", lexicons) == {"产品": 0}
+
+
+def test_longer_terms_win():
+    lexicons = {"词组": {"not good": 5.0, "good": 1.0}}
+    assert lexicon_scores("not good at all", "", lexicons) == {"词组": 5.0}
+
+
+def test_sentiment_handles_negation():
+    assert spier_sentiment.sentiment_score("this is great") > 0
+    assert spier_sentiment.sentiment_score("this is not great") < 0
+    assert spier_sentiment.sentiment_score("") == 0
+
+
+def test_score_cache_round_trip(tmp_path):
+    cache = spier_sentiment.ScoreCache(str(tmp_path / "scores.sqlite"))
+    try:
+        digest = spier_sentiment.content_hash("t", "s")
+        cache.store([("p1", digest, 0.5, {"价格": 2.0})], "lex")
+        assert cache.lookup([("p1", digest)], "lex") == {"p1": (0.5, {"价格": 2.0})}
+        assert cache.lookup([("p1", "changed")], "lex") == {}
+        assert cache.lookup([("p1", digest)], "other") == {}
+    finally:
+        cache.close()
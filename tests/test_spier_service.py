@@ -0,0 +1,244 @@
+"""
+spier_service 的测试（服务在本机随机端口运行，使用假的Reddit客户端）
+"""
+import http.server
+import threading
+import time
+import urllib.error
+
+import pytest
+
+import spier_blobstore
+import spier_jobs
+import spier_service
+
+TOKEN = "test-token"
+
+
+@pytest.fixture
+def service(tmp_path, fake_reddit):
+    service = spier_service.ScraperService(str(tmp_path / "reddit_config.json"), TOKEN)
+    service.reddit = fake_reddit
+    # 假客户端可以在多个线程中共用
+    service.job_manager.clone_reddit = lambda reddit: reddit
+    service.job_manager.rate_limiter = spier_jobs.RateLimiter(rate=1000, burst=1000)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), spier_service.ServiceRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    service.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield service
+    server.shutdown()
+    server.server_close()
+    service.job_manager.shutdown()
+    service.close()
+
+
+def wait_until(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "等待超时"
+        time.sleep(0.01)
+
+
+@pytest.mark.parametrize("priority", [["high"], {"a": 1}, True, 1.5, "urgent", 7])
+def test_invalid_priority_is_a_request_error(priority):
+    with pytest.raises(spier_service.RequestError):
+        spier_service.parse_job_request({"subreddits": ["python"], "priority": priority})
+
+
+def test_priority_names_and_numbers_are_accepted():
+    assert spier_service.parse_job_request({"subreddits": ["a"], "priority": "high"}).priority == spier_jobs.PRIORITY_HIGH
+    assert spier_service.parse_job_request({"subreddits": ["a"], "priority": "低"}).priority == spier_jobs.PRIORITY_LOW
+    assert spier_service.parse_job_request({"subreddits": ["a"], "priority": 1}).priority == spier_jobs.PRIORITY_NORMAL
+
+
+def test_invalid_priority_returns_400(service):
+    client = spier_service.ServiceClient(service.url, TOKEN)
+    with pytest.raises(RuntimeError, match="priority"):
+        client.submit({"subreddits": ["python"], "priority": ["high"]})
+
+
+@pytest.mark.parametrize("token", ["", "wrong-token"])
+def test_requests_without_the_shared_token_are_rejected(service, token):
+    client = spier_service.ServiceClient(service.url, token)
+    for request in (client.jobs, lambda: client.submit({"subreddits": ["python"]}), lambda: client.cancel(1)):
+        with pytest.raises(RuntimeError, match="令牌"):
+            request()
+    with pytest.raises(urllib.error.HTTPError) as error:
+        list(client.results(1))
+    assert error.value.code == 401
+    assert service.job_manager.jobs() == []
+
+
+def test_service_requires_a_token(tmp_path):
+    with pytest.raises(ValueError):
+        spier_service.ScraperService(str(tmp_path / "reddit_config.json"), "")
+
+
+def test_configured_token(tmp_path):
+    path = tmp_path / "reddit_config.json"
+    assert spier_service.configured_token(str(path)) == ""
+    path.write_text('{"service_token": "abc"}')
+    assert spier_service.configured_token(str(path)) == "abc"
+
+
+def test_results_stream_full_bodies_and_share_units(service):
+    client = spier_service.ServiceClient(service.url, TOKEN)
+    first = client.submit({"subreddits": ["python"], "limit": 5})
+    wait_until(lambda: not client.job(first["id"])["active"])
+    second = client.submit({"subreddits": ["Python"], "limit": 3})
+    wait_until(lambda: not client.job(second["id"])["active"])
+
+    assert [query["subreddit"] for query in service.reddit.queries] == ["python"]
+    records = list(client.results(first["id"]))
+    assert [r["id"] for r in records] == [f"python{i}" for i in range(1, 6)]
+    assert records[0]["selftext"] == "python1 " + "正文" * 200
+    assert "body_ref" not in records[0]
+    assert [r["id"] for r in client.results(second["id"])] == [f"python{i}" for i in range(1, 4)]
+    assert len(list(client.results(first["id"], offset=3))) == 2
+
+
+def test_finished_jobs_are_evicted_and_their_bodies_released(service, monkeypatch):
+    monkeypatch.setattr(spier_service, "MAX_FINISHED_JOBS", 1)
+    client = spier_service.ServiceClient(service.url, TOKEN)
+    first = client.submit({"subreddits": ["a"], "limit": 2})
+    wait_until(lambda: not client.job(first["id"])["active"])
+    store = service.results[first["id"]].body_store
+    second = client.submit({"subreddits": ["b"], "limit": 2})
+    wait_until(lambda: first["id"] not in service.results)
+
+    with pytest.raises(RuntimeError, match="不存在"):
+        client.job(first["id"])
+    assert store.file.closed
+    assert second["id"] in service.results
+
+
+def test_delete_removes_a_finished_job(service):
+    client = spier_service.ServiceClient(service.url, TOKEN)
+    job = client.submit({"subreddits": ["a"], "limit": 2})
+    wait_until(lambda: not client.job(job["id"])["active"])
+    client.cancel(job["id"])
+    assert service.get_job(job["id"]) is None
+    assert job["id"] not in service.results
+
+
+def test_recurring_jobs_keep_only_recent_runs():
+    results = spier_service.JobResults()
+    stores = []
+    for run in range(1, 5):
+        stores.append(results.start_run(run, keep_runs=2))
+        for i in range(3):
+            record = spier_jobs.attach_body({"id": f"{run}-{i}", "selftext": "body"}, results.body_store)
+            results.records.append((record, results.body_store))
+
+    assert results.dropped == 6
+    assert [record["id"] for record, _ in results.records] == ["3-0", "3-1", "3-2", "4-0", "4-1", "4-2"]
+    assert [store.file.closed for store in stores] == [True, True, False, False]
+    results.close()
+    assert all(store.file.closed for store in stores)
+
+
+def test_stream_skips_dropped_results(service):
+    job = spier_jobs.ScrapeJob(["a"], [], 1, "hot")
+    job.status = spier_jobs.STATUS_DONE
+    service.job_manager.all_jobs[job.id] = job
+    results = service.results[job.id] = spier_service.JobResults()
+    results.start_run(1, 1)
+    results.dropped = 10
+    results.records.append(({"id": "x", "selftext": "x", "body_ref": None}, results.body_store))
+
+    records, offset, active = service.wait_results(job.id, 2, 0)
+    assert [record["id"] for record, _ in records] == ["x"]
+    assert offset == 11 and not active
+
+
+def test_remote_job_manager_receives_results(service, monkeypatch):
+    monkeypatch.setattr(spier_service, "CLIENT_POLL_INTERVAL", 0.05)
+    store = spier_blobstore.BlobStore()
+    records = []
+    manager = spier_service.RemoteJobManager(service.url, TOKEN, lambda job, record: records.append(record), lambda message: None,
+                                             body_store=store)
+    try:
+        job = manager.submit(spier_jobs.ScrapeJob(["python"], [], 4, "hot"))
+        wait_until(lambda: len(records) == 4 and not manager.has_active_jobs())
+        assert job.status == spier_jobs.STATUS_DONE
+        assert records[0]["selftext"] == spier_jobs.truncate_selftext("python1 " + "正文" * 200)
+        assert spier_blobstore.record_body(records[0], store) == "python1 " + "正文" * 200
+    finally:
+        manager.shutdown()
+        store.close()
+
+
+class StalledHandler(http.server.BaseHTTPRequestHandler):
+    """
+    发送一条结果后不再发送任何数据的结果流（模拟已失效的服务）
+    """
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        self.end_headers()
+        if "offset=0&" in self.path:
+            self.wfile.write(b'{"id": "p1", "selftext": "body"}\n')
+            self.wfile.flush()
+        self.server.release.wait(5)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stalled_server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StalledHandler)
+    server.daemon_threads = True
+    server.paths = []
+    server.release = threading.Event()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.release.set()
+    server.shutdown()
+    server.server_close()
+
+
+def test_follow_times_out_on_a_silent_server(stalled_server, monkeypatch):
+    monkeypatch.setattr(spier_service, "CLIENT_FOLLOW_TIMEOUT", 0.2)
+    client = spier_service.ServiceClient(stalled_server.url, TOKEN)
+    received = []
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        for record in client.results(1, follow=True):
+            received.append(record["id"])
+    assert received == ["p1"]
+    assert time.monotonic() - start < 3
+
+
+def test_remote_job_manager_reconnects_from_the_last_offset(stalled_server, monkeypatch):
+    monkeypatch.setattr(spier_service, "CLIENT_FOLLOW_TIMEOUT", 0.2)
+    monkeypatch.setattr(spier_service, "CLIENT_RECONNECT_DELAY", 0.01)
+    records = []
+    manager = spier_service.RemoteJobManager(stalled_server.url, TOKEN, lambda job, record: records.append(record),
+                                             lambda message: None)
+    try:
+        job = spier_jobs.ScrapeJob(["python"], [], 1, "hot")
+        threading.Thread(target=manager._follow_thread, args=(job,), daemon=True).start()
+        wait_until(lambda: len(stalled_server.paths) >= 2)
+    finally:
+        manager.shutdown()
+    assert [record["id"] for record in records] == ["p1"]
+    assert "offset=1&" in stalled_server.paths[1]
+
+
+def test_follow_stream_sends_heartbeats_while_idle(service, monkeypatch):
+    monkeypatch.setattr(spier_service, "FOLLOW_POLL", 0.02)
+    monkeypatch.setattr(spier_service, "FOLLOW_HEARTBEAT", 0.05)
+    monkeypatch.setattr(spier_service, "CLIENT_FOLLOW_TIMEOUT", 0.5)
+    client = spier_service.ServiceClient(service.url, TOKEN)
+    job = client.submit({"subreddits": ["python"], "limit": 2, "interval": 60})
+    wait_until(lambda: client.job(job["id"])["status"] == spier_jobs.STATUS_WAITING)
+    # 任务等待下次运行时结果流保持空闲，取消后结果流结束
+    threading.Timer(1.0, client.cancel, args=(job["id"],)).start()
+    start = time.monotonic()
+    assert len(list(client.results(job["id"], follow=True))) == 2
+    assert time.monotonic() - start >= 0.9